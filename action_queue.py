@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import deque
+
+PRIORITY_PROTECT = 0
+PRIORITY_MODERATE = 1
+PRIORITY_DEFAULT = 2
+PRIORITY_LOG = 3
+
+
+class _Action:
+    __slots__ = ('priority', 'seq', 'route', 'factory', 'key', 'future', 'enqueued_at', 'attempts')
+
+    def __init__(self, priority, seq, route, factory, key, future, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.factory = factory
+        self.key = key
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Route:
+    __slots__ = ('active', 'blocked_until', 'parked')
+
+    def __init__(self):
+        self.active = 0
+        self.blocked_until = 0.0
+        self.parked = []
+
+
+def retry_after(error):
+    delay = getattr(error, 'retry_after', None)
+    if delay is None and getattr(error, 'status', None) == 429:
+        delay = 1.0
+    return delay
+
+
+class ActionQueue:
+    def __init__(self, max_concurrency=8, route_concurrency=1, max_attempts=5):
+        self.max_concurrency = max_concurrency
+        self.route_concurrency = route_concurrency
+        self.max_attempts = max_attempts
+        self.queue = None
+        self.routes = {}
+        self.pending_keys = {}
+        self.waits = deque(maxlen=1024)
+        self._seq = itertools.count()
+        self._workers = []
+        self.submitted = 0
+        self.executed = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def start(self):
+        if self._workers:
+            return
+        self.queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        actions = list(self.pending_keys.values())
+        while self.queue is not None and not self.queue.empty():
+            actions.append(self.queue.get_nowait())
+        for route in self.routes.values():
+            actions.extend(route.parked)
+        for action in actions:
+            action.future.cancel()
+        self.pending_keys.clear()
+        self.routes.clear()
+
+    def submit(self, route, factory, priority=PRIORITY_DEFAULT, key=None):
+        if key is not None and key in self.pending_keys:
+            self.deduplicated += 1
+            return self.pending_keys[key].future
+        loop = asyncio.get_running_loop()
+        action = _Action(priority, next(self._seq), route, factory, key, loop.create_future(), loop.time())
+        if key is not None:
+            self.pending_keys[key] = action
+        self.submitted += 1
+        self.queue.put_nowait(action)
+        return action.future
+
+    def _release(self, name):
+        route = self.routes.get(name)
+        if route is None:
+            return
+        if route.blocked_until > asyncio.get_running_loop().time():
+            return
+        if route.parked and route.active < self.route_concurrency:
+            self.queue.put_nowait(heapq.heappop(route.parked))
+        elif not route.parked and not route.active:
+            del self.routes[name]
+
+    def _finish(self, action, result=None, error=None):
+        if action.key is not None and self.pending_keys.get(action.key) is action:
+            del self.pending_keys[action.key]
+        if action.future.done():
+            return
+        if error is not None:
+            action.future.set_exception(error)
+        else:
+            action.future.set_result(result)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            action = await self.queue.get()
+            route = self.routes.get(action.route)
+            if route is None:
+                route = self.routes[action.route] = _Route()
+            if route.active >= self.route_concurrency or route.blocked_until > loop.time():
+                heapq.heappush(route.parked, action)
+                continue
+            if action.future.done():
+                self._finish(action)
+                self._release(action.route)
+                continue
+            if not action.attempts:
+                self.waits.append(loop.time() - action.enqueued_at)
+            route.active += 1
+            try:
+                result = await action.factory()
+            except asyncio.CancelledError:
+                action.future.cancel()
+                raise
+            except Exception as error:
+                delay = retry_after(error)
+                action.attempts += 1
+                if delay is not None and action.attempts < self.max_attempts:
+                    self.rate_limited += 1
+                    route.blocked_until = loop.time() + delay
+                    heapq.heappush(route.parked, action)
+                    loop.call_later(delay, self._release, action.route)
+                else:
+                    self.failures += 1
+                    logging.warning(f"Outbound action on {action.route} failed: {error!r}")
+                    self._finish(action, error=error)
+            else:
+                self.executed += 1
+                self._finish(action, result)
+            finally:
+                route.active -= 1
+            self._release(action.route)
+
+    def depth(self):
+        queued = self.queue.qsize() if self.queue is not None else 0
+        return queued + sum(len(route.parked) for route in self.routes.values())
+
+    def metrics(self):
+        waits = sorted(self.waits)
+        return {
+            'depth': self.depth(),
+            'routes': len(self.routes),
+            'blocked_routes': sum(1 for route in self.routes.values() if route.blocked_until > asyncio.get_running_loop().time()),
+            'submitted': self.submitted,
+            'executed': self.executed,
+            'deduplicated': self.deduplicated,
+            'rate_limited': self.rate_limited,
+            'failures': self.failures,
+            'wait_p50_ms': round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            'wait_p99_ms': round(waits[int(len(waits) * 0.99)] * 1000, 1) if waits else 0.0,
+        }
@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+
+GLOBAL = 0
+
+
+class _Cooldowns:
+    def __init__(self, seconds, clock):
+        self.seconds = seconds
+        self.clock = clock
+        self.until = OrderedDict()
+
+    def ready(self, key, now):
+        while self.until:
+            oldest, expires_at = next(iter(self.until.items()))
+            if expires_at > now:
+                break
+            del self.until[oldest]
+        return key not in self.until
+
+    def hit(self, key, now):
+        self.until[key] = now + self.seconds
+        self.until.move_to_end(key)
+
+
+class AfkIndex:
+    def __init__(self, channel_cooldown=10.0, target_cooldown=60.0, clock=time.monotonic):
+        self.clock = clock
+        self.entries = {}
+        self.ids = {}
+        self.channel_cooldowns = _Cooldowns(channel_cooldown, clock)
+        self.target_cooldowns = _Cooldowns(target_cooldown, clock)
+        self.lookups = 0
+        self.notices = 0
+        self.suppressed = 0
+        self.cleared = 0
+
+    def set(self, guild_id, user_id, reason, since=None):
+        self.entries.setdefault(guild_id, {})[user_id] = (reason, since)
+        self.ids.setdefault(guild_id, set()).add(user_id)
+
+    def _remove(self, guild_id, user_id):
+        entry = self.entries[guild_id].pop(user_id)
+        ids = self.ids[guild_id]
+        ids.discard(user_id)
+        if not ids:
+            del self.ids[guild_id]
+            del self.entries[guild_id]
+        return entry
+
+    def clear(self, guild_id, user_id):
+        for scope in (guild_id, GLOBAL):
+            if user_id in self.ids.get(scope, ()):
+                self.cleared += 1
+                return scope, self._remove(scope, user_id)
+        return None, None
+
+    def active(self, guild_id):
+        return guild_id in self.ids or GLOBAL in self.ids
+
+    def mentioned(self, guild_id, members):
+        self.lookups += 1
+        mentioned = {member.id: member for member in members}
+        found = []
+        for scope in (guild_id, GLOBAL):
+            ids = self.ids.get(scope)
+            if ids:
+                for user_id in mentioned.keys() & ids:
+                    reason, since = self.entries[scope][user_id]
+                    found.append((mentioned.pop(user_id), reason, since))
+        return found
+
+    def allow_notice(self, channel_id, found):
+        now = self.clock()
+        if not self.channel_cooldowns.ready(channel_id, now):
+            self.suppressed += len(found)
+            return []
+        allowed = [item for item in found if self.target_cooldowns.ready((channel_id, item[0].id), now)]
+        self.suppressed += len(found) - len(allowed)
+        if allowed:
+            self.channel_cooldowns.hit(channel_id, now)
+            for item in allowed:
+                self.target_cooldowns.hit((channel_id, item[0].id), now)
+            self.notices += 1
+        return allowed
+
+    def metrics(self):
+        return {
+            'afk_users': sum(len(ids) for ids in self.ids.values()),
+            'guilds': len(self.ids),
+            'lookups': self.lookups,
+            'notices': self.notices,
+            'suppressed': self.suppressed,
+            'cleared': self.cleared,
+        }
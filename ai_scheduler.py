@@ -0,0 +1,118 @@
+import asyncio
+import logging
+
+
+class _ChannelState:
+    __slots__ = ('latest', 'pending', 'first_at', 'last_at', 'timer', 'queued', 'in_flight')
+
+    def __init__(self):
+        self.latest = None
+        self.pending = 0
+        self.first_at = None
+        self.last_at = None
+        self.timer = None
+        self.queued = False
+        self.in_flight = False
+
+
+class AIScheduler:
+    def __init__(self, respond, base_delay=1.0, max_delay=4.0, max_concurrency=4):
+        self.respond = respond
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self.channels = {}
+        self.queue = None
+        self._workers = []
+        self.received = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def start(self):
+        if self._workers:
+            return
+        self.queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def close(self):
+        for state in self.channels.values():
+            if state.timer is not None:
+                state.timer.cancel()
+        self.channels.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, message):
+        channel_id = message.channel.id
+        state = self.channels.get(channel_id)
+        if state is None:
+            state = self.channels[channel_id] = _ChannelState()
+        now = asyncio.get_running_loop().time()
+        state.latest = message
+        state.pending += 1
+        state.last_at = now
+        if state.first_at is None:
+            state.first_at = now
+        self.received += 1
+        if state.timer is None and not state.queued and not state.in_flight:
+            state.timer = asyncio.create_task(self._debounce(channel_id, state))
+
+    def discard(self, channel_id):
+        state = self.channels.pop(channel_id, None)
+        if state is not None and state.timer is not None:
+            state.timer.cancel()
+
+    async def _debounce(self, channel_id, state):
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = min(state.last_at + self.base_delay, state.first_at + self.max_delay)
+            delay = deadline - loop.time()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        state.timer = None
+        state.queued = True
+        self.queue.put_nowait(channel_id)
+
+    async def _worker(self):
+        while True:
+            channel_id = await self.queue.get()
+            state = self.channels.get(channel_id)
+            if state is None or not state.queued:
+                continue
+            state.queued = False
+            state.in_flight = True
+            message, batched = state.latest, state.pending
+            state.pending = 0
+            state.first_at = None
+            self.coalesced += batched - 1
+            try:
+                await self.respond(message, batched)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logging.exception(f"AI response failed for channel {channel_id}")
+            finally:
+                self.upstream_calls += 1
+                state.in_flight = False
+            if self.channels.get(channel_id) is not state:
+                continue
+            if state.pending:
+                state.timer = asyncio.create_task(self._debounce(channel_id, state))
+            else:
+                del self.channels[channel_id]
+
+    def metrics(self):
+        return {
+            'received': self.received,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'in_flight': sum(1 for state in self.channels.values() if state.in_flight),
+            'channels': len(self.channels),
+        }
@@ -0,0 +1,117 @@
+import codecs
+import json
+import time
+
+
+async def iter_stream_text(response):
+    if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        async for chunk in response.content.iter_any():
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        return
+    async for line in response.content:
+        line = line.strip()
+        if not line.startswith(b'data:'):
+            continue
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            break
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        choices = event.get('choices') or [{}]
+        text = (choices[0].get('delta') or {}).get('content')
+        if text:
+            yield text
+
+
+class StreamingReply:
+    def __init__(self, channel, edit_interval=1.5, limit=2000, redact=None):
+        self.channel = channel
+        self.edit_interval = edit_interval
+        self.limit = limit
+        self.redact = redact or (lambda text: text)
+        self.started_at = time.monotonic()
+        self.first_sent_at = None
+        self.message = None
+        self.shown = ''
+        self.pending = ''
+        self.parts = []
+        self.last_edit = 0.0
+        self.edits = 0
+
+    def _split_point(self, text):
+        for separator in ('\n', ' '):
+            cut = text.rfind(separator, self.limit // 2, self.limit)
+            if cut != -1:
+                return cut + 1
+        return self.limit
+
+    async def _show(self, text):
+        if text == self.shown:
+            return
+        if self.message is None:
+            self.message = await self.channel.send(text)
+            if self.first_sent_at is None:
+                self.first_sent_at = time.monotonic()
+        else:
+            await self.message.edit(content=text)
+            self.edits += 1
+        self.shown = text
+        self.last_edit = time.monotonic()
+
+    async def _roll_over(self):
+        cut = self._split_point(self.pending)
+        head, self.pending = self.pending[:cut], self.pending[cut:]
+        await self._show(head)
+        self.parts.append(head)
+        self.message = None
+        self.shown = ''
+
+    async def feed(self, text):
+        self.pending = self.redact(self.pending + text)
+        while len(self.pending) > self.limit:
+            await self._roll_over()
+        if not self.pending.strip():
+            return
+        if self.message is None or time.monotonic() - self.last_edit >= self.edit_interval:
+            await self._show(self.pending)
+
+    async def finish(self):
+        if self.pending.strip():
+            await self._show(self.pending)
+            self.parts.append(self.pending)
+        self.pending = ''
+        return ''.join(self.parts)
+
+    @property
+    def time_to_first_message(self):
+        if self.first_sent_at is None:
+            return None
+        return self.first_sent_at - self.started_at
+
+
+class StreamMetrics:
+    def __init__(self):
+        self.replies = 0
+        self.messages = 0
+        self.edits = 0
+        self.first_message_seconds = 0.0
+
+    def record(self, reply):
+        self.replies += 1
+        self.messages += len(reply.parts)
+        self.edits += reply.edits
+        if reply.time_to_first_message is not None:
+            self.first_message_seconds += reply.time_to_first_message
+
+    def metrics(self):
+        return {
+            'replies': self.replies,
+            'messages': self.messages,
+            'edits': self.edits,
+            'avg_first_message_ms': round(self.first_message_seconds / max(1, self.replies) * 1000),
+        }
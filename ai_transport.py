@@ -0,0 +1,81 @@
+import json
+import time
+from collections import deque
+
+
+class ConversationHistory:
+    def __init__(self, char_budget=6000):
+        self.char_budget = char_budget
+        self.messages = deque()
+        self.chars = 0
+        self.version = 0
+
+    def append(self, role, content):
+        if len(content) > self.char_budget:
+            content = content[-self.char_budget:]
+        self.messages.append({"role": role, "content": content})
+        self.chars += len(content)
+        while self.chars > self.char_budget and len(self.messages) > 1:
+            self.chars -= len(self.messages.popleft()["content"])
+        self.version += 1
+
+    def estimated_tokens(self):
+        return self.chars // 4
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class PromptTransport:
+    def __init__(self, pool, path='/', model=None, stream=False):
+        self.pool = pool
+        self.path = path
+        self.model = model
+        self.stream = stream
+        self._payloads = {}
+        self.requests = 0
+        self.bytes_sent = 0
+        self.encode_seconds = 0.0
+        self.payload_reuses = 0
+
+    def encode(self, channel_id, history):
+        cached = self._payloads.get(channel_id)
+        if cached is not None and cached[0] is history and cached[1] == history.version:
+            self.payload_reuses += 1
+            return cached[2]
+        started = time.perf_counter()
+        body = {"messages": list(history.messages)}
+        if self.model:
+            body["model"] = self.model
+        if self.stream:
+            body["stream"] = True
+        payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.encode_seconds += time.perf_counter() - started
+        self._payloads[channel_id] = (history, history.version, payload)
+        return payload
+
+    def forget(self, channel_id):
+        self._payloads.pop(channel_id, None)
+
+    def prepare(self, channel_id, history):
+        payload = self.encode(channel_id, history)
+        self.requests += 1
+        self.bytes_sent += len(payload)
+        return payload
+
+    def request(self, channel_id, history, **kwargs):
+        payload = self.prepare(channel_id, history)
+        return self.pool.request('POST', self.path, data=payload, headers={'Content-Type': 'application/json'}, **kwargs)
+
+    def metrics(self):
+        encoded = max(1, self.requests - self.payload_reuses)
+        return {
+            'requests': self.requests,
+            'bytes_sent': self.bytes_sent,
+            'avg_bytes': self.bytes_sent // max(1, self.requests),
+            'avg_encode_us': round(self.encode_seconds / encoded * 1_000_000, 1),
+            'payload_reuses': self.payload_reuses,
+        }
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+
+class AuditLogCorrelator:
+    def __init__(self, ttl=60.0, wait=2.0, batch_delay=0.5, batch_size=100, clock=time.monotonic):
+        self.ttl = ttl
+        self.wait = wait
+        self.batch_delay = batch_delay
+        self.batch_size = batch_size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.waiters = {}
+        self.live_guilds = set()
+        self._polls = {}
+        self.recorded = 0
+        self.resolved = 0
+        self.unresolved = 0
+        self.polls = 0
+
+    def _prune(self, now):
+        while self.entries:
+            key, (actor_id, expires_at) = next(iter(self.entries.items()))
+            if expires_at > now:
+                break
+            del self.entries[key]
+
+    def record(self, guild_id, action, target_id, actor_id):
+        now = self.clock()
+        self._prune(now)
+        key = (guild_id, action, target_id)
+        self.entries[key] = (actor_id, now + self.ttl)
+        self.entries.move_to_end(key)
+        self.recorded += 1
+        future = self.waiters.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(actor_id)
+
+    def record_entry(self, entry, live=True):
+        if live:
+            self.live_guilds.add(entry.guild.id)
+        target_id = getattr(entry.target, 'id', None)
+        if target_id is not None and entry.user_id is not None:
+            self.record(entry.guild.id, entry.action, target_id, entry.user_id)
+
+    def lookup(self, guild_id, action, target_id):
+        found = self.entries.get((guild_id, action, target_id))
+        if found is None or found[1] <= self.clock():
+            return None
+        return found[0]
+
+    async def _poll(self, guild, action):
+        await asyncio.sleep(self.batch_delay)
+        self.polls += 1
+        try:
+            async for entry in guild.audit_logs(action=action, limit=self.batch_size):
+                self.record_entry(entry, live=False)
+        except Exception:
+            logging.exception(f"Audit log poll for {action} in guild {guild.id} failed")
+
+    async def _batched_poll(self, guild, action):
+        key = (guild.id, action)
+        task = self._polls.get(key)
+        if task is None:
+            task = self._polls[key] = asyncio.create_task(self._poll(guild, action))
+            task.add_done_callback(lambda _: self._polls.pop(key, None))
+        await asyncio.shield(task)
+
+    async def resolve(self, guild, action, target_id):
+        actor_id = self.lookup(guild.id, action, target_id)
+        if actor_id is None:
+            key = (guild.id, action, target_id)
+            future = self.waiters.get(key)
+            if future is None:
+                future = self.waiters[key] = asyncio.get_running_loop().create_future()
+            try:
+                actor_id = await asyncio.wait_for(asyncio.shield(future), self.wait)
+            except asyncio.TimeoutError:
+                if guild.id not in self.live_guilds:
+                    await self._batched_poll(guild, action)
+                    actor_id = self.lookup(guild.id, action, target_id)
+            finally:
+                if self.waiters.get(key) is future and not future.done():
+                    future.cancel()
+                    del self.waiters[key]
+        if actor_id is None:
+            self.unresolved += 1
+        else:
+            self.resolved += 1
+        return actor_id
+
+    def metrics(self):
+        return {
+            'indexed': len(self.entries),
+            'live_guilds': len(self.live_guilds),
+            'recorded': self.recorded,
+            'resolved': self.resolved,
+            'unresolved': self.unresolved,
+            'polls': self.polls,
+        }
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from aiohttp import ClientSession, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_queue import PRIORITY_DEFAULT, PRIORITY_LOG, PRIORITY_MODERATE, PRIORITY_PROTECT, ActionQueue
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"429, retry after {retry_after:.3f}s")
+        self.status = 429
+        self.retry_after = retry_after
+
+
+class FakeDiscord:
+    def __init__(self, limit, window, latency):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.buckets = {}
+        self.requests = 0
+        self.rejected = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        parts = request.path.strip('/').split('/')
+        bucket = (request.method, parts[0], parts[1], parts[2] if len(parts) > 2 else '')
+        now = time.monotonic()
+        reset, used = self.buckets.get(bucket, (now + self.window, 0))
+        if now >= reset:
+            reset, used = now + self.window, 0
+        if used >= self.limit:
+            self.rejected += 1
+            return web.json_response({'message': 'You are being rate limited.', 'retry_after': reset - now, 'global': False},
+                                     status=429, headers={'Retry-After': f"{reset - now:.3f}"})
+        self.buckets[bucket] = (reset, used + 1)
+        return web.json_response({'id': str(random.getrandbits(62))}, headers={
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.limit - used - 1),
+            'X-RateLimit-Reset-After': f"{reset - now:.3f}",
+        })
+
+
+def build_workload(channels, raiders, logs, seed=1):
+    rng = random.Random(seed)
+    guild = 1
+    mute_role = 42
+    log_channel = 900
+    work = []
+    for channel in range(channels):
+        work.append((PRIORITY_MODERATE, f"PUT /channels/{channel}/permissions", 'PUT', f"/channels/{channel}/permissions/{mute_role}", ('overwrite', channel, mute_role)))
+    for raider in range(raiders):
+        user = 10_000 + raider
+        work.append((PRIORITY_PROTECT, f"PUT /guilds/{guild}/members/roles", 'PUT', f"/guilds/{guild}/members/{user}/roles/{mute_role}", ('quarantine', user)))
+        for _ in range(2):
+            work.append((PRIORITY_DEFAULT, f"POST /channels/{user}/messages", 'POST', f"/channels/{user}/messages", ('notify', user)))
+    for _ in range(logs):
+        work.append((PRIORITY_LOG, f"POST /channels/{log_channel}/messages", 'POST', f"/channels/{log_channel}/messages", None))
+    rng.shuffle(work)
+    return work
+
+
+async def run_naive(session, base, work):
+    done_at = {}
+    started = time.perf_counter()
+
+    async def call(priority, method, path):
+        while True:
+            async with session.request(method, base + path) as response:
+                body = await response.json()
+                if response.status != 429:
+                    break
+            await asyncio.sleep(body['retry_after'])
+        done_at.setdefault(priority, []).append(time.perf_counter() - started)
+
+    await asyncio.gather(*(call(priority, method, path) for priority, _, method, path, _ in work))
+    return time.perf_counter() - started, done_at
+
+
+async def run_queued(session, base, work, concurrency):
+    done_at = {}
+    queue = ActionQueue(max_concurrency=concurrency)
+    queue.start()
+    started = time.perf_counter()
+
+    def action(priority, method, path):
+        async def call():
+            async with session.request(method, base + path) as response:
+                body = await response.json()
+                if response.status == 429:
+                    raise RateLimited(body['retry_after'])
+            done_at.setdefault(priority, []).append(time.perf_counter() - started)
+        return call
+
+    futures = [queue.submit(route, action(priority, method, path), priority, key) for priority, route, method, path, key in work]
+    await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - started
+    stats = queue.metrics()
+    await queue.close()
+    return elapsed, done_at, stats
+
+
+def summarize(name, elapsed, done_at, server, requests_before, rejected_before):
+    labels = {PRIORITY_PROTECT: 'quarantine', PRIORITY_MODERATE: 'overwrites', PRIORITY_DEFAULT: 'DMs', PRIORITY_LOG: 'logs'}
+    finished = ', '.join(f"{labels[priority]} {max(times) * 1000:.0f} ms" for priority, times in sorted(done_at.items()))
+    print(f"{name:>7}: total {elapsed * 1000:.0f} ms, {server.requests - requests_before} requests, "
+          f"{server.rejected - rejected_before} got 429; last completion: {finished}")
+
+
+async def main(args):
+    server = FakeDiscord(args.limit, args.window, args.latency)
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    work = build_workload(args.channels, args.raiders, args.logs)
+    print(f"workload: {len(work)} actions ({args.raiders} quarantines, {args.channels} overwrites, {args.raiders * 2} DMs, {args.logs} log embeds); "
+          f"buckets allow {args.limit} per {args.window * 1000:.0f} ms")
+    async with ClientSession() as session:
+        requests, rejected = server.requests, server.rejected
+        elapsed, done_at = await run_naive(session, base, work)
+        summarize("naive", elapsed, done_at, server, requests, rejected)
+    await asyncio.sleep(args.window)
+    async with ClientSession() as session:
+        requests, rejected = server.requests, server.rejected
+        elapsed, done_at, stats = await run_queued(session, base, work, args.concurrency)
+        summarize("queued", elapsed, done_at, server, requests, rejected)
+        print(f"queue: {stats['executed']} executed, {stats['deduplicated']} deduplicated, {stats['rate_limited']} rate limited, "
+              f"wait p50 {stats['wait_p50_ms']} ms, p99 {stats['wait_p99_ms']} ms")
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a raid workload against a fake Discord REST server with and without the action queue")
+    parser.add_argument('--channels', type=int, default=40)
+    parser.add_argument('--raiders', type=int, default=20)
+    parser.add_argument('--logs', type=int, default=100)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--window', type=float, default=0.25)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--concurrency', type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from afk import AfkIndex
+
+
+class FakeMember:
+    def __init__(self, member_id):
+        self.id = member_id
+        self.display_name = f"user{member_id}"
+
+
+def legacy_lookup(afk_users, mentions):
+    found = []
+    for user_id, reason in afk_users.items():
+        for member in mentions:
+            if member.id == user_id:
+                found.append((member, reason, None))
+    return found
+
+
+def main(args):
+    rng = random.Random(1)
+    members = [FakeMember(10**17 + index) for index in range(args.members)]
+    afk = rng.sample(members, args.afk)
+    messages = [rng.sample(members, rng.randint(0, args.mentions)) for _ in range(args.messages)]
+    print(f"{args.afk:,} AFK users, {args.messages:,} messages with up to {args.mentions} mentions each")
+
+    afk_users = {member.id: "AFK" for member in afk}
+    started = time.perf_counter()
+    legacy_hits = sum(len(legacy_lookup(afk_users, mentions)) for mentions in messages)
+    elapsed = time.perf_counter() - started
+    print(f"  legacy scan: {elapsed / args.messages * 1e6:10.2f} µs/message, {legacy_hits:,} hits")
+
+    index = AfkIndex()
+    for member in afk:
+        index.set(1, member.id, "AFK", 0)
+    started = time.perf_counter()
+    hits = notices = 0
+    for channel_id, mentions in enumerate(messages):
+        if mentions and index.active(1):
+            found = index.mentioned(1, mentions)
+            hits += len(found)
+            notices += bool(index.allow_notice(channel_id % args.channels, found))
+    elapsed = time.perf_counter() - started
+    print(f"  afk index:   {elapsed / args.messages * 1e6:10.2f} µs/message, {hits:,} hits, {notices:,} notices ({index.suppressed:,} rate limited)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-message AFK mention lookup cost for the legacy dict scan and the AFK index")
+    parser.add_argument('--members', type=int, default=100_000)
+    parser.add_argument('--afk', type=int, default=5_000)
+    parser.add_argument('--messages', type=int, default=50_000)
+    parser.add_argument('--mentions', type=int, default=3)
+    parser.add_argument('--channels', type=int, default=50)
+    main(parser.parse_args())
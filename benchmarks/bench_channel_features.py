@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from discord.ext import commands
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ("lol", "gg", "anyone", "playing", "tonight", "the", "server", "is", "down", "again", "what", "time",
+         "brb", "nice", "update", "patch", "notes", "look", "at", "this", "meme", "ok", "thanks", "bro", "fr")
+
+
+class Obj:
+    __slots__ = ('id', 'bot', 'guild', 'channel', 'author', 'content', 'attachments', 'mentions', '_state')
+
+
+def make(**fields):
+    obj = Obj()
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def load_bot():
+    logging.basicConfig(level=logging.WARNING)
+    os.environ.setdefault('STATE_DB_PATH', os.path.join(tempfile.mkdtemp(), 'bench_state.db'))
+    commands.Bot.run = lambda self, *args, **kwargs: None
+    import petezah_bot
+    return petezah_bot
+
+
+class Config:
+    def __init__(self, bot_module, guilds, channels_per_guild, rng):
+        self.guilds = [make(id=guild_id) for guild_id in range(1, guilds + 1)]
+        self.channels = [(make(id=guild.id * 1000 + index), guild) for guild in self.guilds for index in range(channels_per_guild)]
+        channel_ids = [channel.id for channel, _ in self.channels]
+        guild_ids = [guild.id for guild in self.guilds]
+        self.active_channels = bot_module.active_channels
+        self.active_channels.update(rng.sample(channel_ids, len(channel_ids) // 50))
+        self.disabled_channels = bot_module.disabled_channels
+        self.disabled_channels.update(rng.sample(channel_ids, len(channel_ids) // 100))
+        self.security_channels = bot_module.security_channels
+        self.security_channels.update(rng.sample(channel_ids, len(channel_ids) // 20))
+        self.pinned_messages = bot_module.pinned_messages
+        self.pinned_messages.update({channel_id: {} for channel_id in rng.sample(channel_ids, len(channel_ids) // 100)})
+        self.security_servers = bot_module.security_servers
+        self.security_servers.update(rng.sample(guild_ids, len(guild_ids) // 20))
+        self.nuke_protection_servers = bot_module.nuke_protection_servers
+        self.nuke_protection_servers.update(rng.sample(guild_ids, len(guild_ids) // 10))
+        self.message_filter = bot_module.message_filter
+        self.load_guild_state = bot_module.load_guild_state
+
+
+def build_messages(config, size, rng):
+    user = make(id=1, bot=False)
+    dm_channel = make(id=1)
+    messages = []
+    for _ in range(size):
+        if rng.random() < 0.01:
+            channel, guild = dm_channel, None
+        else:
+            channel, guild = rng.choice(config.channels)
+        content = ' '.join(rng.choice(WORDS) for _ in range(rng.choice((1, 3, 5, 8, 13))))
+        if rng.random() < 0.03:
+            content = 'p!ping'
+        messages.append(make(guild=guild, channel=channel, author=user, content=content, attachments=[], mentions=[], _state=None))
+    return messages
+
+
+def legacy_handler(config, bot, noop):
+    async def on_message(message):
+        if message.author.bot:
+            await bot.process_commands(message)
+            return
+        config.load_guild_state(message.guild)
+        if message.channel.id in config.disabled_channels:
+            return
+        hits = config.message_filter.scan(message.guild.id, message.content)
+        if message.guild.id in config.nuke_protection_servers and 'role_mention' in hits:
+            noop()
+        if message.channel.id in config.security_channels or message.guild.id in config.security_servers:
+            if 'invite' in hits:
+                noop()
+        if message.channel.id not in config.active_channels:
+            if message.channel.id in config.pinned_messages and not message.content.startswith('p!'):
+                noop()
+            await bot.process_commands(message)
+            return
+        if 'mass_mention' in hits:
+            return
+        noop()
+        await bot.process_commands(message)
+    return on_message
+
+
+async def replay(handler, messages):
+    started = time.perf_counter()
+    crashes = 0
+    for message in messages:
+        try:
+            await handler(message)
+        except AttributeError:
+            if message.guild is not None:
+                raise
+            crashes += 1
+    return time.perf_counter() - started, crashes
+
+
+async def run(size, guilds, channels_per_guild):
+    bot_module = load_bot()
+    rng = random.Random(1)
+    config = Config(bot_module, guilds, channels_per_guild, rng)
+    messages = build_messages(config, size, rng)
+    bot = bot_module.bot
+    bot._connection.user = make(id=0)
+    bot.remove_command('ping')
+    bot.add_command(commands.Command(ping, name='ping'))
+    bot.process_commands = counting(bot.process_commands)
+    bot_module.ai_scheduler.submit = lambda message: None
+    bot_module.sticky_engine.touch = lambda channel: None
+    print(f"replaying {size:,} messages over {len(config.channels):,} channels in {guilds:,} guilds")
+
+    for name, handler in (("legacy on_message", legacy_handler(config, bot, lambda: None)),
+                          ("bot on_message", bot_module.on_message)):
+        bot.process_commands.calls = 0
+        elapsed, crashes = await replay(handler, messages)
+        print(f"{name:>22}: {size / elapsed:12,.0f} events/s  ({elapsed / size * 1e6:.2f} µs/event, "
+              f"{bot.process_commands.calls:,} process_commands calls, {crashes:,} DM crashes)")
+
+    for channel, guild in config.channels:
+        bot_module.channel_features.get(channel, guild)
+    stats = bot_module.channel_features.metrics()
+    print(f"channels with nothing configured: {stats['idle_channels']:,} of {stats['channels']:,}")
+    await asyncio.to_thread(bot_module.state_store.close)
+
+
+async def ping(ctx):
+    pass
+
+
+def counting(func):
+    async def wrapper(message):
+        wrapper.calls += 1
+        await func(message)
+    wrapper.calls = 0
+    return wrapper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay synthetic messages through the legacy handler body and the bot's real on_message with its channel feature gating")
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--guilds', type=int, default=1_000)
+    parser.add_argument('--channels-per-guild', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.guilds, args.channels_per_guild))
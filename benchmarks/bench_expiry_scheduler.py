@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from expiry_scheduler import SCHEMA, ExpiryScheduler
+from state_store import StateStore
+
+
+async def main(timers, overdue):
+    path = os.path.join(tempfile.mkdtemp(), 'state.db')
+    store = StateStore(path, schema=SCHEMA)
+    fired = []
+
+    async def handler(guild_id, user_id, kind):
+        fired.append(user_id)
+
+    rng = random.Random(1)
+    sample = min(timers, 100_000)
+    sample_scheduler = ExpiryScheduler(StateStore(os.path.join(tempfile.mkdtemp(), 'sample.db'), schema=SCHEMA), handler)
+    tracemalloc.start()
+    for i in range(sample):
+        sample_scheduler.schedule(rng.getrandbits(62), rng.getrandbits(62), i & 1, 3600)
+    sample_scheduler.store.flush()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    sample_scheduler.store.close()
+    print(f"~{memory / sample:.0f} bytes per pending timer (measured over {sample:,} timers)")
+
+    scheduler = ExpiryScheduler(store, handler, batch_size=1000, batch_interval=0)
+    started = time.perf_counter()
+    for i in range(timers):
+        delay = -1 if i < overdue else rng.uniform(3600, 30 * 86400)
+        scheduler.schedule(rng.getrandbits(62), rng.getrandbits(62), i & 1, delay)
+    scheduled = time.perf_counter() - started
+    print(f"scheduled {timers:,} timers in {scheduled:.2f}s ({timers / scheduled:,.0f}/s)")
+
+    started = time.perf_counter()
+    store.flush()
+    print(f"persisted in {time.perf_counter() - started:.2f}s more")
+    store.close()
+
+    store = StateStore(path, schema=SCHEMA)
+    scheduler = ExpiryScheduler(store, handler, batch_size=1000, batch_interval=0)
+    started = time.perf_counter()
+    scheduler.load()
+    print(f"reloaded {scheduler.pending():,} timers at startup in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    scheduler.start()
+    while len(fired) < overdue:
+        await asyncio.sleep(0.01)
+    caught_up = time.perf_counter() - started
+    print(f"caught up {len(fired):,} overdue expiries in {caught_up:.2f}s, {scheduler.pending():,} still pending")
+    await scheduler.close()
+    store.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Schedule, persist and reload a large number of expiry timers")
+    parser.add_argument('--timers', type=int, default=1_000_000)
+    parser.add_argument('--overdue', type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.timers, args.overdue))
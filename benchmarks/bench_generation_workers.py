@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generation_workers import GenerationWorkers
+from http_pool import BackendPool
+from response_cache import ImageCache, LRUCache, cache_key
+
+
+def serve(port, image_bytes, delay):
+    image = os.urandom(image_bytes)
+
+    async def prompt(request):
+        await asyncio.sleep(delay)
+        response = web.StreamResponse(headers={'Content-Type': 'image/png', 'Content-Length': str(len(image))})
+        await response.prepare(request)
+        view = memoryview(image)
+        for offset in range(0, len(image), 256 * 1024):
+            await response.write(view[offset:offset + 256 * 1024])
+        return response
+
+    app = web.Application()
+    app.router.add_get('/prompt/{prompt}', prompt)
+    web.run_app(app, host='127.0.0.1', port=port, print=None, handle_signals=False)
+
+
+async def watch_loop(lags, stop, interval=0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - started - interval)
+
+
+def report(label, elapsed, jobs, lags, parent_bytes):
+    lags.sort()
+    print(f"  {label:<14} {jobs / elapsed:7.1f} images/s, loop lag p50/p99/max {lags[len(lags) // 2] * 1000:6.1f}/{lags[int(len(lags) * 0.99)] * 1000:6.1f}/{lags[-1] * 1000:6.1f}ms, "
+          f"{parent_bytes / 2**20:8.1f} MiB through the gateway process")
+
+
+async def in_process(args, base_url, directory):
+    pool = BackendPool(base_url, limit=args.concurrency, timeout=60)
+    await pool.start()
+    cache = ImageCache(LRUCache(max_entries=args.jobs, max_bytes=2**40, ttl=3600), directory=directory, max_disk_bytes=2**40)
+    parent_bytes = 0
+
+    async def generate(prompt):
+        nonlocal parent_bytes
+        async with pool.request('GET', f'/prompt/{urllib.parse.quote(prompt)}') as response:
+            image = await response.read()
+        parent_bytes += len(image)
+        await cache.set(cache_key('image', prompt), image)
+        return io.BytesIO(image)
+
+    lags, stop = [], asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(generate(f"in-process prompt {index}") for index in range(args.jobs)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    await pool.close()
+    report("in-process", elapsed, args.jobs, lags, parent_bytes)
+
+
+async def workers(args, base_url, directory):
+    pool = GenerationWorkers(args.workers, text_url=base_url, image_url=base_url, directory=directory, concurrency=max(1, args.concurrency // args.workers))
+    await pool.start()
+    cache = ImageCache(LRUCache(max_entries=args.jobs, max_bytes=2**40, ttl=3600), directory=directory, max_disk_bytes=2**40)
+
+    async def generate(prompt):
+        key = cache_key('image', prompt)
+        status, path, size = await pool.run('image', prompt, f"{key}.png")
+        return await cache.adopt(key, size)
+
+    lags, stop = [], asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(generate(f"worker prompt {index}") for index in range(args.jobs)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    stats = pool.metrics()
+    await pool.close()
+    report(f"{args.workers} workers", elapsed, args.jobs, lags, 0)
+    print(f"  {'':<14} queue wait avg/max {stats['avg_wait_ms']}/{stats['max_wait_ms']}ms, run avg {stats['avg_run_ms']}ms, {stats['failed']} failed")
+
+
+async def main(args):
+    server = multiprocessing.Process(target=serve, args=(args.port, args.image_bytes, args.delay), daemon=True)
+    server.start()
+    await asyncio.sleep(1.0)
+    base_url = f"http://127.0.0.1:{args.port}"
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    print(f"{args.jobs} image generations of {args.image_bytes / 2**20:.1f} MiB, {args.concurrency} concurrent, handoff in {base}")
+    for run in (in_process, workers):
+        directory = tempfile.mkdtemp(dir=base)
+        try:
+            await run(args, base_url, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    server.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare gateway event-loop lag for image generation in-process and in the generation worker pool")
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--image-bytes', type=int, default=2 * 1024 * 1024)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
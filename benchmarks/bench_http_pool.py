@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_pool import BackendPool
+
+
+async def stub_handler(request):
+    await asyncio.sleep(0.002)
+    return web.Response(text="hello from the stub backend")
+
+
+async def start_stub():
+    app = web.Application()
+    app.router.add_get('/{prompt:.*}', stub_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://localhost:{port}'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_load(call, requests, concurrency):
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, time.perf_counter() - started
+
+
+async def main(requests, concurrency):
+    runner, base_url = await start_stub()
+
+    async def session_per_call(i):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'{base_url}/prompt{i}', timeout=10) as response:
+                await response.text()
+
+    pool = BackendPool(base_url, limit=concurrency)
+    await pool.start()
+
+    async def pooled(i):
+        async with pool.request('GET', f'/prompt{i}') as response:
+            await response.text()
+
+    try:
+        for name, call in (("session per call", session_per_call), ("shared pool", pooled)):
+            await run_load(call, min(50, requests), concurrency)
+            latencies, elapsed = await run_load(call, requests, concurrency)
+            print(f"{name:>17}: p50 {statistics.median(latencies):7.2f} ms  p99 {percentile(latencies, 99):7.2f} ms  {requests / elapsed:8.0f} req/s")
+        print(f"pool metrics: {pool.metrics()}")
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-call aiohttp sessions with the shared backend pool")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from aiohttp import web
+from discord.http import HTTPClient, Route
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mass_moderation import MassModeration
+
+
+class FakeDiscord:
+    def __init__(self, limit, window, latency):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.buckets = {}
+        self.requests = 0
+        self.rejected = 0
+
+    def _bucket(self, request):
+        parts = request.path.split('/api/v10/', 1)[1].strip('/').split('/')
+        return '-'.join((request.method, parts[0], parts[1], parts[2] if len(parts) > 2 else ''))
+
+    def _payload(self, request, body):
+        path = request.path
+        if path.endswith('/users/@me'):
+            return {'id': '1', 'username': 'bench', 'discriminator': '0', 'avatar': None}
+        if path.endswith('/bulk-ban'):
+            return {'banned_users': body['user_ids'], 'failed_users': []}
+        if '/bans/' in path:
+            return None
+        return {'id': str(random.getrandbits(62))}
+
+    async def handle(self, request):
+        self.requests += 1
+        body = await request.json() if request.can_read_body else None
+        await asyncio.sleep(self.latency)
+        bucket = self._bucket(request)
+        now = time.monotonic()
+        reset, used = self.buckets.get(bucket, (now + self.window, 0))
+        if now >= reset:
+            reset, used = now + self.window, 0
+        if used >= self.limit:
+            self.rejected += 1
+            return web.json_response({'message': 'You are being rate limited.', 'retry_after': reset - now, 'global': False},
+                                     status=429, headers={'Retry-After': f"{reset - now:.3f}", 'X-RateLimit-Scope': 'user'})
+        self.buckets[bucket] = (reset, used + 1)
+        headers = {
+            'X-RateLimit-Bucket': bucket,
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.limit - used - 1),
+            'X-RateLimit-Reset': f"{time.time() + reset - now:.3f}",
+            'X-RateLimit-Reset-After': f"{reset - now:.3f}",
+        }
+        payload = self._payload(request, body)
+        if payload is None:
+            return web.Response(status=204, headers=headers)
+        headers['Content-Type'] = 'application/json'
+        return web.Response(body=json.dumps(payload).encode(), headers=headers)
+
+
+class BenchGuild:
+    def __init__(self, http, guild_id):
+        self.id = guild_id
+        self._state = self
+        self.http = http
+
+    async def ban(self, user, *, reason=None, delete_message_seconds=86400):
+        await self.http.ban(user.id, self.id, delete_message_seconds=delete_message_seconds, reason=reason)
+
+
+async def run_legacy(http, guild_id, user_ids, command_channel, log_channel):
+    for user_id in user_ids:
+        dm = await http.request(Route('POST', '/users/@me/channels'), json={'recipient_id': str(user_id)})
+        await http.request(Route('POST', '/channels/{channel_id}/messages', channel_id=dm['id']), json={'content': 'You have been banned'})
+        await http.ban(user_id, guild_id, reason="raid")
+        await http.request(Route('POST', '/channels/{channel_id}/messages', channel_id=command_channel), json={'content': f"<@{user_id}> has been banned"})
+        await http.request(Route('POST', '/channels/{channel_id}/messages', channel_id=log_channel), json={'embeds': [{'title': 'User Banned'}]})
+
+
+async def run_mass(http, guild_id, user_ids, command_channel, log_channel, engine):
+    banned, failed = await engine.ban(BenchGuild(http, guild_id), user_ids, "raid")
+    await http.request(Route('POST', '/channels/{channel_id}/messages', channel_id=command_channel), json={'content': f"Banned {len(banned)} users"})
+    await http.request(Route('POST', '/channels/{channel_id}/messages', channel_id=log_channel), json={'embeds': [{'title': 'Mass Banned'}]})
+    assert len(banned) == len(user_ids) and not failed
+
+
+async def measure(name, server, base, run, targets):
+    Route.BASE = base
+    http = HTTPClient(asyncio.get_running_loop())
+    await http.static_login('bench-token')
+    requests, rejected = server.requests, server.rejected
+    started = time.perf_counter()
+    await run(http)
+    elapsed = time.perf_counter() - started
+    await http.close()
+    print(f"{name:>22}: {elapsed * 1000:8.0f} ms, {targets / elapsed:8.1f} bans/s, "
+          f"{server.requests - requests - 1} requests, {server.rejected - rejected} got 429")
+    await asyncio.sleep(server.window)
+
+
+async def main(args):
+    server = FakeDiscord(args.limit, args.window, args.latency)
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/api/v10"
+    guild_id, command_channel, log_channel = 10**17, 10**17 + 1, 10**17 + 2
+    user_ids = [2 * 10**17 + index for index in range(args.targets)]
+    print(f"{args.targets} raid accounts; buckets allow {args.limit} per {args.window * 1000:.0f} ms, {args.latency * 1000:.0f} ms latency")
+    if not args.skip_legacy:
+        await measure("p!ban per account", server, base, lambda http: run_legacy(http, guild_id, user_ids, command_channel, log_channel), args.targets)
+    await measure(f"massban, {args.concurrency} concurrent", server, base,
+                  lambda http: run_mass(http, guild_id, user_ids, command_channel, log_channel, MassModeration(args.concurrency, use_bulk_ban=False)), args.targets)
+    await measure("massban, bulk-ban", server, base,
+                  lambda http: run_mass(http, guild_id, user_ids, command_channel, log_channel, MassModeration(args.concurrency)), args.targets)
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ban a raid's worth of accounts against a fake Discord REST server through discord.py's HTTP client")
+    parser.add_argument('--targets', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--window', type=float, default=0.5)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--skip-legacy', action='store_true')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+import discord
+import yarl
+from aiohttp import web, WSMsgType
+from discord.gateway import DiscordWebSocket
+from discord.http import Route
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from member_cache import MemberCache
+
+GUILD_ID = 900000000000000000
+BOT_ID = 1
+CHUNK_SIZE = 1000
+
+
+def user_payload(user_id, rng):
+    return {'id': str(user_id), 'username': f"member{user_id % 10**8}", 'global_name': None, 'discriminator': '0', 'avatar': f"{rng.getrandbits(128):032x}" if rng.random() < 0.7 else None}
+
+
+def member_payload(user_id, rng, roles):
+    return {'user': user_payload(user_id, rng), 'nick': None, 'roles': rng.sample(roles, rng.randint(0, min(3, len(roles)))), 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0}
+
+
+def record_fixture(path, members):
+    rng = random.Random(1)
+    roles = [str(GUILD_ID + index) for index in range(1, 51)]
+    fixture = {
+        'guild': {
+            'id': str(GUILD_ID), 'name': 'Large fixture guild', 'icon': None, 'owner_id': '2', 'member_count': members + 1, 'large': True, 'unavailable': False,
+            'joined_at': '2024-01-01T00:00:00+00:00', 'features': [], 'emojis': [], 'stickers': [], 'threads': [], 'presences': [], 'voice_states': [], 'stage_instances': [], 'guild_scheduled_events': [],
+            'roles': [{'id': role_id, 'name': f"role{index}", 'permissions': '0', 'position': index, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False} for index, role_id in enumerate([str(GUILD_ID)] + roles)],
+            'channels': [{'id': str(GUILD_ID + 1000 + index), 'type': 0, 'name': f"channel{index}", 'position': index, 'permission_overwrites': []} for index in range(50)],
+            'members': [member_payload(BOT_ID, rng, [])],
+        },
+        'members': [member_payload(10**17 + index, rng, roles) for index in range(members)],
+    }
+    with gzip.open(path, 'wt') as handle:
+        json.dump(fixture, handle)
+
+
+def reply(payload, status=200):
+    return web.Response(body=json.dumps(payload).encode(), status=status, headers={'Content-Type': 'application/json'})
+
+
+class FakeDiscord:
+    def __init__(self, fixture):
+        self.guild = fixture['guild']
+        self.members = fixture['members']
+        self.by_id = {member['user']['id']: member for member in self.members}
+
+    async def rest(self, request):
+        path = request.path.split('/api/v10', 1)[1]
+        if path == '/users/@me':
+            return reply(user_payload(BOT_ID, random.Random(0)) | {'bot': True})
+        if path == '/oauth2/applications/@me':
+            return reply({'id': str(BOT_ID), 'name': 'bench', 'icon': None, 'description': '', 'bot_public': True, 'bot_require_code_grant': False,
+                          'owner': user_payload(2, random.Random(0)), 'verify_key': '', 'flags': 0})
+        if path.startswith(f"/guilds/{GUILD_ID}/members/"):
+            member = self.by_id.get(path.rsplit('/', 1)[1])
+            return reply(member) if member else reply({'message': 'Unknown Member', 'code': 10007}, 404)
+        return reply({'message': 'Not Found', 'code': 0}, 404)
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async def send(op, data, event=None, sequence=None):
+            await ws.send_str(json.dumps({'op': op, 'd': data, 't': event, 's': sequence}))
+
+        sequence = 0
+        await send(10, {'heartbeat_interval': 45000})
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            payload = json.loads(message.data)
+            if payload['op'] == 1:
+                await send(11, None)
+            elif payload['op'] == 2:
+                sequence += 1
+                await send(0, {'v': 10, 'user': user_payload(BOT_ID, random.Random(0)) | {'bot': True}, 'guilds': [{'id': str(GUILD_ID), 'unavailable': True}], 'session_id': 'bench',
+                               'resume_gateway_url': f"ws://{request.host}/ws", 'application': {'id': str(BOT_ID), 'flags': 0}}, 'READY', sequence)
+                sequence += 1
+                await send(0, self.guild, 'GUILD_CREATE', sequence)
+            elif payload['op'] == 8:
+                query = payload['d']
+                if query.get('user_ids'):
+                    wanted = [self.by_id[user_id] for user_id in map(str, query['user_ids']) if user_id in self.by_id]
+                    chunks = [wanted]
+                else:
+                    chunks = [self.members[offset:offset + CHUNK_SIZE] for offset in range(0, len(self.members), CHUNK_SIZE)]
+                for index, members in enumerate(chunks):
+                    sequence += 1
+                    await send(0, {'guild_id': str(GUILD_ID), 'members': members, 'chunk_index': index, 'chunk_count': len(chunks), 'nonce': query.get('nonce')}, 'GUILD_MEMBERS_CHUNK', sequence)
+        return ws
+
+
+def serve(fixture_path, port):
+    with gzip.open(fixture_path, 'rt') as handle:
+        fake = FakeDiscord(json.load(handle))
+    app = web.Application()
+    app.router.add_get('/ws', fake.gateway)
+    app.router.add_route('*', '/api/v10/{tail:.*}', fake.rest)
+    web.run_app(app, host='127.0.0.1', port=port, print=None, handle_signals=False)
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as handle:
+        return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+async def run_client(policy, port, lookups, max_members, results):
+    Route.BASE = f"http://127.0.0.1:{port}/api/v10"
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{port}/ws")
+    intents = discord.Intents.default()
+    intents.members = True
+    options = {'chunk_guilds_at_startup': False, 'member_cache_flags': discord.MemberCacheFlags.none()} if policy == 'lazy' else {}
+    cache = MemberCache(max_members=max_members if policy == 'lazy' else None)
+    client = discord.Client(intents=intents, guild_ready_timeout=0.1, **options)
+    baseline = rss_bytes()
+    started = time.perf_counter()
+
+    @client.event
+    async def on_ready():
+        ready = time.perf_counter() - started
+        guild = client.get_guild(GUILD_ID)
+        rng = random.Random(2)
+        member_ids = [10**17 + rng.randrange(guild.member_count - 1) for _ in range(lookups)]
+        lookup_started = time.perf_counter()
+        for member_id in member_ids:
+            await cache.fetch(guild, member_id)
+        lookup = (time.perf_counter() - lookup_started) / max(1, lookups)
+        results.put((policy, ready, rss_bytes() - baseline, len(guild._members), lookup, cache.metrics()))
+        await client.close()
+
+    await client.start('bench.token')
+
+
+def client_process(policy, port, lookups, max_members, results):
+    asyncio.run(run_client(policy, port, lookups, max_members, results))
+
+
+def main(args):
+    fixture = args.fixture or os.path.join(tempfile.gettempdir(), f"member_fixture_{args.members}.json.gz")
+    if not os.path.exists(fixture):
+        record_fixture(fixture, args.members)
+    server = multiprocessing.Process(target=serve, args=(fixture, args.port), daemon=True)
+    server.start()
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', args.port)).close()
+            break
+        except OSError:
+            time.sleep(0.2)
+    results = multiprocessing.Queue()
+    print(f"Fixture {fixture} ({os.path.getsize(fixture) / 2**20:.1f} MiB), {args.lookups} moderation lookups after ready")
+    for policy in ('full', 'lazy'):
+        client = multiprocessing.Process(target=client_process, args=(policy, args.port, args.lookups, args.max_members, results))
+        client.start()
+        client.join(timeout=600)
+        if results.empty():
+            print(f"  {policy:<5} client failed (exit code {client.exitcode})")
+            continue
+        policy, ready, rss, cached, lookup, stats = results.get()
+        print(f"  {policy:<5} time to ready {ready:6.2f}s, RSS +{rss / 2**20:7.1f} MiB, {cached:,} members cached, "
+              f"lookup {lookup * 1e3:5.2f}ms ({stats['fetched']} fetched over REST)")
+    server.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a large-guild gateway fixture and compare time to ready and RSS for full and lazy member caching")
+    parser.add_argument('--fixture', help="gzipped JSON fixture; recorded synthetically on first use when missing")
+    parser.add_argument('--members', type=int, default=200_000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--max-members', type=int, default=10_000)
+    parser.add_argument('--port', type=int, default=8767)
+    main(parser.parse_args())
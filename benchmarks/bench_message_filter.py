@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from message_filter import FilterEngine
+
+WORDS = ("lol", "gg", "anyone", "playing", "tonight", "the", "server", "is", "down", "again", "what", "time",
+         "brb", "nice", "update", "patch", "notes", "look", "at", "this", "meme", "ok", "thanks", "bro", "fr")
+EXTRAS = ("https://discord.gg/abc123", "check discord.com/invite/XyZ", "@everyone", "@here", "<@&123456789012345678>",
+          "<@123456789012345678>", "https://example.com/watch?v=dQw4w9WgXcQ", ":pog:", "email me at a@b.gg")
+
+
+def build_corpus(size, seed=1):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = [rng.choice(WORDS) for _ in range(rng.choice((1, 2, 3, 5, 8, 13, 30, 60)))]
+        if rng.random() < 0.08:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(EXTRAS))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def legacy_scan(content, blocked_mentions=(r'@everyone', r'@here')):
+    hits = {}
+    if re.search(r'(discord\.gg|discord\.com/invite|\.gg)/[a-zA-Z0-9]+', content, re.IGNORECASE):
+        hits['invite'] = 1
+    for pattern in blocked_mentions:
+        if re.search(pattern, content, re.IGNORECASE):
+            hits['mass_mention'] = 1
+            break
+    role_mentions = len(re.findall(r'<@&\d+>', content))
+    if role_mentions:
+        hits['role_mention'] = role_mentions
+    return hits
+
+
+def bench(name, scan, corpus, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for content in corpus:
+            scan(content)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:>34}: {len(corpus) / best:12,.0f} msgs/s  ({best / len(corpus) * 1e6:.2f} µs/msg)")
+
+
+async def edit_stall(engine, guild_id, corpus):
+    stalls = []
+    engine.add_term(guild_id, 'freshly added term')
+    while engine._refreshing:
+        started = time.perf_counter()
+        for content in corpus[:100]:
+            engine.scan(guild_id, content)
+        await asyncio.sleep(0)
+        stalls.append(time.perf_counter() - started)
+    return max(stalls, default=0.0), engine.scan(guild_id, 'a freshly added term')
+
+
+def main(size, rounds):
+    corpus = build_corpus(size)
+    print(f"corpus: {size:,} messages, {sum(map(len, corpus)) / size:.0f} chars on average")
+    engine = FilterEngine()
+    bench("legacy re.search per pattern", legacy_scan, corpus, rounds)
+    bench("combined matcher (builtin rules)", lambda content: engine.scan(1, content), corpus, rounds)
+    engine.set_guild_rules(2, [('custom', r'free\s+nitro'), ('custom', r'steamcommunity\.ru'), ('custom', r'crypto\s*giveaway')])
+    bench("combined matcher (+3 guild rules)", lambda content: engine.scan(2, content), corpus, rounds)
+    rng = random.Random(2)
+    for count in (100, 1_000, 10_000):
+        engine = FilterEngine()
+        for _ in range(count):
+            engine.add_term(3, ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10))))
+        for i in range(count // 100):
+            engine.add_pattern(3, rf'spam{i}\w*\.ru')
+        started = time.perf_counter()
+        engine.matcher(3)
+        print(f"blocklist of {count:,} terms and {count // 100} patterns compiled in {(time.perf_counter() - started) * 1000:.0f} ms")
+        bench(f"combined matcher ({count:,} blocklist terms)", lambda content: engine.scan(3, content), corpus, rounds)
+    started = time.perf_counter()
+    for i in range(1000):
+        engine.set_guild_rules(2, [('custom', rf'term{i}')])
+        engine.matcher(2)
+    print(f"incremental rebuild of one guild: {(time.perf_counter() - started) * 1000:.3f} µs")
+    stall, hits = asyncio.run(edit_stall(engine, 3, corpus))
+    print(f"longest loop slice while rebuilding after an edit: {stall * 1000:.1f} ms (new term live: {'blocked_term' in hits})")
+    mismatches = sum(1 for content in corpus if legacy_scan(content).keys() != engine.scan(1, content).keys())
+    print(f"rule hit mismatches against the legacy path: {mismatches}")
+    overlapping = FilterEngine()
+    overlapping.add_pattern(1, r'https?://\S+')
+    overlapping.add_pattern(2, 'nitro')
+    overlapping.add_term(3, 'everyone')
+    cases = [(1, 'join https://discord.gg/abcdef now', {'invite', 'blocked_pattern'}), (2, 'free discord.gg/nitro', {'invite', 'blocked_pattern'}),
+             (3, 'hey @everyone', {'mass_mention', 'blocked_term'})]
+    missed = [content for guild_id, content, expected in cases if overlapping.scan(guild_id, content).keys() != expected]
+    print(f"overlapping rules reported together: {len(cases) - len(missed)}/{len(cases)}" + (f" (missed: {missed})" if missed else ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the per-pattern on_message checks with the combined filter engine")
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    main(args.messages, args.rounds)
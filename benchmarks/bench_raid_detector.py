@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from raid_detector import RaidDetector, name_skeleton
+
+WINDOW = 10.0
+
+
+class NaiveDetector:
+    def __init__(self, join_limit, fingerprint_limit):
+        self.join_limit = join_limit
+        self.fingerprint_limit = fingerprint_limit
+        self.joins = []
+
+    def observe(self, guild_id, member_id, account_age, name, avatar=None, now=None):
+        skeleton = name_skeleton(name)
+        self.joins = [join for join in self.joins if now - join[0] <= WINDOW]
+        self.joins.append((now, member_id, skeleton, avatar))
+        if (len(self.joins) >= self.join_limit
+                or sum(1 for join in self.joins if skeleton and join[2] == skeleton) >= self.fingerprint_limit
+                or sum(1 for join in self.joins if avatar and join[3] == avatar) >= self.fingerprint_limit):
+            return True, [], [join[1] for join in self.joins]
+        return None
+
+
+def joins(count, rate, raid_at, raid_size, raid_rate, seed=1):
+    rng = random.Random(seed)
+    now = 0.0
+    events = []
+    for index in range(count):
+        if raid_at <= index < raid_at + raid_size:
+            now += rng.expovariate(raid_rate / 60.0)
+            events.append((now, 10**18 + index, rng.uniform(0, 3600), f"raider{rng.randrange(10_000)}", 'a_raid'))
+        else:
+            now += rng.expovariate(rate / 60.0)
+            names = ('alex', 'sam', 'kai', 'jordan', 'river', 'noor', 'mika', 'taylor')
+            events.append((now, 10**17 + index, rng.uniform(0, 5 * 365 * 86400), f"{rng.choice(names)}_{rng.getrandbits(24):x}", f"{rng.getrandbits(64):x}" if rng.random() < 0.7 else None))
+    return events
+
+
+def run(name, detector, events):
+    observe = detector.observe
+    flagged = []
+    started = time.perf_counter()
+    for now, member_id, age, username, avatar in events:
+        if observe(1, member_id, age, username, avatar, now=now) is not None:
+            flagged.append(member_id)
+    elapsed = time.perf_counter() - started
+    raiders = sum(1 for member_id in flagged if member_id >= 10**18)
+    print(f"{name:>12}: {len(events) / elapsed:10,.0f} joins/s ({elapsed / len(events) * 1e6:.2f} µs/join), "
+          f"{len(flagged):,} flagged ({raiders:,} raiders, {len(flagged) - raiders:,} organic)")
+
+
+def main(args):
+    events = joins(args.joins, args.rate, args.raid_at, args.raid_size, args.raid_rate)
+    print(f"{args.joins:,} joins into one guild at {args.rate:,.0f}/min with a raid of {args.raid_size} accounts at {args.raid_rate:,.0f}/min; "
+          f"limits: {args.join_limit} joins or {args.fingerprint_limit} look-alikes per {WINDOW:.0f}s")
+    run("RaidDetector", RaidDetector(join_limit=args.join_limit, window=WINDOW, young_limit=args.join_limit // 4, fingerprint_limit=args.fingerprint_limit, cooldown=0.0), events)
+    if not args.skip_naive:
+        run("naive scan", NaiveDetector(args.join_limit, args.fingerprint_limit), events)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay member joins through the raid detector and report per-join cost")
+    parser.add_argument('--joins', type=int, default=200_000)
+    parser.add_argument('--rate', type=float, default=3_000.0)
+    parser.add_argument('--raid-at', type=int, default=100_000)
+    parser.add_argument('--raid-size', type=int, default=500)
+    parser.add_argument('--raid-rate', type=float, default=30_000.0)
+    parser.add_argument('--join-limit', type=int, default=1_000)
+    parser.add_argument('--fingerprint-limit', type=int, default=20)
+    parser.add_argument('--skip-naive', action='store_true')
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_windows import RateWindows
+
+ACTIONS = ('bans', 'kicks', 'channel_deletions', 'role_mentions')
+ACTION_LIMIT = 5
+ACTION_WINDOW = 60
+
+
+class LegacyActions:
+    def __init__(self):
+        self.user_actions = {}
+
+    def hit(self, guild_id, user_id, action_type, now):
+        if user_id not in self.user_actions:
+            self.user_actions[user_id] = {}
+        if action_type not in self.user_actions[user_id]:
+            self.user_actions[user_id][action_type] = deque(maxlen=ACTION_LIMIT)
+        self.user_actions[user_id][action_type].append(now)
+        if len(self.user_actions[user_id][action_type]) == ACTION_LIMIT:
+            times = list(self.user_actions[user_id][action_type])
+            return times[-1] - times[0] <= ACTION_WINDOW
+        return False
+
+
+def events(count, users, guilds, active, rate, seed=1):
+    rng = random.Random(seed)
+    now = 0.0
+    step = 1.0 / rate
+    for index in range(count):
+        now += step
+        base = int(now / 600 * active) % users
+        user_id = 10**17 + (base + rng.randrange(active)) % users
+        yield user_id % guilds, user_id, rng.choice(ACTIONS), now
+
+
+def footprint(engine):
+    if isinstance(engine, RateWindows):
+        tables = (engine.current, engine.previous)
+        return sum(sys.getsizeof(table) + sum(sys.getsizeof(key) + sys.getsizeof(ring) for key, ring in table.items()) for table in tables)
+    total = sys.getsizeof(engine.user_actions)
+    for user_id, actions in engine.user_actions.items():
+        total += sys.getsizeof(user_id) + sys.getsizeof(actions)
+        for action, times in actions.items():
+            total += sys.getsizeof(times) + sum(sys.getsizeof(stamp) for stamp in times)
+    return total
+
+
+def run(name, engine, args, report):
+    elapsed = 0.0
+    triggered = 0
+    samples = []
+    started = time.perf_counter()
+    for index, (guild_id, user_id, action, now) in enumerate(events(args.events, args.users, args.guilds, args.active, args.rate), 1):
+        triggered += engine.hit(guild_id, user_id, action, now)
+        if index % report == 0:
+            elapsed += time.perf_counter() - started
+            samples.append((index, footprint(engine)))
+            started = time.perf_counter()
+    print(f"{name}: {args.events / elapsed:,.0f} events/s including event generation, {triggered:,} triggers")
+    print("  " + "  ".join(f"{index / 1_000_000:g}M: {memory / 2**20:.1f} MiB" for index, memory in samples))
+
+
+def main(args):
+    print(f"{args.events:,} events from {args.users:,} users in {args.guilds:,} guilds, "
+          f"{args.active:,} users active at a time, {args.rate:,.0f} events/s of simulated time")
+    report = max(args.events // 10, 1)
+    run("RateWindows", RateWindows(default=(ACTION_LIMIT, ACTION_WINDOW)), args, report)
+    if not args.skip_legacy:
+        run("legacy user_actions", LegacyActions(), args, report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay synthetic moderation events through the nuke protection rate windows and report memory")
+    parser.add_argument('--events', type=int, default=10_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--guilds', type=int, default=1_000)
+    parser.add_argument('--active', type=int, default=5_000)
+    parser.add_argument('--rate', type=float, default=1_000.0)
+    parser.add_argument('--skip-legacy', action='store_true')
+    main(parser.parse_args())
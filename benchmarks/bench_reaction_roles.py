@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_queue import ActionQueue
+from reaction_roles import ReactionRoles
+
+EMOJIS = ['\N{GRINNING FACE}', '\N{THUMBS UP SIGN}', '\N{RED APPLE}', '\N{GREEN HEART}', '\N{BLUE HEART}', '\N{FIRE}', '\N{WHITE MEDIUM STAR}', '\N{ROCKET}']
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+
+    def is_default(self):
+        return False
+
+
+class FakeMember:
+    def __init__(self, member_id, counters):
+        self.id = member_id
+        self.roles = []
+        self.bot = False
+        self.counters = counters
+
+    async def add_roles(self, role):
+        self.counters['calls'] += 1
+        self.roles.append(role)
+
+    async def edit(self, roles, reason=None):
+        self.counters['calls'] += 1
+        self.roles = [FakeRole(role.id) for role in roles]
+
+
+class FakeGuild:
+    def __init__(self, guild_id, members):
+        self.id = guild_id
+        self.members = members
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_role(self, role_id):
+        return FakeRole(role_id)
+
+
+class FakeReaction:
+    def __init__(self, message_id, emoji):
+        self.message = type('Message', (), {'id': message_id})()
+        self.emoji = emoji
+
+
+async def dispatch_legacy(listeners, reaction, user):
+    await asyncio.gather(*(listener(reaction, user) for listener in listeners))
+
+
+def legacy_listeners(mappings, roles):
+    listeners = []
+    for message_id, emoji, role_id in mappings:
+        async def on_reaction_add(reaction, user, message_id=message_id, emoji=emoji, role=roles[role_id]):
+            if user.bot or reaction.message.id != message_id:
+                return
+            if str(reaction.emoji) == emoji:
+                await user.add_roles(role)
+        listeners.append(on_reaction_add)
+    return listeners
+
+
+async def main(args):
+    rng = random.Random(1)
+    mappings = [(10**17 + index // len(EMOJIS), EMOJIS[index % len(EMOJIS)], index) for index in range(args.mappings)]
+    roles = {role_id: FakeRole(role_id) for _, _, role_id in mappings}
+    counters = {'calls': 0}
+    members = {member_id: FakeMember(member_id, counters) for member_id in range(args.members)}
+    guild = FakeGuild(1, members)
+    events = []
+    for _ in range(args.reactions // args.burst):
+        member_id = rng.randrange(args.members)
+        message_id = rng.choice(mappings)[0]
+        for emoji in rng.sample(EMOJIS, args.burst):
+            events.append((message_id, emoji, member_id))
+    print(f"{args.mappings:,} reaction roles bot-wide, {len(events):,} reactions in bursts of {args.burst} per member")
+
+    listeners = legacy_listeners(mappings, roles)
+    started = time.perf_counter()
+    for message_id, emoji, member_id in events:
+        await dispatch_legacy(listeners, FakeReaction(message_id, emoji), members[member_id])
+    elapsed = time.perf_counter() - started
+    print(f"  legacy closures: {elapsed / len(events) * 1e6:10.1f} µs/reaction, {counters['calls']:,} role calls")
+
+    counters['calls'] = 0
+    for member in members.values():
+        member.roles = []
+    queue = ActionQueue(max_concurrency=8)
+    queue.start()
+    registry = ReactionRoles(queue, window=args.window)
+    for message_id, emoji, role_id in mappings:
+        registry.add(1, 0, message_id, emoji, role_id)
+    started = time.perf_counter()
+    for message_id, emoji, member_id in events:
+        role_id = registry.lookup(message_id, discord.PartialEmoji(name=emoji))
+        registry.change(guild, member_id, role_id, True)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(args.window * 2)
+    await queue.close()
+    print(f"  registry:        {elapsed / len(events) * 1e6:10.1f} µs/reaction, {counters['calls']:,} role calls ({registry.batches:,} member batches)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-reaction dispatch cost and role REST calls for closure listeners and the reaction-role registry")
+    parser.add_argument('--mappings', type=int, default=2_000)
+    parser.add_argument('--members', type=int, default=1_000)
+    parser.add_argument('--reactions', type=int, default=4_000)
+    parser.add_argument('--burst', type=int, default=4)
+    parser.add_argument('--window', type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_store import StateStore
+
+NAMESPACES = ('active_channels', 'disabled_channels', 'security_channels', 'pinned_messages', 'welcome_channels')
+
+
+def main(records, guilds):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'state.db')
+    rng = random.Random(1)
+    rows = [(rng.choice(NAMESPACES), rng.randrange(guilds), rng.getrandbits(62)) for _ in range(records)]
+
+    store = StateStore(path)
+    started = time.perf_counter()
+    for namespace, guild_id, channel_id in rows:
+        if namespace == 'pinned_messages':
+            store.put(namespace, guild_id, channel_id, {'content': 'Read the rules!', 'last_message_id': channel_id})
+        elif namespace == 'welcome_channels':
+            store.put(namespace, guild_id, channel_id, 'Have fun!')
+        else:
+            store.put(namespace, guild_id, channel_id)
+    queued = time.perf_counter() - started
+    store.flush()
+    committed = time.perf_counter() - started
+    stats = store.metrics()
+    store.close()
+    print(f"writes: {records} records queued in {queued * 1000:.0f} ms ({records / queued:,.0f}/s on the event loop side)")
+    print(f"        committed in {committed * 1000:.0f} ms ({records / committed:,.0f}/s, {stats['batches']} batches)")
+
+    loaded = {}
+
+    def loader(guild_id, key, value):
+        loaded[(guild_id, key)] = value
+
+    started = time.perf_counter()
+    store = StateStore(path)
+    for namespace in NAMESPACES:
+        store.register(namespace, loader)
+    startup = time.perf_counter() - started
+    print(f"startup (lazy): {startup * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    store.load_guild(0)
+    first_guild = time.perf_counter() - started
+    print(f"first access to one guild: {first_guild * 1000:.2f} ms ({len(loaded)} records)")
+
+    started = time.perf_counter()
+    for guild_id in range(guilds):
+        store.load_guild(guild_id)
+    everything = time.perf_counter() - started
+    store.close()
+    print(f"loading all {guilds} guilds one by one: {everything * 1000:.0f} ms ({len(loaded)} records)")
+
+    started = time.perf_counter()
+    store = StateStore(path)
+    eager = store.query('SELECT guild_id, namespace, key, value FROM state')
+    eager_time = time.perf_counter() - started
+    store.close()
+    print(f"startup (eager full scan, for comparison): {eager_time * 1000:.0f} ms ({len(eager)} records)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure state store write throughput and startup time")
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--guilds', type=int, default=5_000)
+    args = parser.parse_args()
+    main(args.records, args.guilds)
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sticky_messages import LEGACY_CALLS_PER_TRIGGER, StickyEngine
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.last_message_id = None
+
+
+async def run(channels, duration, rate, quiet_window, max_delay, latency):
+    rng = random.Random(1)
+
+    async def repost(channel):
+        calls = 0
+        if channel.last_message_id:
+            await asyncio.sleep(latency)
+            calls += 1
+        await asyncio.sleep(latency)
+        channel.last_message_id = rng.getrandbits(62)
+        return calls + 1
+
+    engine = StickyEngine(repost, quiet_window=quiet_window, max_delay=max_delay)
+    fake_channels = [FakeChannel(channel_id) for channel_id in range(channels)]
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        channel = rng.choice(fake_channels)
+        for _ in range(rng.choice((1, 1, 1, 2, 3, 5, 10))):
+            engine.touch(channel)
+        await asyncio.sleep(rng.expovariate(rate))
+    while engine.pending or engine.in_flight:
+        await asyncio.sleep(quiet_window)
+    stats = engine.metrics()
+    await engine.close()
+    legacy = stats['triggers'] * LEGACY_CALLS_PER_TRIGGER
+    print(f"{stats['triggers']:,} sticky triggers over {channels} channels in {duration:.0f}s "
+          f"(quiet window {quiet_window * 1000:.0f} ms, max delay {max_delay * 1000:.0f} ms)")
+    print(f"legacy path (fetch + delete + send per message): {legacy:,} REST calls")
+    print(f"sticky engine: {stats['reposts']:,} reposts, {stats['rest_calls']:,} REST calls "
+          f"({stats['rest_calls_saved']:,} saved, {stats['rest_calls_saved'] / max(legacy, 1):.1%})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare REST calls made by the per-message sticky repost and the debounced sticky engine")
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=400.0, help="message bursts per second across all channels")
+    parser.add_argument('--quiet-window', type=float, default=0.05)
+    parser.add_argument('--max-delay', type=float, default=0.3)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.channels, args.duration, args.rate, args.quiet_window, args.max_delay, args.latency))
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_store import StateStore
+from warnings_ledger import SCHEMA, WarningsLedger, parse_rules
+
+
+def legacy_footprint(warnings):
+    total = sys.getsizeof(warnings)
+    for members in warnings.values():
+        total += sys.getsizeof(members)
+        for member_id, entries in members.items():
+            total += sys.getsizeof(member_id) + sys.getsizeof(entries)
+            for entry in entries:
+                total += sys.getsizeof(entry) + sys.getsizeof(entry['reason']) + sys.getsizeof(entry['timestamp'])
+    return total
+
+
+def ledger_footprint(ledger):
+    return sys.getsizeof(ledger.recent) + sum(sys.getsizeof(key) + sys.getsizeof(ring) for key, ring in ledger.recent.items())
+
+
+async def main(args):
+    rng = random.Random(1)
+    members = [(rng.randrange(args.guilds), 10**17 + rng.randrange(10**15)) for _ in range(args.members)]
+    reasons = ["spam", "advertising", "slurs in general chat", "mass pinging moderators", "NSFW avatar"]
+    path = os.path.join(tempfile.mkdtemp(), 'bench_warnings.db')
+    store = StateStore(path, schema=SCHEMA)
+    ledger = WarningsLedger(store, parse_rules("3/7d=mute:1h,5/30d=ban"), max_cached=args.cached)
+    print(f"{args.warnings:,} warnings for {args.members:,} members in {args.guilds:,} guilds; ledger caches at most {args.cached:,} members")
+
+    legacy = {}
+    started = time.perf_counter()
+    for _ in range(args.warnings):
+        guild_id, user_id = rng.choice(members)
+        legacy.setdefault(guild_id, {}).setdefault(user_id, []).append({"reason": rng.choice(reasons), "timestamp": datetime.datetime.now(datetime.timezone.utc)})
+    elapsed = time.perf_counter() - started
+    print(f"  legacy dicts:  {args.warnings / elapsed:10,.0f} inserts/s, {legacy_footprint(legacy) / 2**20:7.1f} MiB resident")
+    del legacy
+
+    escalations = 0
+    started = time.perf_counter()
+    for _ in range(args.warnings):
+        guild_id, user_id = rng.choice(members)
+        escalations += await ledger.add(guild_id, user_id, 1, rng.choice(reasons)) is not None
+    elapsed = time.perf_counter() - started
+    await asyncio.to_thread(store.flush)
+    flushed = time.perf_counter() - started
+    print(f"  ledger:        {args.warnings / elapsed:10,.0f} inserts/s ({args.warnings / flushed:,.0f}/s committed), "
+          f"{ledger_footprint(ledger) / 2**20:7.1f} MiB resident, {os.path.getsize(path) / 2**20:.1f} MiB on disk, {escalations:,} escalations")
+
+    samples = [rng.choice(members) for _ in range(args.queries)]
+    started = time.perf_counter()
+    for guild_id, user_id in samples:
+        await ledger.page(guild_id, user_id, 1, 10)
+    elapsed = time.perf_counter() - started
+    print(f"  page query:    {elapsed / args.queries * 1e6:10.1f} µs")
+    since = time.time() - 3600
+    started = time.perf_counter()
+    for guild_id, user_id in samples:
+        await ledger.page(guild_id, user_id, 1, 10, since)
+    elapsed = time.perf_counter() - started
+    print(f"  ranged query:  {elapsed / args.queries * 1e6:10.1f} µs")
+    store.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Insert warnings into the SQLite ledger and compare against the legacy nested dicts")
+    parser.add_argument('--warnings', type=int, default=1_000_000)
+    parser.add_argument('--members', type=int, default=200_000)
+    parser.add_argument('--guilds', type=int, default=1_000)
+    parser.add_argument('--cached', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=5_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from welcome import WelcomeMessages
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.sent = 0
+
+    async def send(self, content):
+        self.sent += 1
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild {guild_id}"
+        self.member_count = 1000
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeMember:
+    def __init__(self, member_id, guild):
+        self.id = member_id
+        self.guild = guild
+        self.mention = f"<@{member_id}>"
+        self.display_name = f"member{member_id}"
+
+
+def build_guilds(count):
+    guilds = []
+    for guild_id in range(1, count + 1):
+        guild = FakeGuild(guild_id)
+        channel = FakeChannel(guild_id * 10, guild)
+        guild.channels[channel.id] = channel
+        guilds.append(guild)
+    return guilds
+
+
+async def legacy_join(member, welcome_channels):
+    for channel_id, message in welcome_channels.items():
+        channel = member.guild.get_channel(channel_id)
+        if channel:
+            await channel.send(f"Welcome {member.mention} to {member.guild.name}. {message}")
+
+
+async def main(args):
+    rng = random.Random(1)
+    guilds = build_guilds(args.guilds)
+    welcome_channels = {guild.id * 10: "Read the rules!" for guild in guilds}
+    members = [FakeMember(10**17 + index, rng.choice(guilds)) for index in range(args.joins)]
+    print(f"{args.guilds:,} guilds with a welcome channel each, {args.joins:,} joins spread across them")
+
+    started = time.perf_counter()
+    for member in members:
+        await legacy_join(member, welcome_channels)
+    elapsed = time.perf_counter() - started
+    print(f"  legacy global scan: {elapsed / args.joins * 1e6:9.1f} µs/join")
+
+    async def send(channel, content):
+        await channel.send(content)
+
+    welcomes = WelcomeMessages(send, window=args.window, max_members=args.max_members)
+    for guild in guilds:
+        welcomes.set(guild.id, guild.id * 10, "Read the rules, {member}! You are member #{count} of {guild}.")
+    started = time.perf_counter()
+    for member in members:
+        welcomes.join(member)
+    elapsed = time.perf_counter() - started
+    await welcomes.close()
+    print(f"  guild-indexed:      {elapsed / args.joins * 1e6:9.1f} µs/join")
+
+    spike = FakeGuild(0)
+    channel = FakeChannel(0, spike)
+    spike.channels[0] = channel
+    welcomes = WelcomeMessages(send, window=args.window, max_members=args.max_members)
+    welcomes.set(0, 0, "Welcome {member}!")
+    for index in range(args.spike):
+        welcomes.join(FakeMember(10**18 + index, spike))
+        await asyncio.sleep(args.spike_seconds / args.spike)
+    await welcomes.close()
+    print(f"spike of {args.spike} joins over {args.spike_seconds:g}s into one channel: {channel.sent} messages instead of {args.spike}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-join welcome dispatch cost and count messages sent for a join spike")
+    parser.add_argument('--guilds', type=int, default=5_000)
+    parser.add_argument('--joins', type=int, default=2_000)
+    parser.add_argument('--window', type=float, default=2.0)
+    parser.add_argument('--max-members', type=int, default=20)
+    parser.add_argument('--spike', type=int, default=300)
+    parser.add_argument('--spike-seconds', type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+FEATURE_DISABLED = 1
+FEATURE_AI = 2
+FEATURE_SECURITY = 4
+FEATURE_PIN = 8
+FEATURE_NUKE = 16
+FEATURE_FILTER = 32
+FEATURE_SCAN = FEATURE_AI | FEATURE_SECURITY | FEATURE_NUKE | FEATURE_FILTER
+
+
+class ChannelFeatures:
+    def __init__(self, compute):
+        self.compute = compute
+        self.features = {}
+        self.guild_channels = {}
+        self.computed = 0
+        self.invalidations = 0
+
+    def get(self, channel, guild):
+        features = self.features.get(channel.id)
+        if features is None:
+            features = self.compute(channel, guild)
+            self.features[channel.id] = features
+            if guild is not None:
+                self.guild_channels.setdefault(guild.id, set()).add(channel.id)
+            self.computed += 1
+        return features
+
+    def invalidate(self, guild_id):
+        for channel_id in self.guild_channels.pop(guild_id, ()):
+            self.features.pop(channel_id, None)
+        self.invalidations += 1
+
+    def metrics(self):
+        features = self.features.values()
+        return {
+            'channels': len(self.features),
+            'idle_channels': sum(1 for bits in features if not bits),
+            'computed': self.computed,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,154 @@
+import asyncio
+import heapq
+import logging
+import time
+
+EXPIRE_BAN = 0
+EXPIRE_MUTE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expiries (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    due REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id, kind)
+) WITHOUT ROWID;
+"""
+
+
+def pack_key(guild_id, user_id, kind):
+    return (guild_id << 66) | (user_id << 2) | kind
+
+
+def unpack_key(key):
+    return key >> 66, (key >> 2) & ((1 << 64) - 1), key & 3
+
+
+class ExpiryScheduler:
+    def __init__(self, store, handler, batch_size=10, batch_interval=1.0, retry_base=30.0, retry_max=3600.0, max_attempts=8):
+        self.store = store
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.heap = []
+        self.due = {}
+        self.attempts = {}
+        self.fired = 0
+        self.failures = 0
+        self.retries = 0
+        self.abandoned = 0
+        self._wakeup = None
+        self._task = None
+
+    def load(self, owns=None):
+        for guild_id, user_id, kind, due in self.store.query('SELECT guild_id, user_id, kind, due FROM expiries'):
+            if owns is not None and not owns(guild_id):
+                continue
+            key = pack_key(guild_id, user_id, kind)
+            self.due[key] = due
+            self.heap.append((due, key))
+        heapq.heapify(self.heap)
+
+    def start(self, before_start=None):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(before_start))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, guild_id, user_id, kind, delay):
+        due = time.time() + delay
+        key = pack_key(guild_id, user_id, kind)
+        self.attempts.pop(key, None)
+        self.due[key] = due
+        heapq.heappush(self.heap, (due, key))
+        self.store.submit('INSERT OR REPLACE INTO expiries (guild_id, user_id, kind, due) VALUES (?, ?, ?, ?)', (guild_id, user_id, kind, due))
+        if self._wakeup is not None and self.heap[0][1] == key:
+            self._wakeup.set()
+
+    def cancel(self, guild_id, user_id, kind):
+        key = pack_key(guild_id, user_id, kind)
+        if self.due.pop(key, None) is not None or self.attempts.pop(key, None) is not None:
+            self.store.submit('DELETE FROM expiries WHERE guild_id = ? AND user_id = ? AND kind = ?', (guild_id, user_id, kind))
+
+    def pending(self):
+        return len(self.due)
+
+    def _pop_due(self, now):
+        batch = []
+        while self.heap and self.heap[0][0] <= now and len(batch) < self.batch_size:
+            due, key = heapq.heappop(self.heap)
+            if self.due.get(key) != due:
+                continue
+            del self.due[key]
+            batch.append(key)
+        if len(self.heap) > 2 * len(self.due) + 1024:
+            self.heap = [(due, key) for key, due in self.due.items()]
+            heapq.heapify(self.heap)
+        return batch
+
+    async def _fire(self, key):
+        guild_id, user_id, kind = unpack_key(key)
+        attempt = self.attempts.get(key, 0) + 1
+        self.attempts[key] = attempt
+        try:
+            await self.handler(guild_id, user_id, kind)
+        except Exception:
+            self.failures += 1
+            logging.exception(f"Expiry {kind} for user {user_id} in guild {guild_id} failed")
+            if self.attempts.get(key) != attempt:
+                return
+            if attempt >= self.max_attempts:
+                del self.attempts[key]
+                self.abandoned += 1
+                logging.error(f"Giving up on expiry {kind} for user {user_id} in guild {guild_id} after {attempt} attempts")
+                if key not in self.due:
+                    self.store.submit('DELETE FROM expiries WHERE guild_id = ? AND user_id = ? AND kind = ?', (guild_id, user_id, kind))
+                return
+            delay = min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+            self.retries += 1
+            due = time.time() + delay
+            self.due[key] = due
+            heapq.heappush(self.heap, (due, key))
+            self.store.submit('UPDATE expiries SET due = ? WHERE guild_id = ? AND user_id = ? AND kind = ?', (due, guild_id, user_id, kind))
+            return
+        self.fired += 1
+        if self.attempts.get(key) == attempt:
+            del self.attempts[key]
+            if key not in self.due:
+                self.store.submit('DELETE FROM expiries WHERE guild_id = ? AND user_id = ? AND kind = ?', (guild_id, user_id, kind))
+
+    async def _run(self, before_start):
+        if before_start is not None:
+            await before_start()
+        while True:
+            batch = self._pop_due(time.time())
+            if batch:
+                await asyncio.gather(*(self._fire(key) for key in batch))
+                if len(batch) == self.batch_size:
+                    await asyncio.sleep(self.batch_interval)
+                continue
+            self._wakeup.clear()
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self):
+        return {
+            'pending': len(self.due),
+            'next_due_in': round(self.heap[0][0] - time.time()) if self.heap else None,
+            'fired': self.fired,
+            'failures': self.failures,
+            'retrying': len(self.attempts),
+            'abandoned': self.abandoned,
+        }
@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import urllib.parse
+
+import aiohttp
+
+
+def default_handoff_dir():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'petezah-images')
+
+
+class GenerationError(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, index, process):
+        self.index = index
+        self.process = process
+        self.jobs = set()
+        self.reader = None
+        self.started = time.monotonic()
+        self.crashes = 0
+        self.restarting = False
+
+
+class GenerationWorkers:
+    def __init__(self, workers, text_url, image_url, directory, text_path='/', concurrency=4, timeout=60.0, restart_base=1.0, restart_max=60.0):
+        self.count = workers
+        self.timeout = timeout
+        self.restart_base = restart_base
+        self.restart_max = restart_max
+        self.config = {
+            'text_url': text_url.rstrip('/') + text_path,
+            'image_url': image_url.rstrip('/'),
+            'directory': directory,
+            'concurrency': concurrency,
+        }
+        self.workers = []
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._closing = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.restarts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+
+    async def start(self):
+        if self.workers:
+            return
+        os.makedirs(self.config['directory'], exist_ok=True)
+        for index in range(self.count):
+            self.workers.append(await self._spawn(index))
+
+    async def _spawn(self, index):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), json.dumps(self.config),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=4 * 1024 * 1024,
+        )
+        worker = _Worker(index, process)
+        worker.reader = asyncio.create_task(self._read(worker))
+        return worker
+
+    async def _read(self, worker):
+        try:
+            async for line in worker.process.stdout:
+                self._finish(worker, json.loads(line))
+        finally:
+            for job_id in list(worker.jobs):
+                self._fail(job_id, GenerationError(f"Generation worker {worker.index} exited"))
+        if not self._closing:
+            await worker.process.wait()
+            crashes = 1 if time.monotonic() - worker.started >= self.restart_max else worker.crashes + 1
+            delay = min(self.restart_max, self.restart_base * 2 ** (crashes - 1))
+            logging.error(f"Generation worker {worker.index} exited with code {worker.process.returncode}, restarting in {delay:.1f}s")
+            self.restarts += 1
+            worker.restarting = True
+            await asyncio.sleep(delay)
+            if not self._closing:
+                replacement = self.workers[worker.index] = await self._spawn(worker.index)
+                replacement.crashes = crashes
+
+    def _forget(self, job_id):
+        entry = self.jobs.pop(job_id, None)
+        if entry is not None:
+            entry[1].jobs.discard(job_id)
+        return entry
+
+    def _fail(self, job_id, error):
+        entry = self._forget(job_id)
+        if entry is not None and not entry[0].done():
+            self.failed += 1
+            entry[0].set_exception(error)
+
+    def _finish(self, worker, result):
+        entry = self._forget(result['id'])
+        if entry is None:
+            return
+        future, _, submitted = entry
+        wait = max(0.0, result['started'] - submitted)
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.run_total += result['finished'] - result['started']
+        if future.done():
+            return
+        if result['ok']:
+            self.completed += 1
+            future.set_result(result['value'])
+        else:
+            self.failed += 1
+            future.set_exception(GenerationError(result['error']))
+
+    def _send(self, worker, request):
+        worker.process.stdin.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def cancel(self, job_id):
+        entry = self._forget(job_id)
+        if entry is None:
+            return False
+        entry[0].cancel()
+        if entry[1].process.returncode is None:
+            self._send(entry[1], {'op': 'cancel', 'id': job_id})
+        return True
+
+    async def run(self, kind, *args, timeout=None):
+        if not self.workers:
+            raise GenerationError("Generation workers are not started")
+        timeout = timeout or self.timeout
+        running = [worker for worker in self.workers if worker.process.returncode is None]
+        if not running:
+            raise GenerationError("No generation workers are running")
+        worker = min(running, key=lambda worker: len(worker.jobs))
+        job_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self.jobs[job_id] = (future, worker, time.time())
+        worker.jobs.add(job_id)
+        self.submitted += 1
+        self._send(worker, {'op': 'run', 'id': job_id, 'kind': kind, 'args': args, 'timeout': timeout})
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.cancel(job_id)
+            raise
+        except asyncio.CancelledError:
+            if self.cancel(job_id):
+                self.cancelled += 1
+            raise
+
+    async def close(self):
+        self._closing = True
+        for worker in self.workers:
+            if worker.process.returncode is None:
+                worker.process.stdin.close()
+        for worker in self.workers:
+            try:
+                await asyncio.wait_for(worker.process.wait(), 5)
+            except asyncio.TimeoutError:
+                worker.process.kill()
+                await worker.process.wait()
+            if worker.restarting:
+                worker.reader.cancel()
+            await asyncio.gather(worker.reader, return_exceptions=True)
+        self.workers = []
+
+    def metrics(self):
+        finished = self.completed + self.failed
+        return {
+            'workers': len(self.workers),
+            'alive': sum(1 for worker in self.workers if worker.process.returncode is None),
+            'pending': len(self.jobs),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'restarts': self.restarts,
+            'avg_wait_ms': round(self.wait_total / finished * 1000, 1) if finished else 0.0,
+            'max_wait_ms': round(self.wait_max * 1000, 1),
+            'avg_run_ms': round(self.run_total / finished * 1000, 1) if finished else 0.0,
+        }
+
+
+async def generate_text(session, config, job_id, payload):
+    async with session.post(config['text_url'], data=payload.encode('utf-8'), headers={'Content-Type': 'application/json'}) as response:
+        return response.status, await response.text() if response.status == 200 else None
+
+
+async def generate_image(session, config, job_id, prompt, name):
+    async with session.get(f"{config['image_url']}/prompt/{urllib.parse.quote(prompt)}") as response:
+        if response.status != 200:
+            return response.status, None, 0
+        path = os.path.join(config['directory'], name)
+        temp_path = f"{path}.{job_id}.tmp"
+        size = 0
+        try:
+            with open(temp_path, 'wb') as handle:
+                async for chunk in response.content.iter_chunked(256 * 1024):
+                    handle.write(chunk)
+                    size += len(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return response.status, path, size
+
+
+JOBS = {'text': generate_text, 'image': generate_image}
+
+
+def _emit(result):
+    sys.stdout.buffer.write(json.dumps(result, ensure_ascii=False).encode('utf-8') + b'\n')
+    sys.stdout.buffer.flush()
+
+
+async def _job(session, config, slots, tasks, request):
+    result = {'id': request['id']}
+    try:
+        async with slots:
+            result['started'] = time.time()
+            value = await asyncio.wait_for(JOBS[request['kind']](session, config, request['id'], *request['args']), request['timeout'])
+            result.update(ok=True, value=value)
+    except asyncio.CancelledError:
+        return
+    except Exception as error:
+        result.update(ok=False, error=f"{type(error).__name__}: {error}")
+    finally:
+        tasks.pop(request['id'], None)
+    result.setdefault('started', time.time())
+    result['finished'] = time.time()
+    _emit(result)
+
+
+async def _serve(config):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=4 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    slots = asyncio.Semaphore(config['concurrency'])
+    tasks = {}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as session:
+        async for line in reader:
+            request = json.loads(line)
+            if request['op'] == 'run':
+                tasks[request['id']] = asyncio.create_task(_job(session, config, slots, tasks, request))
+            elif request['op'] == 'cancel' and request['id'] in tasks:
+                tasks[request['id']].cancel()
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(asctime)s:%(levelname)s:generation-worker:%(message)s')
+    asyncio.run(_serve(json.loads(sys.argv[1])))
@@ -0,0 +1,110 @@
+import asyncio
+import contextlib
+import aiohttp
+
+
+class BackendPool:
+    def __init__(self, base_url, limit=8, keepalive_timeout=60, dns_ttl=300, timeout=10):
+        self.base_url = base_url
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.session = None
+        self._slots = None
+        self.active = 0
+        self.waiting = 0
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    async def start(self):
+        if self.session is not None:
+            return
+        self._slots = asyncio.Semaphore(self.limit)
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        self.session = aiohttp.ClientSession(
+            base_url=self.base_url,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[trace],
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.connections_reused += 1
+
+    @contextlib.asynccontextmanager
+    async def request(self, method, path, **kwargs):
+        if self.session is None:
+            raise RuntimeError(f"HTTP pool for {self.base_url} is not started")
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.requests += 1
+        try:
+            async with self.session.request(method, path, **kwargs) as response:
+                yield response
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def idle_connections(self):
+        if self.session is None:
+            return 0
+        return sum(len(conns) for conns in getattr(self.session.connector, '_conns', {}).values())
+
+    def metrics(self):
+        idle = self.idle_connections()
+        return {
+            'open': self.active + idle,
+            'active': self.active,
+            'idle': idle,
+            'waiting': self.waiting,
+            'limit': self.limit,
+            'requests': self.requests,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+        }
+
+
+class HttpClients:
+    def __init__(self):
+        self.backends = {}
+
+    def register(self, name, base_url, **options):
+        self.backends[name] = BackendPool(base_url, **options)
+        return self.backends[name]
+
+    def __getitem__(self, name):
+        return self.backends[name]
+
+    async def start(self):
+        for backend in self.backends.values():
+            await backend.start()
+
+    async def close(self):
+        for backend in self.backends.values():
+            await backend.close()
+
+    def metrics(self):
+        return {name: backend.metrics() for name, backend in self.backends.items()}
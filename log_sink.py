@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from collections import Counter
+
+
+class _Buffer:
+    __slots__ = ('channel', 'embeds', 'suppressed', 'timer')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.embeds = []
+        self.suppressed = Counter()
+        self.timer = None
+
+
+def pack_embeds(embeds, max_embeds=10, max_chars=6000):
+    batch = []
+    chars = 0
+    for embed in embeds:
+        size = len(embed)
+        if batch and (len(batch) == max_embeds or chars + size > max_chars):
+            yield batch
+            batch = []
+            chars = 0
+        batch.append(embed)
+        chars += size
+    if batch:
+        yield batch
+
+
+class LogSink:
+    def __init__(self, send, summarize, window=2.0, max_pending=50, low_priority_limit=10):
+        self.send = send
+        self.summarize = summarize
+        self.window = window
+        self.max_pending = max_pending
+        self.low_priority_limit = low_priority_limit
+        self.buffers = {}
+        self._tasks = set()
+        self.emitted = 0
+        self.suppressed = 0
+        self.messages = 0
+        self.failures = 0
+
+    def emit(self, channel, embed, low_priority=False):
+        self.emitted += 1
+        buffer = self.buffers.get(channel.id)
+        if buffer is None:
+            buffer = self.buffers[channel.id] = _Buffer(channel)
+            buffer.timer = asyncio.get_running_loop().call_later(self.window, self._flush, channel.id)
+        depth = len(buffer.embeds)
+        if depth >= self.max_pending or (low_priority and depth >= self.low_priority_limit):
+            buffer.suppressed[embed.title] += 1
+            self.suppressed += 1
+            return
+        buffer.embeds.append(embed)
+
+    def _flush(self, channel_id):
+        buffer = self.buffers.pop(channel_id, None)
+        if buffer is None:
+            return
+        buffer.timer.cancel()
+        task = asyncio.create_task(self._send(buffer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, buffer):
+        embeds = buffer.embeds
+        if buffer.suppressed:
+            embeds.append(self.summarize(buffer.suppressed))
+        for batch in pack_embeds(embeds):
+            try:
+                await self.send(buffer.channel, batch)
+                self.messages += 1
+            except Exception:
+                self.failures += 1
+                logging.exception(f"Failed to send {len(batch)} log embeds to channel {buffer.channel.id}")
+
+    async def close(self):
+        for channel_id in list(self.buffers):
+            self._flush(channel_id)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            'emitted': self.emitted,
+            'messages': self.messages,
+            'suppressed': self.suppressed,
+            'buffered': sum(len(buffer.embeds) for buffer in self.buffers.values()),
+            'failures': self.failures,
+        }
@@ -0,0 +1,127 @@
+import asyncio
+import re
+import time
+
+import discord
+from discord.http import Route
+
+BULK_BAN_LIMIT = 200
+ID_PATTERN = re.compile(r'^(?:<@!?(\d{15,20})>|(\d{15,20}))$')
+
+
+def parse_selector(text):
+    tokens = text.split()
+    if not tokens:
+        return None, None, None
+    kind, _, value = tokens[0].partition(':')
+    if kind in ('joined', 'name') and value:
+        return kind, value, ' '.join(tokens[1:]) or None
+    ids = []
+    index = 0
+    for index, token in enumerate(tokens):
+        parts = [part for part in token.split(',') if part]
+        matches = [ID_PATTERN.match(part) for part in parts]
+        if not parts or not all(matches):
+            break
+        ids.extend(int(match.group(1) or match.group(2)) for match in matches)
+    else:
+        index = len(tokens)
+    if not ids:
+        return None, None, None
+    return 'ids', list(dict.fromkeys(ids)), ' '.join(tokens[index:]) or None
+
+
+def select_members(members, joined_after=None, name_pattern=None):
+    selected = []
+    for member in members:
+        if joined_after is not None and (member.joined_at is None or member.joined_at < joined_after):
+            continue
+        if name_pattern is not None and not (name_pattern.search(member.name) or name_pattern.search(member.display_name)):
+            continue
+        selected.append(member)
+    return selected
+
+
+async def run_bounded(targets, call, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = []
+    failed = []
+
+    async def run(target):
+        async with semaphore:
+            try:
+                await call(target)
+            except discord.HTTPException:
+                failed.append(target)
+            else:
+                succeeded.append(target)
+
+    await asyncio.gather(*(run(target) for target in targets))
+    return succeeded, failed
+
+
+async def bulk_ban(http, guild_id, user_ids, reason=None, delete_message_seconds=0):
+    banned = []
+    failed = []
+    for start in range(0, len(user_ids), BULK_BAN_LIMIT):
+        chunk = user_ids[start:start + BULK_BAN_LIMIT]
+        route = Route('POST', '/guilds/{guild_id}/bulk-ban', guild_id=guild_id)
+        data = await http.request(route, json={'user_ids': [str(user_id) for user_id in chunk], 'delete_message_seconds': delete_message_seconds}, reason=reason)
+        banned.extend(int(user_id) for user_id in data.get('banned_users', []))
+        failed.extend(int(user_id) for user_id in data.get('failed_users', []))
+    return banned, failed
+
+
+class MassModeration:
+    def __init__(self, concurrency=5, use_bulk_ban=True):
+        self.concurrency = concurrency
+        self.use_bulk_ban = use_bulk_ban
+        self.runs = 0
+        self.targets = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.bulk_requests = 0
+        self.bulk_fallbacks = 0
+        self.last_rate = None
+
+    def _finish(self, started, succeeded, failed):
+        self.runs += 1
+        self.targets += len(succeeded) + len(failed)
+        self.succeeded += len(succeeded)
+        self.failed += len(failed)
+        elapsed = time.perf_counter() - started
+        self.last_rate = len(succeeded) / elapsed if elapsed > 0 else None
+        return succeeded, failed
+
+    async def ban(self, guild, user_ids, reason=None):
+        started = time.perf_counter()
+        if self.use_bulk_ban:
+            try:
+                banned, failed = await bulk_ban(guild._state.http, guild.id, user_ids, reason)
+                self.bulk_requests += -(-len(user_ids) // BULK_BAN_LIMIT)
+                return self._finish(started, banned, failed)
+            except discord.HTTPException:
+                self.bulk_fallbacks += 1
+        banned, failed = await run_bounded(user_ids, lambda user_id: guild.ban(discord.Object(user_id), reason=reason, delete_message_seconds=0), self.concurrency)
+        return self._finish(started, banned, failed)
+
+    async def kick(self, members, reason=None):
+        started = time.perf_counter()
+        kicked, failed = await run_bounded(members, lambda member: member.kick(reason=reason), self.concurrency)
+        return self._finish(started, kicked, failed)
+
+    async def timeout(self, members, duration, reason=None):
+        started = time.perf_counter()
+        timed_out, failed = await run_bounded(members, lambda member: member.timeout(duration, reason=reason), self.concurrency)
+        return self._finish(started, timed_out, failed)
+
+    def metrics(self):
+        return {
+            'runs': self.runs,
+            'targets': self.targets,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'bulk_requests': self.bulk_requests,
+            'bulk_fallbacks': self.bulk_fallbacks,
+            'last_rate': round(self.last_rate, 1) if self.last_rate is not None else None,
+        }
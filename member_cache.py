@@ -0,0 +1,127 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+
+import discord
+
+MEMBER_ID_PATTERN = re.compile(r'^(?:<@!?)?([0-9]{15,20})>?$')
+QUERY_BATCH = 100
+# Guild._add_member/_remove_member are private; requirements.txt pins the discord.py version they were checked against.
+GUILD_CACHE_API = hasattr(discord.Guild, '_add_member') and hasattr(discord.Guild, '_remove_member')
+
+
+def parse_member_id(argument):
+    match = MEMBER_ID_PATTERN.match(argument.strip())
+    return int(match.group(1)) if match else None
+
+
+class MemberCache:
+    def __init__(self, max_members=None, chunk_ttl=600.0, clock=time.monotonic):
+        if max_members is not None and not GUILD_CACHE_API:
+            logging.warning(f"discord.py {discord.__version__} has no guild member cache hooks, falling back to the full member cache")
+            max_members = None
+        self.max_members = max_members
+        self.chunk_ttl = chunk_ttl
+        self.clock = clock
+        self.recent = OrderedDict()
+        self.chunked = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.queries = 0
+        self.evicted = 0
+        self.chunks = 0
+
+    def touch(self, member):
+        if self.max_members is None or not isinstance(member, discord.Member):
+            return
+        guild = member.guild
+        key = (guild.id, member.id)
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            return
+        if self.chunked:
+            self._expire()
+        if guild.id in self.chunked:
+            return
+        guild._add_member(member)
+        self.recent[key] = guild
+        while len(self.recent) > self.max_members:
+            (guild_id, member_id), guild = self.recent.popitem(last=False)
+            if guild_id not in self.chunked and member_id != guild._state.self_id:
+                guild._remove_member(discord.Object(member_id))
+                self.evicted += 1
+
+    def get(self, guild, member_id):
+        member = guild.get_member(member_id)
+        if member is not None:
+            self.hits += 1
+            self.touch(member)
+        return member
+
+    async def fetch(self, guild, member_id):
+        member = self.get(guild, member_id)
+        if member is None:
+            self.misses += 1
+            member = await guild.fetch_member(member_id)
+            self.fetched += 1
+            self.touch(member)
+        return member
+
+    async def resolve(self, guild, member_ids):
+        found = {}
+        missing = []
+        for member_id in member_ids:
+            member = self.get(guild, member_id)
+            if member is None:
+                missing.append(member_id)
+            else:
+                found[member_id] = member
+        self.misses += len(missing)
+        for offset in range(0, len(missing), QUERY_BATCH):
+            self.queries += 1
+            for member in await guild.query_members(user_ids=missing[offset:offset + QUERY_BATCH], limit=QUERY_BATCH, cache=False):
+                self.touch(member)
+                found[member.id] = member
+        return [found[member_id] for member_id in member_ids if member_id in found]
+
+    def _expire(self):
+        now = self.clock()
+        for guild_id, (until, guild) in list(self.chunked.items()):
+            if until > now:
+                continue
+            del self.chunked[guild_id]
+            self_id = guild._state.self_id
+            for member_id in list(guild._members):
+                if member_id != self_id and (guild_id, member_id) not in self.recent:
+                    guild._remove_member(discord.Object(member_id))
+                    self.evicted += 1
+
+    def complete(self, guild):
+        return self.max_members is None or guild.chunked
+
+    async def chunk(self, guild):
+        if self.max_members is None:
+            return
+        if self.chunked:
+            self._expire()
+        if guild.id in self.chunked:
+            return
+        if not guild.chunked:
+            self.chunks += 1
+            await guild.chunk(cache=True)
+        self.chunked[guild.id] = (self.clock() + self.chunk_ttl, guild)
+
+    def metrics(self):
+        return {
+            'tracked': len(self.recent),
+            'max_members': self.max_members,
+            'chunked_guilds': len(self.chunked),
+            'hits': self.hits,
+            'misses': self.misses,
+            'fetched': self.fetched,
+            'queries': self.queries,
+            'evicted': self.evicted,
+            'chunks': self.chunks,
+        }
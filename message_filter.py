@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+BUILTIN_RULES = (
+    ('mass_mention', r'@everyone|@here'),
+    ('invite', r'(?:discord\.gg|discord\.com/invite|\.gg)/[a-zA-Z0-9]+'),
+    ('role_mention', r'<@&\d+>'),
+)
+MAX_PATTERN_LENGTH = 200
+
+
+def _first_chars(items):
+    if not items:
+        return None
+    op, av = items[0]
+    if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return _first_chars(items[1:])
+    if op is sre_constants.LITERAL:
+        return {chr(av)}
+    if op is sre_constants.IN:
+        chars = set()
+        for item_op, item_av in av:
+            if item_op is sre_constants.LITERAL:
+                chars.add(chr(item_av))
+            elif item_op is sre_constants.RANGE and item_av[1] - item_av[0] < 64:
+                chars.update(chr(code) for code in range(item_av[0], item_av[1] + 1))
+            else:
+                return None
+        return chars
+    if op is sre_constants.SUBPATTERN:
+        return _first_chars(av[-1])
+    if op is sre_constants.BRANCH:
+        chars = set()
+        for branch in av[1]:
+            branch_chars = _first_chars(branch)
+            if branch_chars is None:
+                return None
+            chars |= branch_chars
+        return chars
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+        return _first_chars(av[2])
+    return None
+
+
+def leading_chars(pattern):
+    try:
+        chars = _first_chars(sre_parse.parse(pattern).data)
+    except (re.error, TypeError, ValueError):
+        return None
+    if chars is None:
+        return None
+    return chars | {char.swapcase() for char in chars}
+
+
+def normalize_term(term):
+    return ' '.join(term.lower().split())
+
+
+def _has_group_ref(node):
+    if isinstance(node, sre_parse.SubPattern):
+        node = node.data
+    if isinstance(node, (list, tuple)):
+        if node and (node[0] is sre_constants.GROUPREF or node[0] is sre_constants.GROUPREF_EXISTS):
+            return True
+        return any(_has_group_ref(item) for item in node)
+    return False
+
+
+def _nested_repeat(items, repeated=False):
+    for op, av in items:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            unbounded = av[1] == sre_constants.MAXREPEAT
+            if unbounded and repeated:
+                return True
+            if _nested_repeat(av[2], repeated or unbounded):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _nested_repeat(av[-1], repeated):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_nested_repeat(branch, repeated) for branch in av[1]):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _nested_repeat(av[1], repeated):
+                return True
+    return False
+
+
+def validate_pattern(pattern):
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f"Patterns can be at most {MAX_PATTERN_LENGTH} characters."
+    if '(?P' in pattern:
+        return "Named groups are not allowed in blocklist patterns."
+    try:
+        parsed = sre_parse.parse(pattern)
+        if parsed.state.flags & ~sre_constants.SRE_FLAG_UNICODE:
+            return "Inline flags must be scoped to a group, e.g. `(?x:...)`. Patterns are always case-insensitive."
+        if _has_group_ref(parsed):
+            return "Backreferences are not allowed in blocklist patterns."
+        if _nested_repeat(parsed.data):
+            return "Nested unbounded repeats such as `(a+)+` are not allowed in blocklist patterns."
+        re.compile(f"(?=x)(?:(?P<r0>x)|(?P<r1>{pattern}))", re.IGNORECASE)
+        compiled = re.compile(pattern, re.IGNORECASE)
+    except re.error as error:
+        return f"Invalid pattern: {error}"
+    if compiled.match(''):
+        return "Patterns must not match an empty message."
+    return None
+
+
+def _trie_pattern(node):
+    branches = [('\\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if '' in node:
+        return f"(?:{body})?"
+    return body
+
+
+def literal_trie_pattern(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return f"(?<!\\w)(?-i:{_trie_pattern(trie)})(?!\\w)"
+
+
+def _lead_class(chars):
+    return f"[{''.join(re.escape(char) for char in sorted(chars))}]"
+
+
+def compile_rules(rules):
+    names = []
+    groups = {}
+    lead = set()
+    for name, pattern in rules:
+        chars = leading_chars(pattern)
+        groups.setdefault(frozenset(chars) if chars else None, []).append(f"(?P<r{len(names)}>{pattern})")
+        names.append(name)
+        if lead is not None:
+            lead = lead | chars if chars is not None else None
+    if not names:
+        return None, names
+    parts = []
+    for chars, group in groups.items():
+        body = '|'.join(group)
+        if chars and len(groups) > 1:
+            body = f"(?={_lead_class(chars)})(?:{body})"
+        parts.append(body)
+    combined = '|'.join(parts)
+    if lead:
+        combined = f"(?={_lead_class(lead)})(?:{combined})"
+    return re.compile(combined, re.IGNORECASE), names
+
+
+class FilterEngine:
+    def __init__(self, rules=BUILTIN_RULES):
+        self.rules = list(rules)
+        self.guild_rules = {}
+        self.guild_terms = {}
+        self.guild_patterns = {}
+        self._default = compile_rules(self.rules)
+        self._versions = {}
+        self._groups = {}
+        self._compiled = {}
+        self._stale = set()
+        self._refreshing = {}
+        self.rebuilds = 0
+
+    def _changed(self, guild_id, group):
+        key = (guild_id, group)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._stale.add(guild_id)
+        self._schedule(guild_id, rebuild=False)
+
+    def set_guild_rules(self, guild_id, rules):
+        if rules:
+            self.guild_rules[guild_id] = list(rules)
+        else:
+            self.guild_rules.pop(guild_id, None)
+        self._changed(guild_id, 'rules')
+
+    def add_term(self, guild_id, term):
+        self.guild_terms.setdefault(guild_id, set()).add(normalize_term(term))
+        self._changed(guild_id, 'terms')
+
+    def remove_term(self, guild_id, term):
+        term = normalize_term(term)
+        if term not in self.guild_terms.get(guild_id, ()):
+            return False
+        self.guild_terms[guild_id].discard(term)
+        self._changed(guild_id, 'terms')
+        return True
+
+    def add_pattern(self, guild_id, pattern):
+        self.guild_patterns.setdefault(guild_id, set()).add(pattern)
+        self._changed(guild_id, 'patterns')
+
+    def remove_pattern(self, guild_id, pattern):
+        if pattern not in self.guild_patterns.get(guild_id, ()):
+            return False
+        self.guild_patterns[guild_id].discard(pattern)
+        self._changed(guild_id, 'patterns')
+        return True
+
+    def blocklist_size(self, guild_id):
+        return len(self.guild_terms.get(guild_id, ())) + len(self.guild_patterns.get(guild_id, ()))
+
+    def _group(self, guild_id, rules):
+        valid = []
+        for name, pattern in rules:
+            error = validate_pattern(pattern) if name != 'blocked_term' else None
+            if error:
+                logging.warning(f"Skipping {name} rule {pattern!r} in guild {guild_id}: {error}")
+            else:
+                valid.append((name, pattern))
+        try:
+            return compile_rules(valid)
+        except re.error:
+            logging.exception(f"Failed to compile filter rules for guild {guild_id}")
+            return None, []
+
+    def _snapshot(self, guild_id):
+        groups = self._groups.get(guild_id, {})
+        snapshot = {}
+        for group, source in (('rules', self.guild_rules), ('terms', self.guild_terms), ('patterns', self.guild_patterns)):
+            version = self._versions.get((guild_id, group), 0)
+            if group not in groups or groups[group][0] != version:
+                snapshot[group] = (version, tuple(sorted(source.get(guild_id, ()))) if group != 'rules' else tuple(source.get(guild_id, ())))
+        return snapshot
+
+    def _build(self, guild_id, snapshot):
+        built = {}
+        for group, (version, items) in snapshot.items():
+            if group == 'rules':
+                by_name = {}
+                for name, pattern in items:
+                    by_name.setdefault(name, []).append((name, pattern))
+                compiled = [self._group(guild_id, rules) for rules in by_name.values()]
+            elif group == 'terms':
+                compiled = [compile_rules([('blocked_term', literal_trie_pattern(items))])] if items else []
+            else:
+                compiled = [self._group(guild_id, [('blocked_pattern', pattern) for pattern in items])] if items else []
+            built[group] = (version, compiled)
+        return built
+
+    def _install(self, guild_id, built):
+        groups = self._groups.setdefault(guild_id, {})
+        for group, (version, compiled) in built.items():
+            if self._versions.get((guild_id, group), 0) == version:
+                groups[group] = (version, compiled)
+        self.rebuilds += 1
+        compiled = [matcher for group in ('rules', 'terms', 'patterns') for matcher in groups.get(group, (0, []))[1]]
+        if compiled:
+            self._compiled[guild_id] = [self._default] + compiled
+        else:
+            self._compiled.pop(guild_id, None)
+        if not self._snapshot(guild_id):
+            self._stale.discard(guild_id)
+
+    def rebuild(self, guild_id):
+        self._install(guild_id, self._build(guild_id, self._snapshot(guild_id)))
+
+    async def refresh(self, guild_id):
+        try:
+            while guild_id in self._stale:
+                snapshot = self._snapshot(guild_id)
+                self._install(guild_id, await asyncio.to_thread(self._build, guild_id, snapshot))
+        except Exception:
+            logging.exception(f"Failed to rebuild the message filter for guild {guild_id}")
+        finally:
+            self._refreshing.pop(guild_id, None)
+
+    def _schedule(self, guild_id, rebuild=True):
+        if guild_id in self._refreshing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if rebuild:
+                self.rebuild(guild_id)
+            return
+        self._refreshing[guild_id] = loop.create_task(self.refresh(guild_id))
+
+    async def ready(self, guild_id):
+        if guild_id in self._compiled or guild_id not in self._stale:
+            return
+        self._schedule(guild_id)
+        task = self._refreshing.get(guild_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    def matcher(self, guild_id):
+        if guild_id in self._stale:
+            self._schedule(guild_id)
+        return self._compiled.get(guild_id) or [self._default]
+
+    def scan(self, guild_id, content):
+        hits = {}
+        content = content.lower()
+        for pattern, names in self.matcher(guild_id):
+            if pattern is None:
+                continue
+            first = pattern.search(content)
+            if first is None:
+                continue
+            for match in pattern.finditer(content, first.start()):
+                name = names[int(match.lastgroup[1:])]
+                hits[name] = hits.get(name, 0) + 1
+        return hits
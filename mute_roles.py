@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import logging
+import time
+
+import discord
+
+from action_queue import PRIORITY_MODERATE
+
+
+class MuteRoleProvisioner:
+    def __init__(self, queue, name='Muted'):
+        self.queue = queue
+        self.name = name
+        self.role_ids = {}
+        self.provisioned = set()
+        self.retry = {}
+        self._creating = {}
+        self._tasks = {}
+        self.created = 0
+        self.skipped = 0
+        self.applied = 0
+        self.synced = 0
+        self.failures = 0
+        self.last_duration = None
+
+    def get(self, guild):
+        role_id = self.role_ids.get(guild.id)
+        role = guild.get_role(role_id) if role_id is not None else None
+        if role is None:
+            role = discord.utils.get(guild.roles, name=self.name)
+            if role is None:
+                self.role_ids.pop(guild.id, None)
+                return None
+            self.role_ids[guild.id] = role.id
+        return role
+
+    async def resolve(self, guild, priority=PRIORITY_MODERATE):
+        role = self.get(guild)
+        created = role is None
+        if created:
+            creating = self._creating.get(guild.id)
+            if creating is None:
+                creating = self._creating[guild.id] = asyncio.ensure_future(guild.create_role(name=self.name, reason="Mute role for PeteZahBot"))
+                creating.add_done_callback(lambda _: self._creating.pop(guild.id, None))
+                self.created += 1
+            role = await asyncio.shield(creating)
+            self.role_ids[guild.id] = role.id
+        if role.id not in self.provisioned and guild.id not in self._tasks:
+            task = self._tasks[guild.id] = asyncio.create_task(self.provision(guild, role, priority, self.retry.get(role.id)))
+            task.add_done_callback(lambda _: self._tasks.pop(guild.id, None))
+        if created and guild.id in self._tasks:
+            await asyncio.shield(self._tasks[guild.id])
+        return role
+
+    def plan(self, guild, role, only=None):
+        categories = []
+        channels = []
+        skipped = 0
+        for channel in guild.channels:
+            if only is not None and channel.id not in only:
+                continue
+            if channel.overwrites_for(role).send_messages is False:
+                skipped += 1
+            elif isinstance(channel, discord.CategoryChannel):
+                categories.append(channel)
+            else:
+                channels.append(channel)
+        return categories, channels, skipped
+
+    def _overwrite(self, channel, role, priority):
+        overwrite = channel.overwrites_for(role)
+        overwrite.send_messages = False
+        return self.queue.submit(f"PUT /channels/{channel.id}/permissions", functools.partial(channel.set_permissions, role, overwrite=overwrite, reason="Mute role setup"), priority, key=('overwrite', channel.id, role.id))
+
+    def _sync(self, channel, role, priority):
+        overwrites = channel.category.overwrites
+        overwrite = discord.PermissionOverwrite(**dict(overwrites.get(role, discord.PermissionOverwrite())))
+        overwrite.send_messages = False
+        overwrites[role] = overwrite
+        return self.queue.submit(f"PATCH /channels/{channel.id}", functools.partial(channel.edit, overwrites=overwrites, reason="Mute role setup"), priority, key=('overwrite', channel.id, role.id))
+
+    def _count(self, results, counter):
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        self.failures += failed
+        setattr(self, counter, getattr(self, counter) + len(results) - failed)
+
+    async def provision(self, guild, role, priority=PRIORITY_MODERATE, only=None):
+        started = time.perf_counter()
+        categories, channels, skipped = self.plan(guild, role, only)
+        self.skipped += skipped
+        category_results = await asyncio.gather(*(self._overwrite(category, role, priority) for category in categories), return_exceptions=True)
+        self._count(category_results, 'applied')
+        updated_categories = {category.id for category, result in zip(categories, category_results) if not isinstance(result, Exception)}
+        synced = [channel for channel in channels if channel.category_id in updated_categories and channel.permissions_synced]
+        unsynced = [channel for channel in channels if not (channel.category_id in updated_categories and channel.permissions_synced)]
+        results = await asyncio.gather(
+            *(self._sync(channel, role, priority) for channel in synced),
+            *(self._overwrite(channel, role, priority) for channel in unsynced),
+            return_exceptions=True,
+        )
+        self._count(results[:len(synced)], 'synced')
+        self._count(results[len(synced):], 'applied')
+        self.last_duration = time.perf_counter() - started
+        failed = {channel.id for channel, result in zip(categories + synced + unsynced, list(category_results) + results) if isinstance(result, Exception)}
+        if failed:
+            self.retry[role.id] = failed
+            logging.warning(f"Mute role setup in guild {guild.id} failed for {len(failed)} channels, retrying on next use")
+        else:
+            self.retry.pop(role.id, None)
+            self.provisioned.add(role.id)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            'roles': len(self.role_ids),
+            'created': self.created,
+            'provisioning': len(self._tasks),
+            'retrying': sum(len(channels) for channels in self.retry.values()),
+            'skipped': self.skipped,
+            'applied': self.applied,
+            'synced': self.synced,
+            'failures': self.failures,
+            'last_ms': round(self.last_duration * 1000) if self.last_duration is not None else None,
+        }
@@ -1,4 +1,5 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import os
 import aiohttp
@@ -7,10 +8,35 @@ import re
 import asyncio
 from dotenv import load_dotenv
 import urllib.parse
-from collections import deque
 import datetime
 import io
+import functools
 import logging
+from typing import Optional
+from http_pool import HttpClients
+from ai_scheduler import AIScheduler
+from ai_transport import ConversationHistory, PromptTransport
+from ai_stream import StreamingReply, StreamMetrics, iter_stream_text
+from generation_workers import GenerationWorkers, default_handoff_dir
+from response_cache import ImageCache, LRUCache, cache_key
+from state_store import StateStore
+from message_filter import FilterEngine, normalize_term, validate_pattern
+from channel_features import FEATURE_AI, FEATURE_DISABLED, FEATURE_FILTER, FEATURE_NUKE, FEATURE_PIN, FEATURE_SCAN, FEATURE_SECURITY, ChannelFeatures
+from sticky_messages import StickyEngine
+from afk import AfkIndex
+from action_queue import PRIORITY_DEFAULT, PRIORITY_LOG, PRIORITY_MODERATE, PRIORITY_PROTECT, ActionQueue
+from audit_log import AuditLogCorrelator
+from log_sink import LogSink
+from member_cache import MemberCache, parse_member_id
+from mass_moderation import MassModeration, parse_selector, select_members
+from mute_roles import MuteRoleProvisioner
+from raid_detector import RaidDetector
+from rate_windows import RateWindows, parse_limits
+from reaction_roles import ReactionRoles, emoji_key
+from shard_stats import ShardStats, parse_shard_ids, parse_shard_options, shard_for
+from warnings_ledger import SCHEMA as WARNINGS_SCHEMA, WarningsLedger, parse_rules
+from welcome import WelcomeMessages
+from expiry_scheduler import EXPIRE_BAN, EXPIRE_MUTE, SCHEMA as EXPIRY_SCHEMA, ExpiryScheduler
 
 logging.basicConfig(filename='bot.log', level=logging.INFO, 
                    format='%(asctime)s:%(levelname)s:%(message)s')
@@ -22,68 +48,401 @@ intents.message_content = True
 intents.members = True
 intents.moderation = True
 intents.guilds = True
-bot = commands.Bot(command_prefix='p!', intents=intents)
+
+SHARD_COUNT = os.getenv('SHARD_COUNT', '')
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS', ''))
+shard_options = parse_shard_options(SHARD_COUNT, SHARD_IDS)
+shard_stats = ShardStats(window=int(os.getenv('SHARD_STATS_WINDOW', '60')))
+
+MEMBER_CACHE_POLICY = os.getenv('MEMBER_CACHE_POLICY', 'full')
+member_options = {'chunk_guilds_at_startup': False, 'member_cache_flags': discord.MemberCacheFlags.none()} if MEMBER_CACHE_POLICY == 'lazy' else {}
+member_cache = MemberCache(max_members=int(os.getenv('MEMBER_CACHE_MAX', '10000')) if MEMBER_CACHE_POLICY == 'lazy' else None, chunk_ttl=float(os.getenv('MEMBER_CACHE_CHUNK_TTL', '600')))
+
+def owns_guild(guild_id):
+    return SHARD_IDS is None or shard_for(guild_id, bot.shard_count) in SHARD_IDS
+
+state_store = StateStore(os.getenv('STATE_DB_PATH', 'petezah_state.db'), schema=EXPIRY_SCHEMA + WARNINGS_SCHEMA)
+
+http_clients = HttpClients()
+http_clients.register('text', 'https://text.pollinations.ai', limit=int(os.getenv('AI_TEXT_POOL_SIZE', '8')))
+http_clients.register('image', 'https://image.pollinations.ai', limit=int(os.getenv('AI_IMAGE_POOL_SIZE', '4')))
+AI_STREAMING = os.getenv('AI_STREAMING', '0') == '1'
+AI_STREAM_EDIT_INTERVAL = float(os.getenv('AI_STREAM_EDIT_INTERVAL', '1.5'))
+AI_HISTORY_CHAR_BUDGET = int(os.getenv('AI_HISTORY_CHAR_BUDGET', '6000'))
+ai_transport = PromptTransport(http_clients['text'], model=os.getenv('AI_MODEL'), stream=AI_STREAMING)
+stream_metrics = StreamMetrics()
+AI_CACHE_MAX_PROMPT_CHARS = int(os.getenv('AI_CACHE_MAX_PROMPT_CHARS', '200'))
+ai_text_cache = LRUCache(max_entries=int(os.getenv('AI_CACHE_ENTRIES', '2048')), max_bytes=int(os.getenv('AI_CACHE_BYTES', str(8 * 1024 * 1024))), ttl=int(os.getenv('AI_CACHE_TTL', '600')))
+GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', '0'))
+image_cache = ImageCache(
+    LRUCache(max_entries=int(os.getenv('IMAGE_CACHE_ENTRIES', '256')), max_bytes=int(os.getenv('IMAGE_CACHE_BYTES', str(64 * 1024 * 1024))), ttl=int(os.getenv('IMAGE_CACHE_TTL', '86400'))),
+    directory=os.getenv('IMAGE_CACHE_DIR') or (os.getenv('GENERATION_HANDOFF_DIR') or default_handoff_dir() if GENERATION_WORKERS else None),
+    max_disk_bytes=int(os.getenv('IMAGE_CACHE_DISK_BYTES', str(512 * 1024 * 1024))),
+)
+generation_workers = GenerationWorkers(
+    GENERATION_WORKERS,
+    text_url=http_clients['text'].base_url,
+    image_url=http_clients['image'].base_url,
+    directory=image_cache.directory,
+    text_path=ai_transport.path,
+    concurrency=int(os.getenv('GENERATION_WORKER_CONCURRENCY', '4')),
+    timeout=float(os.getenv('GENERATION_TIMEOUT', '60')),
+) if GENERATION_WORKERS else None
+
+class PeteZahTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        load_guild_state(interaction.guild)
+        return True
+
+class CachedMember(commands.MemberConverter):
+    async def convert(self, ctx, argument):
+        try:
+            member = await super().convert(ctx, argument)
+        except commands.MemberNotFound:
+            member_id = parse_member_id(argument)
+            if member_id is None or ctx.guild is None:
+                raise
+            try:
+                member = await member_cache.fetch(ctx.guild, member_id)
+            except discord.NotFound:
+                raise commands.MemberNotFound(argument)
+        member_cache.touch(member)
+        return member
+
+class PeteZahBot(commands.AutoShardedBot if SHARD_COUNT else commands.Bot):
+    async def setup_hook(self):
+        state_store.load_guild(0)
+        reaction_roles.load(state_store, owns_guild)
+        await http_clients.start()
+        if generation_workers is not None:
+            await generation_workers.start()
+        action_queue.start()
+        nuke_windows.start()
+        ai_scheduler.start()
+        expiries.load(owns_guild)
+        expiries.start(self.wait_until_ready)
+
+    async def close(self):
+        nuke_windows.close()
+        await expiries.close()
+        await sticky_engine.close()
+        await welcomes.close()
+        await reaction_roles.close()
+        await mute_roles.close()
+        await log_sink.close()
+        await action_queue.close()
+        await ai_scheduler.close()
+        if generation_workers is not None:
+            await generation_workers.close()
+        await super().close()
+        await http_clients.close()
+        await asyncio.to_thread(state_store.close)
+
+action_queue = ActionQueue(max_concurrency=int(os.getenv('REST_MAX_CONCURRENCY', '8')))
+mute_roles = MuteRoleProvisioner(action_queue)
+reaction_roles = ReactionRoles(action_queue, window=float(os.getenv('REACTION_ROLE_BATCH_SECONDS', '1')))
+mass_moderation = MassModeration(concurrency=int(os.getenv('MASS_MODERATION_CONCURRENCY', '5')))
+MASS_MODERATION_MAX_TARGETS = int(os.getenv('MASS_MODERATION_MAX_TARGETS', '1000'))
+
+bot = PeteZahBot(command_prefix='p!', intents=intents, tree_cls=PeteZahTree, **shard_options, **member_options)
 
 active_channels = set()
 disabled_channels = set()
 blocked_mentions = [r'@everyone', r'@here']
+blocked_mentions_pattern = re.compile('|'.join(blocked_mentions), re.IGNORECASE)
+message_filter = FilterEngine()
 message_history = {}
-warnings = {}
-afk_users = {}
+afk_index = AfkIndex(channel_cooldown=float(os.getenv('AFK_NOTICE_CHANNEL_SECONDS', '10')), target_cooldown=float(os.getenv('AFK_NOTICE_TARGET_SECONDS', '60')))
 pinned_messages = {}
 locked_channels = set()
-welcome_channels = {}
 security_channels = set()
 security_servers = set()
 nuke_protection_servers = set()
+raid_protection_servers = {}
+RAID_ACTIONS = ('slowmode', 'lock', 'timeout')
+RAID_SLOWMODE_SECONDS = int(os.getenv('RAID_SLOWMODE_SECONDS', '30'))
+RAID_TIMEOUT_SECONDS = int(os.getenv('RAID_TIMEOUT_SECONDS', '3600'))
+raid_detector = RaidDetector(
+    join_limit=int(os.getenv('RAID_JOIN_LIMIT', '10')),
+    window=float(os.getenv('RAID_JOIN_WINDOW', '10')),
+    young_age=float(os.getenv('RAID_YOUNG_ACCOUNT_DAYS', '7')) * 86400,
+    young_limit=int(os.getenv('RAID_YOUNG_ACCOUNT_LIMIT', '5')),
+    fingerprint_limit=int(os.getenv('RAID_FINGERPRINT_LIMIT', '4')),
+    cooldown=float(os.getenv('RAID_COOLDOWN_SECONDS', '300')),
+)
 log_channels = {}
-user_actions = {}
-ACTION_LIMIT = 5
-ACTION_WINDOW = 60
+log_channel_cache = {}
+LOW_PRIORITY_LOG_EVENTS = {"Commands Listed", "Poll Created", "AFK Set", "AFK Removed", "Image Generated", "Invite Created", "Blocked Message Deleted"}
+ACTION_LIMIT = int(os.getenv('NUKE_ACTION_LIMIT', '5'))
+ACTION_WINDOW = float(os.getenv('NUKE_ACTION_WINDOW', '60'))
+audit_log = AuditLogCorrelator(wait=float(os.getenv('AUDIT_LOG_WAIT_SECONDS', '2')))
+nuke_windows = RateWindows(parse_limits(os.getenv('NUKE_ACTION_LIMITS', '')), default=(ACTION_LIMIT, ACTION_WINDOW))
 SUPERUSER_ID = 1311722282317779097
 
-async def generate_ai_response(message):
+def load_id_set(collection):
+    def loader(guild_id, key, value):
+        collection.add(int(key))
+    return loader
+
+def load_id_dict(collection):
+    def loader(guild_id, key, value):
+        collection[int(key)] = value
+    return loader
+
+warnings_ledger = WarningsLedger(state_store, parse_rules(os.getenv('WARN_ESCALATION', '')), max_cached=int(os.getenv('WARN_CACHED_MEMBERS', '50000')))
+WARNINGS_PAGE_SIZE = 10
+
+def load_legacy_warnings(guild_id, key, value):
+    warnings_ledger.import_legacy(guild_id, int(key), [(datetime.datetime.fromisoformat(warning["timestamp"]).timestamp(), warning["reason"]) for warning in value])
+    state_store.delete('warnings', guild_id, key)
+
+for name, collection in (('active_channels', active_channels), ('disabled_channels', disabled_channels), ('locked_channels', locked_channels), ('security_channels', security_channels), ('security_servers', security_servers), ('nuke_protection_servers', nuke_protection_servers)):
+    state_store.register(name, load_id_set(collection))
+for name, collection in (('pinned_messages', pinned_messages), ('log_channels', log_channels), ('raid_protection_servers', raid_protection_servers)):
+    state_store.register(name, load_id_dict(collection))
+state_store.register('warnings', load_legacy_warnings)
+state_store.register('afk_users', lambda guild_id, key, value: afk_index.set(guild_id, int(key), value['reason'], value['since']) if isinstance(value, dict) else afk_index.set(guild_id, int(key), value))
+state_store.register('welcome_channels', lambda guild_id, key, value: welcomes.set(guild_id, int(key), value))
+state_store.register('blocklist_terms', lambda guild_id, key, value: message_filter.add_term(guild_id, key))
+state_store.register('blocklist_patterns', lambda guild_id, key, value: message_filter.add_pattern(guild_id, key))
+
+def load_guild_state(guild):
+    if guild is not None:
+        state_store.load_guild(guild.id)
+
+def compute_channel_features(channel, guild):
+    if guild is None:
+        return 0
+    load_guild_state(guild)
+    if channel.id in disabled_channels:
+        return FEATURE_DISABLED
+    features = 0
+    if channel.id in active_channels:
+        features |= FEATURE_AI
+    if channel.id in security_channels or guild.id in security_servers:
+        features |= FEATURE_SECURITY
+    if channel.id in pinned_messages:
+        features |= FEATURE_PIN
+    if guild.id in nuke_protection_servers:
+        features |= FEATURE_NUKE
+    if message_filter.blocklist_size(guild.id) or guild.id in message_filter.guild_rules:
+        features |= FEATURE_FILTER
+    return features
+
+channel_features = ChannelFeatures(compute_channel_features)
+
+def remember_message(message):
     channel_id = message.channel.id
     if channel_id not in message_history:
-        message_history[channel_id] = deque(maxlen=7)
-    message_history[channel_id].append({"role": "user", "content": message.content})
-    prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in message_history[channel_id]])
-    encoded_prompt = urllib.parse.quote(prompt)
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://text.pollinations.ai/{encoded_prompt}', timeout=10) as response:
-            if response.status == 200:
-                response_text = await response.text()
-                for pattern in blocked_mentions:
-                    response_text = re.sub(pattern, '[REDACTED]', response_text, flags=re.IGNORECASE)
-                return response_text[:2000] if len(response_text) > 2000 else response_text
-            return f"API error: Status {response.status}"
-        return "Error connecting to AI service."
+        message_history[channel_id] = ConversationHistory(AI_HISTORY_CHAR_BUDGET)
+    message_history[channel_id].append("user", message.content)
+
+def ai_cache_key(history):
+    if history.chars > AI_CACHE_MAX_PROMPT_CHARS:
+        return None
+    return cache_key(ai_transport.model, *(f"{msg['role']}: {msg['content']}" for msg in history))
+
+async def generate_ai_response(channel_id):
+    key = ai_cache_key(message_history[channel_id])
+    cached = ai_text_cache.get(key) if key else None
+    if cached is not None:
+        return cached
+    if generation_workers is not None:
+        status, response_text = await generation_workers.run('text', ai_transport.prepare(channel_id, message_history[channel_id]).decode('utf-8'))
+    else:
+        async with ai_transport.request(channel_id, message_history[channel_id]) as response:
+            status, response_text = response.status, await response.text() if response.status == 200 else None
+    if status == 200:
+        response_text = redact_mentions(response_text)
+        response_text = response_text[:2000] if len(response_text) > 2000 else response_text
+        if key:
+            ai_text_cache.set(key, response_text, len(response_text))
+        return response_text
+    return f"API error: Status {status}"
+
+def redact_mentions(text):
+    return blocked_mentions_pattern.sub('[REDACTED]', text)
+
+async def stream_ai_response(channel_id, channel):
+    reply = StreamingReply(channel, edit_interval=AI_STREAM_EDIT_INTERVAL, redact=redact_mentions)
+    key = ai_cache_key(message_history[channel_id])
+    cached = ai_text_cache.get(key) if key else None
+    if cached is not None:
+        await reply.feed(cached)
+        return await reply.finish()
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=http_clients['text'].timeout)
+    async with ai_transport.request(channel_id, message_history[channel_id], timeout=timeout) as response:
+        if response.status != 200:
+            error = f"API error: Status {response.status}"
+            await channel.send(error)
+            return error
+        async for text in iter_stream_text(response):
+            await reply.feed(text)
+    response_text = await reply.finish()
+    stream_metrics.record(reply)
+    if key and response_text:
+        ai_text_cache.set(key, response_text, len(response_text))
+    return response_text
+
+async def respond_in_channel(message, batched):
+    channel_id = message.channel.id
+    if channel_id not in active_channels:
+        return
+    if AI_STREAMING:
+        ai_response = await stream_ai_response(channel_id, message.channel)
+    else:
+        ai_response = await generate_ai_response(channel_id)
+        await message.channel.send(ai_response)
+    message_history[channel_id].append("assistant", ai_response)
+    if channel_id in pinned_messages:
+        sticky_engine.touch(message.channel)
+
+async def delete_sticky(channel):
+    last_message_id = pinned_messages[channel.id].get('last_message_id')
+    if not last_message_id:
+        return 0
+    try:
+        await channel.get_partial_message(last_message_id).delete()
+    except discord.NotFound:
+        pass
+    return 1
+
+async def repost_sticky(channel):
+    if channel.id not in pinned_messages:
+        return 0
+    calls = await delete_sticky(channel)
+    sticky = pinned_messages.get(channel.id)
+    if sticky is None:
+        return calls
+    new_message = await channel.send(sticky['content'])
+    sticky['last_message_id'] = new_message.id
+    state_store.put('pinned_messages', channel.guild.id, channel.id, sticky)
+    return calls + 1
+
+sticky_engine = StickyEngine(
+    repost_sticky,
+    quiet_window=float(os.getenv('STICKY_QUIET_SECONDS', '5')),
+    max_delay=float(os.getenv('STICKY_MAX_DELAY_SECONDS', '30')),
+)
+
+ai_scheduler = AIScheduler(
+    respond_in_channel,
+    base_delay=float(os.getenv('AI_DEBOUNCE_SECONDS', '1')),
+    max_delay=float(os.getenv('AI_DEBOUNCE_MAX_SECONDS', '4')),
+    max_concurrency=int(os.getenv('AI_MAX_CONCURRENCY', '4')),
+)
 
 async def generate_image(prompt):
+    key = cache_key('image', prompt)
+    cached = image_cache.get(key)
+    if cached is not None:
+        return cached
+    if generation_workers is not None:
+        status, path, size = await generation_workers.run('image', prompt, f"{key}.png")
+        return await image_cache.adopt(key, size) if status == 200 else None
     encoded_prompt = urllib.parse.quote(prompt)
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://image.pollinations.ai/prompt/{encoded_prompt}', timeout=10) as response:
-            if response.status == 200:
-                return io.BytesIO(await response.read())
-            return None
-
-async def notify_user(member, action, reason=None, duration=None):
+    async with http_clients['image'].request('GET', f'/prompt/{encoded_prompt}') as response:
+        if response.status == 200:
+            image_bytes = await response.read()
+            await image_cache.set(key, image_bytes)
+            return io.BytesIO(image_bytes)
+        return None
+
+async def notify_user(member, action, reason=None, duration=None, guild=None):
     embed = discord.Embed(title=f"You have been {action}", color=discord.Color.red())
-    embed.add_field(name="Server", value=member.guild.name, inline=False)
+    embed.add_field(name="Server", value=(guild or member.guild).name, inline=False)
     if reason:
         embed.add_field(name="Reason", value=reason, inline=False)
     if duration:
         embed.add_field(name="Duration", value=duration, inline=False)
     embed.set_footer(text=f"Action taken at {datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}")
-    await member.send(embed=embed)
+    await action_queue.submit(f"POST /users/{member.id}/dm", lambda: member.send(embed=embed), PRIORITY_DEFAULT, key=('notify', member.id, action, reason, duration))
     return True
 
+def get_log_channel(guild):
+    channel_id = log_channels.get(guild.id)
+    if channel_id is None:
+        return None
+    channel = log_channel_cache.get(guild.id)
+    if channel is None or channel.id != channel_id:
+        channel = guild.get_channel(channel_id)
+        if channel is not None:
+            log_channel_cache[guild.id] = channel
+    return channel
+
+def summarize_log_events(suppressed):
+    details = '\n'.join(f"{event}: {count}" for event, count in suppressed.most_common(20))
+    return discord.Embed(title="Log Events Suppressed", description=f"{sum(suppressed.values())} events were summarized because the log channel was busy.\n{details}", color=discord.Color.dark_grey(), timestamp=datetime.datetime.now(datetime.timezone.utc))
+
+async def send_log_embeds(channel, embeds):
+    await action_queue.submit(f"POST /channels/{channel.id}/messages", lambda: channel.send(embeds=embeds), PRIORITY_LOG)
+
+log_sink = LogSink(
+    send_log_embeds,
+    summarize_log_events,
+    window=float(os.getenv('LOG_BATCH_SECONDS', '2')),
+    max_pending=int(os.getenv('LOG_MAX_PENDING', '50')),
+)
+
+async def send_welcome(channel, content):
+    await action_queue.submit(f"POST /channels/{channel.id}/messages", lambda: channel.send(content), PRIORITY_DEFAULT)
+
+welcomes = WelcomeMessages(
+    send_welcome,
+    window=float(os.getenv('WELCOME_BATCH_SECONDS', '2')),
+    max_members=int(os.getenv('WELCOME_BATCH_MAX_MEMBERS', '20')),
+)
+
 async def log_event(guild, event, details):
-    if guild.id in log_channels:
-        channel = guild.get_channel(log_channels[guild.id])
-        if channel:
-            embed = discord.Embed(title=event, description=details, color=discord.Color.red(), timestamp=datetime.datetime.now(datetime.timezone.utc))
-            await channel.send(embed=embed)
+    channel = get_log_channel(guild)
+    if channel:
+        embed = discord.Embed(title=event, description=details, color=discord.Color.red(), timestamp=datetime.datetime.now(datetime.timezone.utc))
+        log_sink.emit(channel, embed, event in LOW_PRIORITY_LOG_EVENTS)
+
+async def expire_punishment(guild_id, user_id, kind):
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        return
+    load_guild_state(guild)
+    if kind == EXPIRE_BAN:
+        try:
+            await guild.unban(discord.Object(user_id), reason="Temporary ban duration expired")
+        except discord.NotFound:
+            return
+        except discord.Forbidden:
+            logging.warning(f"Missing permission to lift the expired ban of user {user_id} in guild {guild_id}")
+            return
+        try:
+            user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        except discord.NotFound:
+            await log_event(guild, "User Unbanned", f"<@{user_id}> unbanned automatically after their temporary ban expired")
+            return
+        try:
+            await notify_user(user, "unbanned", "Temporary ban duration expired", guild=guild)
+        except discord.HTTPException:
+            pass
+        await log_event(guild, "User Unbanned", f"{user.mention} unbanned automatically after their temporary ban expired")
+    elif kind == EXPIRE_MUTE:
+        mute_role = mute_roles.get(guild)
+        try:
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return
+        if mute_role and mute_role in member.roles:
+            try:
+                await member.remove_roles(mute_role, reason="Temporary mute duration expired")
+            except discord.NotFound:
+                return
+            except discord.Forbidden:
+                logging.warning(f"Missing permission to lift the expired mute of user {user_id} in guild {guild_id}")
+                return
+            try:
+                await notify_user(member, "unmuted", "Temporary mute duration expired")
+            except discord.HTTPException:
+                pass
+            await log_event(guild, "User Unmuted", f"{member.mention} unmuted automatically after their temporary mute expired")
+
+expiries = ExpiryScheduler(state_store, expire_punishment, batch_size=int(os.getenv('EXPIRY_BATCH_SIZE', '10')), batch_interval=float(os.getenv('EXPIRY_BATCH_INTERVAL', '1')), max_attempts=int(os.getenv('EXPIRY_MAX_ATTEMPTS', '8')))
 
 def parse_duration(duration_str):
     if not duration_str:
@@ -101,127 +460,234 @@ def parse_duration(duration_str):
     seconds = amount * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[unit]
     return seconds, f"{amount} {unit_name}"
 
+def format_duration(seconds):
+    for unit_name, size in (('days', 86400), ('hours', 3600), ('minutes', 60)):
+        if seconds % size == 0:
+            return f"{seconds // size} {unit_name}"
+    return f"{seconds} seconds"
+
 async def check_nuke_protection(guild, user, action_type):
-    if guild.id not in nuke_protection_servers or user.id == SUPERUSER_ID or user == guild.owner:
+    if guild.id not in nuke_protection_servers or user.id == SUPERUSER_ID or user.id == guild.owner_id:
         return False
-    if user.id not in user_actions:
-        user_actions[user.id] = {}
-    if action_type not in user_actions[user.id]:
-        user_actions[user.id][action_type] = deque(maxlen=ACTION_LIMIT)
-    user_actions[user.id][action_type].append(datetime.datetime.now(datetime.timezone.utc))
-    if len(user_actions[user.id][action_type]) == ACTION_LIMIT:
-        times = list(user_actions[user.id][action_type])
-        if (times[-1] - times[0]).total_seconds() <= ACTION_WINDOW:
-            mute_role = discord.utils.get(guild.roles, name="Muted")
-            if not mute_role:
-                mute_role = await guild.create_role(name="Muted")
-                for channel in guild.channels:
-                    await channel.set_permissions(mute_role, send_messages=False)
-            await user.add_roles(mute_role, reason=f"Nuke protection: Excessive {action_type}")
-            await notify_user(user, "quarantined", f"Excessive {action_type} detected")
-            await log_event(guild, "Nuke Protection Triggered", f"User {user.mention} quarantined for excessive {action_type}")
-            return True
-    return False
+    if not nuke_windows.hit(guild.id, user.id, action_type):
+        return False
+    mute_role = await mute_roles.resolve(guild, PRIORITY_PROTECT)
+    await action_queue.submit(f"PUT /guilds/{guild.id}/members/roles", lambda: user.add_roles(mute_role, reason=f"Nuke protection: Excessive {action_type}"), PRIORITY_PROTECT, key=('quarantine', guild.id, user.id))
+    await notify_user(user, "quarantined", f"Excessive {action_type} detected")
+    await log_event(guild, "Nuke Protection Triggered", f"User {user.mention} quarantined for excessive {action_type}")
+    return True
 
 @bot.event
 async def on_ready():
-    synced = await bot.tree.sync()
+    if SHARD_IDS is None or 0 in SHARD_IDS:
+        await bot.tree.sync()
     await bot.change_presence(activity=discord.Game(name="PeteZahBot | p!help"))
+    reaction_roles.start_resync(bot)
+
+def record_event(guild_id):
+    shard_stats.record(shard_for(guild_id, bot.shard_count))
+
+def shard_latencies():
+    return bot.latencies if SHARD_COUNT else [(0, bot.latency)]
+
+@bot.event
+async def on_shard_connect(shard_id):
+    shard_stats.connection(shard_id, 'connects')
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    shard_stats.connection(shard_id, 'disconnects')
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    shard_stats.connection(shard_id, 'resumes')
+
+async def handle_reaction_role(payload, add):
+    record_event(payload.guild_id)
+    if payload.guild_id is None or payload.user_id == bot.user.id:
+        return
+    role_id = reaction_roles.lookup(payload.message_id, payload.emoji)
+    if role_id is None or (payload.member is not None and payload.member.bot):
+        return
+    guild = bot.get_guild(payload.guild_id)
+    if guild is not None:
+        reaction_roles.change(guild, payload.user_id, role_id, add)
+
+@bot.event
+async def on_raw_reaction_add(payload):
+    await handle_reaction_role(payload, True)
+
+@bot.event
+async def on_raw_reaction_remove(payload):
+    await handle_reaction_role(payload, False)
+
+@bot.event
+async def on_raw_message_delete(payload):
+    for emoji in reaction_roles.remove(payload.message_id):
+        state_store.delete('reaction_roles', payload.guild_id, f"{payload.message_id}:{emoji}")
 
 @bot.event
 async def on_message(message):
+    record_event(message.guild.id if message.guild else None)
     if message.author.bot:
-        await bot.process_commands(message)
+        return
+    member_cache.touch(message.author)
+
+    features = channel_features.get(message.channel, message.guild)
+    if features & FEATURE_DISABLED:
         return
 
-    if message.channel.id in disabled_channels:
+    if message.guild is not None and afk_index.active(message.guild.id):
+        await handle_afk(message)
+
+    if not features:
+        if message.content.startswith('p!'):
+            await bot.process_commands(message)
         return
 
-    if message.guild.id in nuke_protection_servers and message.mentions:
-        for mention in message.mentions:
-            if isinstance(mention, discord.Role):
-                if await check_nuke_protection(message.guild, message.author, "role_mentions"):
-                    return
+    if features & FEATURE_FILTER:
+        await message_filter.ready(message.guild.id)
+    hits = message_filter.scan(message.guild.id, message.content) if features & FEATURE_SCAN else {}
+
+    if features & FEATURE_NUKE and 'role_mention' in hits:
+        for _ in range(hits['role_mention']):
+            if await check_nuke_protection(message.guild, message.author, "role_mentions"):
+                return
 
-    if (message.channel.id in security_channels or message.guild.id in security_servers) and not message.author.bot:
-        invite_pattern = r'(discord\.gg|discord\.com/invite|\.gg)/[a-zA-Z0-9]+'
-        if re.search(invite_pattern, message.content, re.IGNORECASE):
+    if features & FEATURE_SECURITY:
+        if 'invite' in hits:
             await message.delete()
-            await message.author.timeout(datetime.timedelta(minutes=1), reason="Posted a Discord invite link")
+            await action_queue.submit(f"PATCH /guilds/{message.guild.id}/members", lambda: message.author.timeout(datetime.timedelta(minutes=1), reason="Posted a Discord invite link"), PRIORITY_PROTECT, key=('timeout', message.guild.id, message.author.id))
             await notify_user(message.author, "timed out", "Posted a Discord invite link", "1 minute")
             await message.channel.send(f"{message.author.mention} has been timed out for 1 minute for posting a Discord invite link.", delete_after=5)
 
-    if message.channel.id not in active_channels:
-        if message.channel.id in pinned_messages and not message.content.startswith('p!'):
-            last_message_id = pinned_messages[message.channel.id].get('last_message_id')
-            if last_message_id:
-                try:
-                    last_message = await message.channel.fetch_message(last_message_id)
-                    await last_message.delete()
-                except discord.NotFound:
-                    pass
-            new_message = await message.channel.send(pinned_messages[message.channel.id]['content'])
-            pinned_messages[message.channel.id]['last_message_id'] = new_message.id
-        await bot.process_commands(message)
-        return
-
-    for pattern in blocked_mentions:
-        if re.search(pattern, message.content, re.IGNORECASE):
+    if 'blocked_term' in hits or 'blocked_pattern' in hits:
+        try:
             await message.delete()
-            await message.channel.send(f"{message.author.mention}, please don't use mass mentions!", delete_after=5)
-            return
+        except discord.NotFound:
+            pass
+        await message.channel.send(f"{message.author.mention}, your message contained a blocked word or phrase.", delete_after=5)
+        await log_event(message.guild, "Blocked Message Deleted", f"Message by {message.author.mention} in {message.channel.mention} matched the server blocklist")
+        return
 
-    await asyncio.sleep(1)
-    ai_response = await generate_ai_response(message)
-    message_history[message.channel.id].append({"role": "assistant", "content": ai_response})
-    await message.channel.send(ai_response)
+    if not features & FEATURE_AI:
+        if features & FEATURE_PIN and not message.content.startswith('p!'):
+            sticky_engine.touch(message.channel)
+        elif message.content.startswith('p!'):
+            await bot.process_commands(message)
+        return
 
-    if message.channel.id in pinned_messages and not message.content.startswith('p!'):
-        last_message_id = pinned_messages[message.channel.id].get('last_message_id')
-        if last_message_id:
-            try:
-                last_message = await message.channel.fetch_message(last_message_id)
-                await last_message.delete()
-            except discord.NotFound:
-                pass
-        new_message = await message.channel.send(pinned_messages[message.channel.id]['content'])
-        pinned_messages[message.channel.id]['last_message_id'] = new_message.id
+    if 'mass_mention' in hits:
+        await message.delete()
+        await message.channel.send(f"{message.author.mention}, please don't use mass mentions!", delete_after=5)
+        return
 
+    remember_message(message)
+    ai_scheduler.submit(message)
     await bot.process_commands(message)
 
+async def handle_afk(message):
+    if not message.content.startswith('p!afk'):
+        scope, entry = afk_index.clear(message.guild.id, message.author.id)
+        if entry is not None:
+            state_store.delete('afk_users', scope, message.author.id)
+            await message.channel.send(f"Welcome back {message.author.mention}, your AFK status has been removed.", delete_after=10)
+    if message.mentions:
+        found = afk_index.allow_notice(message.channel.id, afk_index.mentioned(message.guild.id, message.mentions))
+        if found:
+            await message.channel.send('\n'.join(f"{member.display_name} is AFK: {reason}" + (f" (since <t:{int(since)}:R>)" if since else '') for member, reason, since in found), allowed_mentions=discord.AllowedMentions.none())
+
 @bot.event
 async def on_member_join(member):
-    for channel_id, message in welcome_channels.items():
-        channel = member.guild.get_channel(channel_id)
-        if channel:
-            await channel.send(f"Welcome {member.mention} to {member.guild.name}. {message}")
+    record_event(member.guild.id)
+    member_cache.touch(member)
+    load_guild_state(member.guild)
+    if member.guild.id in raid_protection_servers:
+        verdict = raid_detector.observe(member.guild.id, member.id, (discord.utils.utcnow() - member.created_at).total_seconds(), member.name, member.avatar.key if member.avatar else None)
+        if verdict is not None:
+            await handle_raid(member.guild, *verdict)
+            return
+    welcomes.join(member)
+
+async def handle_raid(guild, started, reasons, member_ids):
+    actions = raid_protection_servers.get(guild.id, [])
+    pending = []
+    if 'timeout' in actions:
+        duration = datetime.timedelta(seconds=RAID_TIMEOUT_SECONDS)
+        for member in filter(None, map(guild.get_member, member_ids)):
+            pending.append(action_queue.submit(f"PATCH /guilds/{guild.id}/members", functools.partial(member.timeout, duration, reason="Raid protection"), PRIORITY_PROTECT, key=('timeout', guild.id, member.id)))
+    if started and 'slowmode' in actions:
+        for channel in guild.text_channels:
+            if channel.slowmode_delay < RAID_SLOWMODE_SECONDS:
+                pending.append(action_queue.submit(f"PATCH /channels/{channel.id}", functools.partial(channel.edit, slowmode_delay=RAID_SLOWMODE_SECONDS, reason="Raid protection"), PRIORITY_PROTECT, key=('slowmode', channel.id)))
+    if started and 'lock' in actions:
+        for channel in guild.text_channels:
+            if channel.id in locked_channels:
+                continue
+            locked_channels.add(channel.id)
+            state_store.put('locked_channels', guild.id, channel.id)
+            overwrite = channel.overwrites_for(guild.default_role)
+            overwrite.send_messages = False
+            pending.append(action_queue.submit(f"PUT /channels/{channel.id}/permissions", functools.partial(channel.set_permissions, guild.default_role, overwrite=overwrite, reason="Raid protection"), PRIORITY_PROTECT, key=('lock', channel.id)))
+    if started:
+        await log_event(guild, "Raid Detected", f"{len(member_ids)} recent joins flagged ({', '.join(reasons)}). Actions: {', '.join(actions) or 'None'}")
+    results = await asyncio.gather(*pending, return_exceptions=True)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    if failed:
+        logging.warning(f"Raid protection in guild {guild.id}: {failed} of {len(results)} actions failed")
+
+async def resolve_actor(guild, action, target_id):
+    actor_id = await audit_log.resolve(guild, action, target_id)
+    if actor_id is None or actor_id == bot.user.id:
+        return None
+    try:
+        return await member_cache.fetch(guild, actor_id)
+    except discord.NotFound:
+        return None
+
+@bot.event
+async def on_audit_log_entry_create(entry):
+    audit_log.record_entry(entry)
 
 @bot.event
 async def on_guild_channel_create(channel):
+    load_guild_state(channel.guild)
     if channel.guild.id in nuke_protection_servers:
-        if await check_nuke_protection(channel.guild, channel.guild.get_member(channel.guild.owner_id), "channel_creations"):
+        actor = await resolve_actor(channel.guild, discord.AuditLogAction.channel_create, channel.id)
+        if actor and await check_nuke_protection(channel.guild, actor, "channel_creations"):
             await channel.delete(reason="Nuke protection: Excessive channel creation")
 
 @bot.event
 async def on_guild_channel_delete(channel):
+    load_guild_state(channel.guild)
+    if log_channels.get(channel.guild.id) == channel.id:
+        log_channel_cache.pop(channel.guild.id, None)
+    if welcomes.remove(channel.guild.id, channel.id):
+        state_store.delete('welcome_channels', channel.guild.id, channel.id)
     if channel.guild.id in nuke_protection_servers:
-        if await check_nuke_protection(channel.guild, channel.guild.get_member(channel.guild.owner_id), "channel_deletions"):
-            pass
+        actor = await resolve_actor(channel.guild, discord.AuditLogAction.channel_delete, channel.id)
+        if actor:
+            await check_nuke_protection(channel.guild, actor, "channel_deletions")
 
 @bot.event
 async def on_member_ban(guild, user):
+    load_guild_state(guild)
     if guild.id in nuke_protection_servers:
-        async for entry in guild.audit_logs(action=discord.AuditLogAction.ban, limit=1):
-            if await check_nuke_protection(guild, entry.user, "bans"):
-                await guild.unban(user, reason="Nuke protection: Excessive bans")
+        actor = await resolve_actor(guild, discord.AuditLogAction.ban, user.id)
+        if actor and await check_nuke_protection(guild, actor, "bans"):
+            await guild.unban(user, reason="Nuke protection: Excessive bans")
 
 @bot.event
-async def on_member_remove(member):
-    if member.guild.id in nuke_protection_servers:
-        async for entry in member.guild.audit_logs(action=discord.AuditLogAction.kick, limit=1):
-            if entry.target == member:
-                if await check_nuke_protection(member.guild, entry.user, "kicks"):
-                    pass
+async def on_raw_member_remove(payload):
+    record_event(payload.guild_id)
+    guild = bot.get_guild(payload.guild_id)
+    if guild is None:
+        return
+    load_guild_state(guild)
+    if guild.id in nuke_protection_servers:
+        actor = await resolve_actor(guild, discord.AuditLogAction.kick, payload.user.id)
+        if actor:
+            await check_nuke_protection(guild, actor, "kicks")
 
 @bot.command()
 @commands.has_permissions(administrator=True)
@@ -231,6 +697,8 @@ async def initiate(ctx):
         return
     if ctx.channel.id not in active_channels:
         active_channels.add(ctx.channel.id)
+        state_store.put('active_channels', ctx.guild.id, ctx.channel.id)
+        channel_features.invalidate(ctx.guild.id)
         await ctx.send("PeteZahBot AI is now active in this channel!")
     else:
         await ctx.send("PeteZahBot AI is already active here!")
@@ -243,6 +711,10 @@ async def stop(ctx):
         return
     if ctx.channel.id in active_channels:
         active_channels.remove(ctx.channel.id)
+        state_store.delete('active_channels', ctx.guild.id, ctx.channel.id)
+        channel_features.invalidate(ctx.guild.id)
+        ai_scheduler.discard(ctx.channel.id)
+        ai_transport.forget(ctx.channel.id)
         if ctx.channel.id in message_history:
             del message_history[ctx.channel.id]
         await ctx.send("PeteZahBot AI is now disabled in this channel!")
@@ -251,11 +723,11 @@ async def stop(ctx):
 
 @bot.command()
 @commands.has_permissions(ban_members=True)
-async def ban(ctx, member: discord.Member, duration: str = None, *, reason=None):
+async def ban(ctx, member: CachedMember, duration: str = None, *, reason=None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner:
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id:
         await ctx.send("This user is immune to bans!")
         return
     if member == ctx.author or member == ctx.guild.me:
@@ -270,10 +742,9 @@ async def ban(ctx, member: discord.Member, duration: str = None, *, reason=None)
     await ctx.send(f"{member.mention} has been banned{' and DM\'d' if notified else ''}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}")
     await log_event(ctx.guild, "User Banned", f"{member.mention} banned by {ctx.author.mention}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}")
     if duration_seconds:
-        await asyncio.sleep(duration_seconds)
-        await ctx.guild.unban(member, reason="Temporary ban duration expired")
-        await notify_user(member, "unbanned", "Temporary ban duration expired")
-        await log_event(ctx.guild, "User Unbanned", f"{member.mention} unbanned automatically after {duration_text}")
+        expiries.schedule(ctx.guild.id, member.id, EXPIRE_BAN, duration_seconds)
+    else:
+        expiries.cancel(ctx.guild.id, member.id, EXPIRE_BAN)
 
 @bot.command()
 @commands.has_permissions(ban_members=True)
@@ -283,16 +754,17 @@ async def unban(ctx, user_id: int, *, reason=None):
         return
     user = await bot.fetch_user(user_id)
     await ctx.guild.unban(user, reason=reason)
+    expiries.cancel(ctx.guild.id, user.id, EXPIRE_BAN)
     await ctx.send(f"{user.name}#{user.discriminator} has been unbanned. Reason: {reason or 'None'}")
     await log_event(ctx.guild, "User Unbanned", f"{user.name}#{user.discriminator} unbanned by {ctx.author.mention}. Reason: {reason or 'None'}")
 
 @bot.command()
 @commands.has_permissions(kick_members=True)
-async def kick(ctx, member: discord.Member, *, reason=None):
+async def kick(ctx, member: CachedMember, *, reason=None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner:
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id:
         await ctx.send("This user is immune to kicks!")
         return
     if member == ctx.author or member == ctx.guild.me:
@@ -303,51 +775,129 @@ async def kick(ctx, member: discord.Member, *, reason=None):
     await ctx.send(f"{member.mention} has been kicked{' and DM\'d' if notified else ''}. Reason: {reason or 'None'}")
     await log_event(ctx.guild, "User Kicked", f"{member.mention} kicked by {ctx.author.mention}. Reason: {reason or 'None'}")
 
+async def resolve_mass_targets(ctx, selector):
+    kind, value, reason = parse_selector(selector)
+    if kind is None:
+        await ctx.send("Give user IDs or mentions, `joined:<duration>` (e.g., joined:10m) or `name:<regex>`.")
+        return None, None
+    if kind == 'joined':
+        seconds, error = parse_duration(value)
+        if seconds is None:
+            await ctx.send(error)
+            return None, None
+        await member_cache.chunk(ctx.guild)
+        user_ids = [member.id for member in select_members(ctx.guild.members, joined_after=discord.utils.utcnow() - datetime.timedelta(seconds=seconds))]
+    elif kind == 'name':
+        error = validate_pattern(value)
+        if error:
+            await ctx.send(error)
+            return None, None
+        await member_cache.chunk(ctx.guild)
+        user_ids = [member.id for member in select_members(ctx.guild.members, name_pattern=re.compile(value, re.IGNORECASE))]
+    else:
+        user_ids = value
+    immune = {SUPERUSER_ID, ctx.guild.owner_id, ctx.author.id, ctx.guild.me.id}
+    user_ids = [user_id for user_id in user_ids if user_id not in immune]
+    if not user_ids:
+        await ctx.send("No users matched.")
+        return None, None
+    if len(user_ids) > MASS_MODERATION_MAX_TARGETS:
+        await ctx.send(f"{len(user_ids)} users matched, the limit is {MASS_MODERATION_MAX_TARGETS}. Narrow the selection.")
+        return None, None
+    return user_ids, reason
+
+async def report_mass_action(ctx, action, succeeded, failed, reason, duration_text=None):
+    shown = ', '.join(f"<@{user_id}>" for user_id in succeeded[:50]) + (f" and {len(succeeded) - 50} more" if len(succeeded) > 50 else '')
+    await ctx.send(f"{action.capitalize()} {len(succeeded)} users{', ' + str(len(failed)) + ' failed' if failed else ''}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}")
+    await log_event(ctx.guild, f"Mass {action.title()}", f"{len(succeeded)} users {action} by {ctx.author.mention}{' (' + str(len(failed)) + ' failed)' if failed else ''}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}\n{shown or 'None'}")
+
+@bot.command()
+@commands.has_permissions(ban_members=True)
+async def massban(ctx, *, selector: str):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    user_ids, reason = await resolve_mass_targets(ctx, selector)
+    if user_ids is None:
+        return
+    banned, failed = await mass_moderation.ban(ctx.guild, user_ids, reason)
+    for user_id in banned:
+        expiries.cancel(ctx.guild.id, user_id, EXPIRE_BAN)
+    await report_mass_action(ctx, "banned", banned, failed, reason)
+
+@bot.command()
+@commands.has_permissions(kick_members=True)
+async def masskick(ctx, *, selector: str):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    user_ids, reason = await resolve_mass_targets(ctx, selector)
+    if user_ids is None:
+        return
+    members = await member_cache.resolve(ctx.guild, user_ids)
+    kicked, failed = await mass_moderation.kick(members, reason)
+    await report_mass_action(ctx, "kicked", [member.id for member in kicked], [member.id for member in failed], reason)
+
 @bot.command()
 @commands.has_permissions(moderate_members=True)
-async def mute(ctx, member: discord.Member, duration: str = None, *, reason=None):
+async def masstimeout(ctx, duration: str, *, selector: str):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner:
+    duration_seconds, duration_text = parse_duration(duration)
+    if duration_seconds is None:
+        await ctx.send(duration_text or "Give a duration (e.g., 5d, 10m, 2h, 30s).")
+        return
+    if duration_seconds > 28 * 86400:
+        await ctx.send("Timeouts can be at most 28 days.")
+        return
+    user_ids, reason = await resolve_mass_targets(ctx, selector)
+    if user_ids is None:
+        return
+    members = await member_cache.resolve(ctx.guild, user_ids)
+    timed_out, failed = await mass_moderation.timeout(members, datetime.timedelta(seconds=duration_seconds), reason)
+    await report_mass_action(ctx, "timed out", [member.id for member in timed_out], [member.id for member in failed], reason, duration_text)
+
+@bot.command()
+@commands.has_permissions(moderate_members=True)
+async def mute(ctx, member: CachedMember, duration: str = None, *, reason=None):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id:
         await ctx.send("This user is immune to mutes!")
         return
     if member == ctx.author or member == ctx.guild.me:
         await ctx.send("You can't mute yourself or the bot!")
         return
-    mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
-    if not mute_role:
-        mute_role = await ctx.guild.create_role(name="Muted")
-        for channel in ctx.guild.channels:
-            await channel.set_permissions(mute_role, send_messages=False)
     duration_seconds, duration_text = parse_duration(duration)
     if duration_seconds is None and duration_text:
         await ctx.send(duration_text)
         return
+    mute_role = await mute_roles.resolve(ctx.guild)
     notified = await notify_user(member, "muted", reason, duration_text)
-    await member.add_roles(mute_role, reason=reason)
+    await action_queue.submit(f"PUT /guilds/{ctx.guild.id}/members/roles", lambda: member.add_roles(mute_role, reason=reason), PRIORITY_MODERATE)
     await ctx.send(f"{member.mention} has been muted{' and DM\'d' if notified else ''}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}")
     await log_event(ctx.guild, "User Muted", f"{member.mention} muted by {ctx.author.mention}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason or 'None'}")
     if duration_seconds:
-        await asyncio.sleep(duration_seconds)
-        if mute_role in member.roles:
-            await member.remove_roles(mute_role, reason="Temporary mute duration expired")
-            await notify_user(member, "unmuted", "Temporary mute duration expired")
-            await log_event(ctx.guild, "User Unmuted", f"{member.mention} unmuted automatically after {duration_text}")
+        expiries.schedule(ctx.guild.id, member.id, EXPIRE_MUTE, duration_seconds)
+    else:
+        expiries.cancel(ctx.guild.id, member.id, EXPIRE_MUTE)
 
 @bot.command()
 @commands.has_permissions(moderate_members=True)
-async def unmute(ctx, member: discord.Member, *, reason=None):
+async def unmute(ctx, member: CachedMember, *, reason=None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
     if member == ctx.author or member == ctx.guild.me:
         await ctx.send("You can't unmute yourself or the bot!")
         return
-    mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
+    mute_role = mute_roles.get(ctx.guild)
     if mute_role and mute_role in member.roles:
         notified = await notify_user(member, "unmuted", reason)
         await member.remove_roles(mute_role, reason=reason)
+        expiries.cancel(ctx.guild.id, member.id, EXPIRE_MUTE)
         await ctx.send(f"{member.mention} has been unmuted{' and DM\'d' if notified else ''}. Reason: {reason or 'None'}")
         await log_event(ctx.guild, "User Unmuted", f"{member.mention} unmuted by {ctx.author.mention}. Reason: {reason or 'None'}")
     else:
@@ -376,6 +926,7 @@ async def lock(ctx, *, reason=None):
         await ctx.send("Channel is already locked!")
         return
     locked_channels.add(ctx.channel.id)
+    state_store.put('locked_channels', ctx.guild.id, ctx.channel.id)
     overwrite_default = ctx.channel.overwrites_for(ctx.guild.default_role)
     overwrite_default.send_messages = False
     overwrite_superuser = ctx.channel.overwrites_for(await bot.fetch_user(SUPERUSER_ID))
@@ -395,6 +946,7 @@ async def unlock(ctx, *, reason=None):
         await ctx.send("Channel is not locked!")
         return
     locked_channels.remove(ctx.channel.id)
+    state_store.delete('locked_channels', ctx.guild.id, ctx.channel.id)
     overwrite_default = ctx.channel.overwrites_for(ctx.guild.default_role)
     overwrite_default.send_messages = None
     overwrite_superuser = ctx.channel.overwrites_for(await bot.fetch_user(SUPERUSER_ID))
@@ -426,11 +978,97 @@ async def ping(ctx):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    latency = round(bot.latency * 1000)
-    await ctx.send(f"Pong! Latency: {latency}ms")
+    if not SHARD_COUNT:
+        latency = round(bot.latency * 1000)
+        await ctx.send(f"Pong! Latency: {latency}ms")
+        return
+    shard_id = ctx.guild.shard_id if ctx.guild else 0
+    stats = shard_stats.metrics(shard_latencies()).get(shard_id)
+    latency = stats['latency_ms'] if stats and stats['latency_ms'] is not None else round(bot.latency * 1000)
+    await ctx.send(f"Pong! Latency: {latency}ms (shard {shard_id} of {bot.shard_count}, {stats['events_per_second'] if stats else 0} events/s)")
+
+@bot.command()
+async def shards(ctx):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    guilds = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    lines = []
+    for shard_id, stats in sorted(shard_stats.metrics(shard_latencies()).items()):
+        latency = f"{stats['latency_ms']}ms" if stats['latency_ms'] is not None else "offline"
+        lines.append(f"**Shard {shard_id}**: {latency}, {guilds.get(shard_id, 0)} guilds, {stats['events_per_second']} events/s ({stats['events']} total), {stats['resumes']} resumes, {stats['disconnects']} disconnects")
+    description = ''
+    for index, line in enumerate(lines):
+        if len(description) + len(line) > 3900:
+            description += f"...and {len(lines) - index} more shards"
+            break
+        description += line + '\n'
+    embed = discord.Embed(title=f"PeteZahBot Shards ({bot.shard_count or 1} total)", description=description, color=discord.Color.blue())
+    await ctx.send(embed=embed)
+
+@bot.command()
+@commands.check(lambda ctx: ctx.author.id == SUPERUSER_ID)
+async def botstats(ctx):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    embed = discord.Embed(title="PeteZahBot Stats", color=discord.Color.blue())
+    for name, stats in http_clients.metrics().items():
+        embed.add_field(name=f"HTTP pool: {name}", value=f"Open: {stats['open']} (active {stats['active']}, idle {stats['idle']}/{stats['limit']})\nWaiting: {stats['waiting']}\nRequests: {stats['requests']}\nConnections: {stats['connections_created']} created, {stats['connections_reused']} reused", inline=False)
+    stats = ai_transport.metrics()
+    embed.add_field(name="AI transport", value=f"Requests: {stats['requests']} ({stats['payload_reuses']} reused payloads)\nBytes sent: {stats['bytes_sent']} (avg {stats['avg_bytes']})\nAvg encode: {stats['avg_encode_us']}µs", inline=False)
+    if AI_STREAMING:
+        stats = stream_metrics.metrics()
+        embed.add_field(name="AI streaming", value=f"Replies: {stats['replies']} ({stats['messages']} messages, {stats['edits']} edits)\nAvg time to first message: {stats['avg_first_message_ms']}ms", inline=False)
+    for name, stats in (("AI reply cache", ai_text_cache.metrics()), ("Image cache", image_cache.metrics())):
+        embed.add_field(name=name, value=f"Hit ratio: {stats['hit_ratio']:.1%} ({stats['hits']} hits, {stats['misses']} misses)\nEntries: {stats['entries']} ({stats['bytes'] // 1024} KiB), evictions: {stats['evictions']}", inline=False)
+    stats = ai_scheduler.metrics()
+    embed.add_field(name="AI scheduler", value=f"Messages: {stats['received']}\nUpstream calls: {stats['upstream_calls']} ({stats['coalesced']} coalesced, {stats['failures']} failed)\nQueued: {stats['queued']}, in flight: {stats['in_flight']}", inline=False)
+    if generation_workers is not None:
+        stats = generation_workers.metrics()
+        embed.add_field(name="Generation workers", value=f"Workers: {stats['alive']}/{stats['workers']} alive ({stats['restarts']} restarts), pending jobs: {stats['pending']}\nJobs: {stats['completed']} done, {stats['failed']} failed, {stats['timed_out']} timed out, {stats['cancelled']} cancelled\nQueue wait avg/max: {stats['avg_wait_ms']}/{stats['max_wait_ms']}ms, run avg: {stats['avg_run_ms']}ms", inline=False)
+    stats = expiries.metrics()
+    embed.add_field(name="Expiry scheduler", value=f"Pending: {stats['pending']}{' (next in ' + str(stats['next_due_in']) + 's)' if stats['next_due_in'] is not None else ''}\nFired: {stats['fired']}, failed: {stats['failures']} ({stats['retrying']} retrying, {stats['abandoned']} abandoned)", inline=False)
+    stats = action_queue.metrics()
+    embed.add_field(name="REST action queue", value=f"Depth: {stats['depth']} across {stats['routes']} routes ({stats['blocked_routes']} rate limited)\nExecuted: {stats['executed']} ({stats['deduplicated']} deduplicated, {stats['rate_limited']} retried after 429, {stats['failures']} failed)\nWait p50/p99: {stats['wait_p50_ms']}/{stats['wait_p99_ms']}ms", inline=False)
+    stats = mass_moderation.metrics()
+    embed.add_field(name="Mass moderation", value=f"Runs: {stats['runs']}, targets: {stats['targets']} ({stats['succeeded']} done, {stats['failed']} failed)\nBulk ban requests: {stats['bulk_requests']} ({stats['bulk_fallbacks']} fell back to per-user bans)" + (f"\nLast run: {stats['last_rate']} users/s" if stats['last_rate'] is not None else ''), inline=False)
+    stats = audit_log.metrics()
+    embed.add_field(name="Audit log correlation", value=f"Indexed: {stats['indexed']} entries ({stats['recorded']} recorded, {stats['live_guilds']} guilds streaming)\nResolved: {stats['resolved']}, unresolved: {stats['unresolved']}, polls: {stats['polls']}", inline=False)
+    stats = raid_detector.metrics()
+    embed.add_field(name="Raid detector", value=f"Joins: {stats['joins']} across {stats['guilds']} guilds, {stats['flagged']} flagged\nRaids: {stats['raids']} ({stats['raiding']} active), fingerprints tracked: {stats['fingerprints']}", inline=False)
+    stats = nuke_windows.metrics()
+    embed.add_field(name="Nuke protection windows", value=f"Tracked: {stats['tracked']} (guild, user, action) windows, {stats['evicted']} evicted\nActions: {stats['hits']}, triggered: {stats['triggered']}", inline=False)
+    stats = mute_roles.metrics()
+    embed.add_field(name="Mute roles", value=f"Cached roles: {stats['roles']} ({stats['created']} created, {stats['provisioning']} provisioning, {stats['retrying']} channels to retry)\nOverwrites: {stats['applied']} set, {stats['synced']} synced to category, {stats['skipped']} already correct, {stats['failures']} failed" + (f"\nLast setup: {stats['last_ms']}ms" if stats['last_ms'] is not None else ''), inline=False)
+    stats = warnings_ledger.metrics()
+    embed.add_field(name="Warnings ledger", value=f"Inserted: {stats['inserted']}, removed: {stats['removed']}, escalations: {stats['escalations']}\nCached members: {stats['cached_members']}, queries: {stats['queries']}", inline=False)
+    stats = afk_index.metrics()
+    embed.add_field(name="AFK", value=f"AFK users: {stats['afk_users']} in {stats['guilds']} guilds ({stats['cleared']} auto-cleared or stopped)\nMention lookups: {stats['lookups']}, notices: {stats['notices']} ({stats['suppressed']} rate limited)", inline=False)
+    stats = reaction_roles.metrics()
+    embed.add_field(name="Reaction roles", value=f"Mappings: {stats['mappings']} on {stats['messages']} messages\nReactions: {stats['reactions']} in {stats['batches']} member batches, {stats['edits']} edits ({stats['pending']} pending, {stats['resynced']} resynced, {stats['failures']} failed)", inline=False)
+    stats = welcomes.metrics()
+    embed.add_field(name="Welcome messages", value=f"Channels: {stats['channels']} in {stats['guilds']} guilds\nJoins: {stats['joins']}, welcomed {stats['welcomed']} in {stats['messages']} messages ({stats['pending']} pending, {stats['failures']} failed)", inline=False)
+    stats = log_sink.metrics()
+    embed.add_field(name="Log sink", value=f"Events: {stats['emitted']} in {stats['messages']} messages ({stats['buffered']} buffered)\nSuppressed: {stats['suppressed']}, failed sends: {stats['failures']}", inline=False)
+    stats = sticky_engine.metrics()
+    embed.add_field(name="Sticky messages", value=f"Triggers: {stats['triggers']}, reposts: {stats['reposts']} ({stats['pending']} pending, {stats['failures']} failed)\nREST calls: {stats['rest_calls']} ({stats['rest_calls_saved']} saved)", inline=False)
+    stats = channel_features.metrics()
+    embed.add_field(name="Channel features", value=f"Cached channels: {stats['channels']} ({stats['idle_channels']} with nothing configured)\nComputed: {stats['computed']}, invalidations: {stats['invalidations']}", inline=False)
+    stats = shard_stats.metrics(shard_latencies())
+    latencies = [shard['latency_ms'] for shard in stats.values() if shard['latency_ms'] is not None]
+    embed.add_field(name="Shards", value=f"Running: {len(stats)} of {bot.shard_count or 1} ({'ids ' + ','.join(map(str, SHARD_IDS)) if SHARD_IDS else 'all in this process'})\nLatency avg/max: {round(sum(latencies) / len(latencies)) if latencies else '-'}/{max(latencies) if latencies else '-'}ms, events: {round(sum(shard['events_per_second'] for shard in stats.values()), 2)}/s", inline=False)
+    stats = member_cache.metrics()
+    cached = sum(len(guild._members) for guild in bot.guilds)
+    embed.add_field(name="Member cache", value=f"Policy: {MEMBER_CACHE_POLICY}, cached members: {cached}" + (f" ({stats['tracked']}/{stats['max_members']} LRU, {stats['chunked_guilds']} guilds chunked on demand)\nLookups: {stats['hits']} hits, {stats['misses']} misses ({stats['fetched']} fetched, {stats['queries']} gateway queries), {stats['evicted']} evicted" if stats['max_members'] is not None else ''), inline=False)
+    stats = state_store.metrics()
+    embed.add_field(name="State store", value=f"Guilds loaded: {stats['loaded_guilds']}\nWrites: {stats['writes_committed']} committed in {stats['batches']} batches, {stats['backlog']} pending, {stats['writes_failed']} failed ({stats['lock_waits']} lock retries)", inline=False)
+    await ctx.send(embed=embed)
 
 @bot.command()
-async def userinfo(ctx, member: discord.Member = None):
+async def userinfo(ctx, member: CachedMember = None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
@@ -459,7 +1097,7 @@ async def serverinfo(ctx):
     if guild.icon:
         embed.set_thumbnail(url=guild.icon.url)
     embed.add_field(name="ID", value=guild.id, inline=True)
-    embed.add_field(name="Owner", value=guild.owner.mention, inline=True)
+    embed.add_field(name="Owner", value=f"<@{guild.owner_id}>", inline=True)
     embed.add_field(name="Created At", value=guild.created_at.strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
     embed.add_field(name="Members", value=guild.member_count, inline=True)
     embed.add_field(name="Channels", value=len(guild.channels), inline=True)
@@ -470,53 +1108,86 @@ async def serverinfo(ctx):
 
 @bot.command()
 @commands.has_permissions(manage_messages=True)
-async def clearwarnings(ctx, member: discord.Member):
+async def clearwarnings(ctx, member: CachedMember, number: int = None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if ctx.guild.id in warnings and member.id in warnings[ctx.guild.id]:
-        del warnings[ctx.guild.id][member.id]
-        await ctx.send(f"Warnings cleared for {member.mention}.")
-        await log_event(ctx.guild, "Warnings Cleared", f"Warnings cleared for {member.mention} by {ctx.author.mention}")
+    if number is not None:
+        if number > 0 and await warnings_ledger.remove(ctx.guild.id, member.id, number):
+            await ctx.send(f"Warning {number} cleared for {member.mention}.")
+            await log_event(ctx.guild, "Warning Cleared", f"Warning {number} cleared for {member.mention} by {ctx.author.mention}")
+        else:
+            await ctx.send(f"{member.mention} has no warning {number}.")
+        return
+    removed = await warnings_ledger.clear(ctx.guild.id, member.id)
+    if removed:
+        await ctx.send(f"{removed} warnings cleared for {member.mention}.")
+        await log_event(ctx.guild, "Warnings Cleared", f"{removed} warnings cleared for {member.mention} by {ctx.author.mention}")
     else:
         await ctx.send(f"{member.mention} has no warnings.")
 
+async def escalate_warnings(ctx, member, action, duration, count, window):
+    reason = f"Reached {count} warnings{' within ' + format_duration(window) if window else ''}"
+    duration_text = format_duration(duration) if duration else None
+    notified = await notify_user(member, "banned" if action == 'ban' else "muted", reason, duration_text)
+    if action == 'ban':
+        await member.ban(reason=reason)
+        kind = EXPIRE_BAN
+    else:
+        mute_role = await mute_roles.resolve(ctx.guild)
+        await action_queue.submit(f"PUT /guilds/{ctx.guild.id}/members/roles", lambda: member.add_roles(mute_role, reason=reason), PRIORITY_MODERATE)
+        kind = EXPIRE_MUTE
+    if duration:
+        expiries.schedule(ctx.guild.id, member.id, kind, duration)
+    else:
+        expiries.cancel(ctx.guild.id, member.id, kind)
+    verb = "banned" if action == 'ban' else "muted"
+    await ctx.send(f"{member.mention} has been automatically {verb}{' and DM\'d' if notified else ''}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason}")
+    await log_event(ctx.guild, "Warnings Escalated", f"{member.mention} automatically {verb}.{' Duration: ' + duration_text if duration_text else ''} Reason: {reason}")
+
 @bot.command()
 @commands.has_permissions(manage_messages=True)
-async def warn(ctx, member: discord.Member, *, reason=None):
+async def warn(ctx, member: CachedMember, *, reason=None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner:
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id:
         await ctx.send("This user is immune to warnings!")
         return
     if member == ctx.author or member == ctx.guild.me:
         await ctx.send("You can't warn yourself or the bot!")
         return
-    guild_id = ctx.guild.id
-    if guild_id not in warnings:
-        warnings[guild_id] = {}
-    if member.id not in warnings[guild_id]:
-        warnings[guild_id][member.id] = []
-    warnings[guild_id][member.id].append({"reason": reason or "None", "timestamp": datetime.datetime.now(datetime.timezone.utc)})
+    escalation = await warnings_ledger.add(ctx.guild.id, member.id, ctx.author.id, reason or "None")
     notified = await notify_user(member, "warned", reason)
     await ctx.send(f"{member.mention} has been warned{' and DM\'d' if notified else ''}. Reason: {reason or 'None'}")
     await log_event(ctx.guild, "User Warned", f"{member.mention} warned by {ctx.author.mention}. Reason: {reason or 'None'}")
+    if escalation:
+        await escalate_warnings(ctx, member, *escalation)
 
 @bot.command()
-async def warns(ctx, member: discord.Member = None):
+async def warns(ctx, member: Optional[CachedMember] = None, page: int = 1, since: str = None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
     member = member or ctx.author
-    guild_id = ctx.guild.id
-    if guild_id in warnings and member.id in warnings[guild_id]:
-        embed = discord.Embed(title=f"Warnings for {member}", color=discord.Color.red())
-        for i, warning in enumerate(warnings[guild_id][member.id], 1):
-            embed.add_field(name=f"Warning {i}", value=f"Reason: {warning['reason']}\nTime: {warning['timestamp'].strftime('%Y-%m-%d %H:%M:%S UTC')}", inline=False)
-        await ctx.send(embed=embed)
-    else:
-        await ctx.send(f"{member.mention} has no warnings.")
+    since_seconds, since_text = parse_duration(since)
+    if since_seconds is None and since_text:
+        await ctx.send(since_text)
+        return
+    since_timestamp = discord.utils.utcnow().timestamp() - since_seconds if since_seconds else None
+    rows, total, first = await warnings_ledger.page(ctx.guild.id, member.id, max(page, 1), WARNINGS_PAGE_SIZE, since_timestamp)
+    if not total:
+        await ctx.send(f"{member.mention} has no warnings{' in the last ' + since_text if since_text else ''}.")
+        return
+    pages = -(-total // WARNINGS_PAGE_SIZE)
+    if not rows:
+        await ctx.send(f"{member.mention} only has {pages} pages of warnings.")
+        return
+    embed = discord.Embed(title=f"Warnings for {member}", color=discord.Color.red())
+    for number, (created, moderator_id, reason) in enumerate(rows, first):
+        embed.add_field(name=f"Warning {number}", value=f"Reason: {reason}\nTime: {datetime.datetime.fromtimestamp(created, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}" + (f"\nBy: <@{moderator_id}>" if moderator_id else ''), inline=False)
+    embed.set_footer(text=f"Page {max(page, 1)}/{pages} · {total} warnings{' in the last ' + since_text if since_text else ''}")
+    await ctx.send(embed=embed)
 
 @bot.command()
 @commands.has_permissions(administrator=True)
@@ -527,7 +1198,7 @@ async def role(ctx, action: str, member: discord.Member, role: discord.Role):
     if action.lower() not in ["add", "remove"]:
         await ctx.send("Action must be 'add' or 'remove'.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner and action.lower() == "remove":
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id and action.lower() == "remove":
         await ctx.send("This user is immune to role removal!")
         return
     if role >= ctx.guild.me.top_role:
@@ -554,8 +1225,7 @@ async def poll(ctx, question: str, *options: str):
     for i, option in enumerate(options, 1):
         embed.add_field(name=f"Option {i}", value=option, inline=False)
     message = await ctx.send(embed=embed)
-    for i in range(len(options)):
-        await message.add_reaction(f"{i+1}\u20e3")
+    await asyncio.gather(*(action_queue.submit(f"PUT /channels/{ctx.channel.id}/reactions", functools.partial(message.add_reaction, f"{i+1}\u20e3")) for i in range(len(options))))
     await log_event(ctx.guild, "Poll Created", f"Poll created by {ctx.author.mention}: {question}")
 
 @bot.command()
@@ -602,7 +1272,9 @@ async def afk(ctx, *, reason="AFK"):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    afk_users[ctx.author.id] = reason
+    since = discord.utils.utcnow().timestamp()
+    afk_index.set(ctx.guild.id, ctx.author.id, reason, since)
+    state_store.put('afk_users', ctx.guild.id, ctx.author.id, {"reason": reason, "since": since})
     await ctx.send(f"{ctx.author.mention} is now AFK: {reason}")
     await log_event(ctx.guild, "AFK Set", f"{ctx.author.mention} set AFK status: {reason}")
 
@@ -611,8 +1283,9 @@ async def afkstop(ctx):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if ctx.author.id in afk_users:
-        del afk_users[ctx.author.id]
+    scope, entry = afk_index.clear(ctx.guild.id, ctx.author.id)
+    if entry is not None:
+        state_store.delete('afk_users', scope, ctx.author.id)
         await ctx.send(f"{ctx.author.mention} is no longer AFK.")
         await log_event(ctx.guild, "AFK Removed", f"{ctx.author.mention} removed AFK status")
     else:
@@ -636,7 +1309,7 @@ async def nickname(ctx, member: discord.Member, *, nick: str = None):
     if ctx.channel.id in disabled_channels:
         await ctx.send("This channel is disabled for bot commands.")
         return
-    if member.id == SUPERUSER_ID or member == ctx.guild.owner:
+    if member.id == SUPERUSER_ID or member.id == ctx.guild.owner_id:
         await ctx.send("This user is immune to nickname changes!")
         return
     await member.edit(nick=nick)
@@ -654,7 +1327,9 @@ async def roleinfo(ctx, role: discord.Role):
     embed.add_field(name="Color", value=str(role.color), inline=True)
     embed.add_field(name="Hoisted", value="Yes" if role.hoist else "No", inline=True)
     embed.add_field(name="Mentionable", value="Yes" if role.mentionable else "No", inline=True)
-    embed.add_field(name="Members", value=len(role.members), inline=True)
+    if ctx.author.guild_permissions.manage_roles:
+        await member_cache.chunk(ctx.guild)
+    embed.add_field(name="Members", value=len(role.members) if member_cache.complete(ctx.guild) else f"{len(role.members)} (cached)", inline=True)
     await ctx.send(embed=embed)
 
 @bot.command()
@@ -666,21 +1341,17 @@ async def pin(ctx, *, content: str):
     if not content:
         await ctx.send("Please provide a message to pin.")
         return
-    for pattern in blocked_mentions:
-        if re.search(pattern, content, re.IGNORECASE):
-            await ctx.send(f"{ctx.author.mention}, pinned message cannot contain @everyone or @here!")
-            return
+    if blocked_mentions_pattern.search(content):
+        await ctx.send(f"{ctx.author.mention}, pinned message cannot contain @everyone or @here!")
+        return
     if ctx.channel.id in pinned_messages:
-        last_message_id = pinned_messages[ctx.channel.id].get('last_message_id')
-        if last_message_id:
-            try:
-                last_message = await ctx.channel.fetch_message(last_message_id)
-                await last_message.delete()
-            except discord.NotFound:
-                pass
+        sticky_engine.discard(ctx.channel.id)
+        await delete_sticky(ctx.channel)
     pinned_messages[ctx.channel.id] = {'content': content, 'last_message_id': None}
     new_message = await ctx.channel.send(content)
     pinned_messages[ctx.channel.id]['last_message_id'] = new_message.id
+    state_store.put('pinned_messages', ctx.guild.id, ctx.channel.id, pinned_messages[ctx.channel.id])
+    channel_features.invalidate(ctx.guild.id)
     await ctx.send(f"Pinned message set to: {content}")
     await log_event(ctx.guild, "Pinned Message Set", f"Pinned message set in {ctx.channel.mention} by {ctx.author.mention}: {content}")
 
@@ -690,14 +1361,11 @@ async def unpin(ctx):
         await ctx.send("This channel is disabled for bot commands.")
         return
     if ctx.channel.id in pinned_messages:
-        last_message_id = pinned_messages[ctx.channel.id].get('last_message_id')
-        if last_message_id:
-            try:
-                last_message = await ctx.channel.fetch_message(last_message_id)
-                await last_message.delete()
-            except discord.NotFound:
-                pass
+        sticky_engine.discard(ctx.channel.id)
+        await delete_sticky(ctx.channel)
         del pinned_messages[ctx.channel.id]
+        state_store.delete('pinned_messages', ctx.guild.id, ctx.channel.id)
+        channel_features.invalidate(ctx.guild.id)
         await ctx.send("Pinned message removed.")
         await log_event(ctx.guild, "Pinned Message Removed", f"Pinned message removed in {ctx.channel.mention} by {ctx.author.mention}")
     else:
@@ -709,14 +1377,11 @@ async def pinstop(ctx):
         await ctx.send("This channel is disabled for bot commands.")
         return
     if ctx.channel.id in pinned_messages:
-        last_message_id = pinned_messages[ctx.channel.id].get('last_message_id')
-        if last_message_id:
-            try:
-                last_message = await ctx.channel.fetch_message(last_message_id)
-                await last_message.delete()
-            except discord.NotFound:
-                pass
+        sticky_engine.discard(ctx.channel.id)
+        await delete_sticky(ctx.channel)
         del pinned_messages[ctx.channel.id]
+        state_store.delete('pinned_messages', ctx.guild.id, ctx.channel.id)
+        channel_features.invalidate(ctx.guild.id)
         await ctx.send("Pinned message stopped.")
         await log_event(ctx.guild, "Pinned Message Stopped", f"Pinned message stopped in {ctx.channel.mention} by {ctx.author.mention}")
     else:
@@ -754,21 +1419,27 @@ async def reactionrole(ctx, message_id: int, role: discord.Role, emoji):
         return
     message = await ctx.channel.fetch_message(message_id)
     await message.add_reaction(emoji)
-    async def on_reaction_add(reaction, user):
-        if user.bot or reaction.message.id != message_id:
-            return
-        if str(reaction.emoji) == emoji:
-            await user.add_roles(role)
-    async def on_reaction_remove(reaction, user):
-        if user.bot or reaction.message.id != message_id:
-            return
-        if str(reaction.emoji) == emoji:
-            await user.remove_roles(role)
-    bot.add_listener(on_reaction_add, 'on_reaction_add')
-    bot.add_listener(on_reaction_remove, 'on_reaction_remove')
+    key = emoji_key(emoji)
+    reaction_roles.add(ctx.guild.id, ctx.channel.id, message_id, key, role.id)
+    state_store.put('reaction_roles', ctx.guild.id, f"{message_id}:{key}", {"channel": ctx.channel.id, "role": role.id})
     await ctx.send(f"Reaction role set: {emoji} for {role.name} on message {message_id}.")
     await log_event(ctx.guild, "Reaction Role Set", f"Reaction role set by {ctx.author.mention}: {emoji} for {role.name} on message {message_id}")
 
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def reactionroleremove(ctx, message_id: int, emoji=None):
+    if ctx.channel.id in disabled_channels:
+        await ctx.send("This channel is disabled for bot commands.")
+        return
+    removed = reaction_roles.remove(message_id, emoji_key(emoji) if emoji else None)
+    if not removed:
+        await ctx.send(f"No reaction role{' for ' + emoji if emoji else 's'} on message {message_id}.")
+        return
+    for key in removed:
+        state_store.delete('reaction_roles', ctx.guild.id, f"{message_id}:{key}")
+    await ctx.send(f"Removed {len(removed)} reaction role{'s' if len(removed) != 1 else ''} from message {message_id}.")
+    await log_event(ctx.guild, "Reaction Role Removed", f"{len(removed)} reaction roles removed from message {message_id} by {ctx.author.mention}")
+
 @bot.tree.command(name="welcome_messages", description="Sets a welcome message for new members in this channel (Admin only)")
 async def welcome_messages(interaction: discord.Interaction, message: str):
     if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
@@ -777,7 +1448,8 @@ async def welcome_messages(interaction: discord.Interaction, message: str):
     if interaction.channel.id in disabled_channels:
         await interaction.response.send_message("This channel is disabled for bot commands.", ephemeral=True)
         return
-    welcome_channels[interaction.channel.id] = message
+    welcomes.set(interaction.guild.id, interaction.channel.id, message)
+    state_store.put('welcome_channels', interaction.guild.id, interaction.channel.id, message)
     await interaction.response.send_message(f"Welcome message set for this channel: {message}", ephemeral=False)
     await log_event(interaction.guild, "Welcome Message Set", f"Welcome message set in {interaction.channel.mention} by {interaction.user.mention}: {message}")
 
@@ -789,8 +1461,8 @@ async def welcome_messages_stop(interaction: discord.Interaction):
     if interaction.channel.id in disabled_channels:
         await interaction.response.send_message("This channel is disabled for bot commands.", ephemeral=True)
         return
-    if interaction.channel.id in welcome_channels:
-        del welcome_channels[interaction.channel.id]
+    if welcomes.remove(interaction.guild.id, interaction.channel.id):
+        state_store.delete('welcome_channels', interaction.guild.id, interaction.channel.id)
         await interaction.response.send_message("Welcome messages stopped in this channel.", ephemeral=False)
         await log_event(interaction.guild, "Welcome Messages Stopped", f"Welcome messages stopped in {interaction.channel.mention} by {interaction.user.mention}")
     else:
@@ -806,6 +1478,8 @@ async def enable_security_channel(interaction: discord.Interaction):
         return
     if interaction.channel.id not in security_channels:
         security_channels.add(interaction.channel.id)
+        state_store.put('security_channels', interaction.guild.id, interaction.channel.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Invite link security enabled in this channel. Users posting invite links will be timed out for 1 minute.", ephemeral=False)
         await log_event(interaction.guild, "Security Enabled", f"Invite link security enabled in {interaction.channel.mention} by {interaction.user.mention}")
     else:
@@ -821,6 +1495,8 @@ async def disable_security_channel(interaction: discord.Interaction):
         return
     if interaction.channel.id in security_channels:
         security_channels.remove(interaction.channel.id)
+        state_store.delete('security_channels', interaction.guild.id, interaction.channel.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Invite link security disabled in this channel.", ephemeral=False)
         await log_event(interaction.guild, "Security Disabled", f"Invite link security disabled in {interaction.channel.mention} by {interaction.user.mention}")
     else:
@@ -833,6 +1509,8 @@ async def enable_security_server(interaction: discord.Interaction):
         return
     if interaction.guild.id not in security_servers:
         security_servers.add(interaction.guild.id)
+        state_store.put('security_servers', interaction.guild.id, interaction.guild.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Invite link security enabled for the entire server. Users posting invite links will be timed out for 1 minute.", ephemeral=False)
         await log_event(interaction.guild, "Server Security Enabled", f"Invite link security enabled server-wide by {interaction.user.mention}")
     else:
@@ -845,6 +1523,8 @@ async def disable_security_server(interaction: discord.Interaction):
         return
     if interaction.guild.id in security_servers:
         security_servers.remove(interaction.guild.id)
+        state_store.delete('security_servers', interaction.guild.id, interaction.guild.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Invite link security disabled for the entire server.", ephemeral=False)
         await log_event(interaction.guild, "Server Security Disabled", f"Invite link security disabled server-wide by {interaction.user.mention}")
     else:
@@ -857,6 +1537,8 @@ async def enable_nuke_protection(interaction: discord.Interaction):
         return
     if interaction.guild.id not in nuke_protection_servers:
         nuke_protection_servers.add(interaction.guild.id)
+        state_store.put('nuke_protection_servers', interaction.guild.id, interaction.guild.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Nuke protection enabled for the server. Excessive role mentions, channel creations/deletions, or bans/kicks will result in quarantine.", ephemeral=False)
         await log_event(interaction.guild, "Nuke Protection Enabled", f"Nuke protection enabled server-wide by {interaction.user.mention}")
     else:
@@ -869,11 +1551,43 @@ async def disable_nuke_protection(interaction: discord.Interaction):
         return
     if interaction.guild.id in nuke_protection_servers:
         nuke_protection_servers.remove(interaction.guild.id)
+        state_store.delete('nuke_protection_servers', interaction.guild.id, interaction.guild.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("Nuke protection disabled for the server.", ephemeral=False)
         await log_event(interaction.guild, "Nuke Protection Disabled", f"Nuke protection disabled server-wide by {interaction.user.mention}")
     else:
         await interaction.response.send_message("Nuke protection is not enabled for the server.", ephemeral=False)
 
+@bot.tree.command(name="enable_raid_protection", description="Enables join raid detection for the server (Admin only)")
+@app_commands.describe(actions="Comma-separated actions on a raid: slowmode, lock, timeout")
+async def enable_raid_protection(interaction: discord.Interaction, actions: str = "timeout"):
+    if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+        return
+    chosen = [action.strip().lower() for action in actions.split(',') if action.strip()]
+    unknown = [action for action in chosen if action not in RAID_ACTIONS]
+    if unknown:
+        await interaction.response.send_message(f"Unknown actions: {', '.join(unknown)}. Choose from {', '.join(RAID_ACTIONS)}.", ephemeral=True)
+        return
+    chosen = [action for action in RAID_ACTIONS if action in chosen]
+    raid_protection_servers[interaction.guild.id] = chosen
+    state_store.put('raid_protection_servers', interaction.guild.id, interaction.guild.id, chosen)
+    await interaction.response.send_message(f"Raid protection enabled for the server. Join bursts, waves of new accounts, or look-alike names and avatars will trigger: {', '.join(chosen) or 'logging only'}.", ephemeral=False)
+    await log_event(interaction.guild, "Raid Protection Enabled", f"Raid protection enabled by {interaction.user.mention}. Actions: {', '.join(chosen) or 'None'}")
+
+@bot.tree.command(name="disable_raid_protection", description="Disables join raid detection for the server (Admin only)")
+async def disable_raid_protection(interaction: discord.Interaction):
+    if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+        return
+    if interaction.guild.id in raid_protection_servers:
+        del raid_protection_servers[interaction.guild.id]
+        state_store.delete('raid_protection_servers', interaction.guild.id, interaction.guild.id)
+        await interaction.response.send_message("Raid protection disabled for the server.", ephemeral=False)
+        await log_event(interaction.guild, "Raid Protection Disabled", f"Raid protection disabled by {interaction.user.mention}")
+    else:
+        await interaction.response.send_message("Raid protection is not enabled for the server.", ephemeral=False)
+
 @bot.tree.command(name="log_enable", description="Enables logging of commands and major events in this channel (Admin only)")
 async def log_enable(interaction: discord.Interaction):
     if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
@@ -883,6 +1597,7 @@ async def log_enable(interaction: discord.Interaction):
         await interaction.response.send_message("This channel is disabled for bot commands.", ephemeral=True)
         return
     log_channels[interaction.guild.id] = interaction.channel.id
+    state_store.put('log_channels', interaction.guild.id, interaction.guild.id, interaction.channel.id)
     await interaction.response.send_message("Logging enabled in this channel for commands and major events.", ephemeral=False)
     await log_event(interaction.guild, "Logging Enabled", f"Logging enabled in {interaction.channel.mention} by {interaction.user.mention}")
 
@@ -896,20 +1611,99 @@ async def log_disable(interaction: discord.Interaction):
         return
     if interaction.guild.id in log_channels:
         del log_channels[interaction.guild.id]
+        log_channel_cache.pop(interaction.guild.id, None)
+        state_store.delete('log_channels', interaction.guild.id, interaction.guild.id)
         await interaction.response.send_message("Logging disabled for this server.", ephemeral=False)
         await log_event(interaction.guild, "Logging Disabled", f"Logging disabled by {interaction.user.mention}")
     else:
         await interaction.response.send_message("Logging is not enabled for this server.", ephemeral=False)
 
+@bot.tree.command(name="blocklist_add", description="Adds comma-separated words or a regex pattern to the server blocklist (Admin only)")
+async def blocklist_add(interaction: discord.Interaction, entry: str, regex: bool = False):
+    if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+        return
+    if interaction.channel.id in disabled_channels:
+        await interaction.response.send_message("This channel is disabled for bot commands.", ephemeral=True)
+        return
+    if regex:
+        error = validate_pattern(entry)
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
+            return
+        message_filter.add_pattern(interaction.guild.id, entry)
+        state_store.put('blocklist_patterns', interaction.guild.id, entry)
+        channel_features.invalidate(interaction.guild.id)
+        added = [entry]
+    else:
+        added = [term for term in (normalize_term(term) for term in entry.split(',')) if term]
+        if not added:
+            await interaction.response.send_message("Please provide at least one word or phrase.", ephemeral=True)
+            return
+        for term in added:
+            message_filter.add_term(interaction.guild.id, term)
+            state_store.put('blocklist_terms', interaction.guild.id, term)
+            channel_features.invalidate(interaction.guild.id)
+    await interaction.response.send_message(f"Added {len(added)} blocklist {'pattern' if regex else 'entries'}. The server blocklist now has {message_filter.blocklist_size(interaction.guild.id)} entries.", ephemeral=True)
+    await log_event(interaction.guild, "Blocklist Updated", f"{interaction.user.mention} added {len(added)} blocklist {'pattern' if regex else 'entries'}")
+
+@bot.tree.command(name="blocklist_remove", description="Removes comma-separated words or a regex pattern from the server blocklist (Admin only)")
+async def blocklist_remove(interaction: discord.Interaction, entry: str, regex: bool = False):
+    if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+        return
+    if interaction.channel.id in disabled_channels:
+        await interaction.response.send_message("This channel is disabled for bot commands.", ephemeral=True)
+        return
+    removed = 0
+    if regex:
+        if message_filter.remove_pattern(interaction.guild.id, entry):
+            state_store.delete('blocklist_patterns', interaction.guild.id, entry)
+            channel_features.invalidate(interaction.guild.id)
+            removed = 1
+    else:
+        for term in (normalize_term(term) for term in entry.split(',')):
+            if term and message_filter.remove_term(interaction.guild.id, term):
+                state_store.delete('blocklist_terms', interaction.guild.id, term)
+                channel_features.invalidate(interaction.guild.id)
+                removed += 1
+    if not removed:
+        await interaction.response.send_message("No matching blocklist entries found.", ephemeral=True)
+        return
+    await interaction.response.send_message(f"Removed {removed} blocklist {'pattern' if regex else 'entries'}.", ephemeral=True)
+    await log_event(interaction.guild, "Blocklist Updated", f"{interaction.user.mention} removed {removed} blocklist {'pattern' if regex else 'entries'}")
+
+@bot.tree.command(name="blocklist_list", description="Shows the server blocklist (Admin only)")
+async def blocklist_list(interaction: discord.Interaction):
+    if interaction.user.id != SUPERUSER_ID and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+        return
+    terms = sorted(message_filter.guild_terms.get(interaction.guild.id, ()))
+    patterns = sorted(message_filter.guild_patterns.get(interaction.guild.id, ()))
+    if not terms and not patterns:
+        await interaction.response.send_message("The server blocklist is empty.", ephemeral=True)
+        return
+    embed = discord.Embed(title=f"Blocklist for {interaction.guild.name}", color=discord.Color.red())
+    if terms:
+        shown = ', '.join(terms)
+        embed.add_field(name=f"Words and phrases ({len(terms)})", value=shown if len(shown) <= 1024 else shown[:1020] + '...', inline=False)
+    if patterns:
+        shown = '\n'.join(f"`{pattern}`" for pattern in patterns)
+        embed.add_field(name=f"Patterns ({len(patterns)})", value=shown if len(shown) <= 1024 else shown[:1020] + '...', inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="command", description="List all available commands")
 async def list_commands(interaction: discord.Interaction):
     embeds = []
-    embed1 = discord.Embed(title="PeteZahBot Commands (1/2)", color=discord.Color.blue())
+    embed1 = discord.Embed(title="PeteZahBot Commands (1/3)", color=discord.Color.blue())
     embed1.add_field(name="p!initiate", value="Activates AI chat in the channel (Admin only).", inline=False)
     embed1.add_field(name="p!stop", value="Disables AI chat in the channel (Admin only).", inline=False)
     embed1.add_field(name="p!ban @user [duration] [reason]", value="Bans a user, optional duration (e.g., 5d, 10m, 2h, 30s) (Ban perms).", inline=False)
     embed1.add_field(name="p!unban user_id [reason]", value="Unbans a user by ID (Ban perms).", inline=False)
     embed1.add_field(name="p!kick @user [reason]", value="Kicks a user (Kick perms).", inline=False)
+    embed1.add_field(name="p!massban ids|joined:10m|name:regex [reason]", value="Bans every matching user in one bulk request, without DMs (Ban perms).", inline=False)
+    embed1.add_field(name="p!masskick ids|joined:10m|name:regex [reason]", value="Kicks every matching member (Kick perms).", inline=False)
+    embed1.add_field(name="p!masstimeout duration ids|joined:10m|name:regex [reason]", value="Times out every matching member, up to 28 days (Mute perms).", inline=False)
     embed1.add_field(name="p!mute @user [duration] [reason]", value="Mutes a user, optional duration (e.g., 5d, 10m, 2h, 30s) (Mute perms).", inline=False)
     embed1.add_field(name="p!unmute @user [reason]", value="Unmutes a user (Mute perms).", inline=False)
     embed1.add_field(name="p!purge amount", value="Deletes up to 100 messages (Manage Messages).", inline=False)
@@ -917,21 +1711,23 @@ async def list_commands(interaction: discord.Interaction):
     embed1.add_field(name="p!unlock [reason]", value="Unlocks the channel (Admin only).", inline=False)
     embed1.add_field(name="p!petezah", value="Creates and assigns PeteZah role with admin perms (Superuser only).", inline=False)
     embed1.add_field(name="p!ping", value="Shows bot latency.", inline=False)
+    embed1.add_field(name="p!shards", value="Shows latency and event rate for each shard.", inline=False)
+    embed1.add_field(name="p!botstats", value="Shows HTTP pool and subsystem metrics (Superuser only).", inline=False)
     embed1.add_field(name="p!userinfo [@user]", value="Shows user info (defaults to self).", inline=False)
     embed1.add_field(name="p!serverinfo", value="Shows server info.", inline=False)
-    embed1.add_field(name="p!clearwarnings @user", value="Clears warnings for a user (Manage Messages).", inline=False)
+    embed1.add_field(name="p!clearwarnings @user [number]", value="Clears one or all warnings for a user (Manage Messages).", inline=False)
     embed1.add_field(name="p!warn @user [reason]", value="Warns a user (Manage Messages).", inline=False)
     embeds.append(embed1)
 
-    embed2 = discord.Embed(title="PeteZahBot Commands (2/2)", color=discord.Color.blue())
-    embed2.add_field(name="p!warns [@user]", value="Shows warnings for a user (defaults to self).", inline=False)
+    embed2 = discord.Embed(title="PeteZahBot Commands (2/3)", color=discord.Color.blue())
+    embed2.add_field(name="p!warns [@user] [page] [since]", value="Shows warnings for a user, 10 per page, optionally only the last e.g. 30d.", inline=False)
     embed2.add_field(name="p!role add/remove @user @role", value="Adds or removes a role (Admin only).", inline=False)
     embed2.add_field(name="p!poll question option1 option2...", value="Creates a poll with up to 10 options.", inline=False)
     embed2.add_field(name="p!avatar [@user]", value="Shows user avatar (defaults to self).", inline=False)
     embed2.add_field(name="p!slowmode seconds", value="Sets channel slowmode (Admin only).", inline=False)
     embed2.add_field(name="p!invite", value="Creates a server invite link.", inline=False)
     embed2.add_field(name="p!botinvite", value="Provides the bot's invite link.", inline=False)
-    embed2.add_field(name="p!afk [reason]", value="Sets AFK status with optional reason.", inline=False)
+    embed2.add_field(name="p!afk [reason]", value="Sets AFK status in this server; cleared when you next talk.", inline=False)
     embed2.add_field(name="p!afkstop", value="Removes AFK status.", inline=False)
     embed2.add_field(name="p!generateimage prompt", value="Generates an image from a prompt.", inline=False)
     embed2.add_field(name="p!nickname @user [nick]", value="Sets or clears a user's nickname (Admin only).", inline=False)
@@ -942,21 +1738,30 @@ async def list_commands(interaction: discord.Interaction):
     embed2.add_field(name="p!say message", value="Sends a message as the bot (Admin only).", inline=False)
     embed2.add_field(name="p!embed message", value="Sends an embedded message (Admin only).", inline=False)
     embed2.add_field(name="p!reactionrole message_id @role emoji", value="Sets a reaction role (Admin only).", inline=False)
-    embed2.add_field(name="/command", value="Shows this command list.", inline=False)
-    embed2.add_field(name="/welcome_messages message", value="Sets a welcome message for new members in the channel (Admin only).", inline=False)
-    embed2.add_field(name="/welcome_messages_stop", value="Stops welcome messages in the channel (Admin only).", inline=False)
-    embed2.add_field(name="/enable_security_channel", value="Enables invite link security in the channel (Admin only).", inline=False)
-    embed2.add_field(name="/disable_security_channel", value="Disables invite link security in the channel (Admin only).", inline=False)
-    embed2.add_field(name="/enable_security_server", value="Enables invite link security in all channels (Admin only).", inline=False)
-    embed2.add_field(name="/disable_security_server", value="Disables invite link security in all channels (Admin only).", inline=False)
-    embed2.add_field(name="/enable_nuke_protection", value="Enables nuke protection for the server (Admin only).", inline=False)
-    embed2.add_field(name="/disable_nuke_protection", value="Disables nuke protection for the server (Admin only).", inline=False)
-    embed2.add_field(name="/log_enable", value="Enables logging of commands and events in this channel (Admin only).", inline=False)
-    embed2.add_field(name="/log_disable", value="Disables logging in this channel (Admin only).", inline=False)
-    embed2.add_field(name="/stopchannel", value="Completely disables the bot in this channel (Admin only).", inline=False)
-    embed2.add_field(name="/reenablechannel", value="Re-enables the bot in this channel (Admin only).", inline=False)
+    embed2.add_field(name="p!reactionroleremove message_id [emoji]", value="Removes one or all reaction roles from a message (Admin only).", inline=False)
     embeds.append(embed2)
 
+    embed3 = discord.Embed(title="PeteZahBot Commands (3/3)", color=discord.Color.blue())
+    embed3.add_field(name="/command", value="Shows this command list.", inline=False)
+    embed3.add_field(name="/welcome_messages message", value="Sets a welcome message; supports {member}, {name}, {guild}, {count} (Admin only).", inline=False)
+    embed3.add_field(name="/welcome_messages_stop", value="Stops welcome messages in the channel (Admin only).", inline=False)
+    embed3.add_field(name="/enable_security_channel", value="Enables invite link security in the channel (Admin only).", inline=False)
+    embed3.add_field(name="/disable_security_channel", value="Disables invite link security in the channel (Admin only).", inline=False)
+    embed3.add_field(name="/enable_security_server", value="Enables invite link security in all channels (Admin only).", inline=False)
+    embed3.add_field(name="/disable_security_server", value="Disables invite link security in all channels (Admin only).", inline=False)
+    embed3.add_field(name="/enable_nuke_protection", value="Enables nuke protection for the server (Admin only).", inline=False)
+    embed3.add_field(name="/disable_nuke_protection", value="Disables nuke protection for the server (Admin only).", inline=False)
+    embed3.add_field(name="/enable_raid_protection [actions]", value="Detects join raids and applies slowmode, lock and/or timeout (Admin only).", inline=False)
+    embed3.add_field(name="/disable_raid_protection", value="Disables raid detection for the server (Admin only).", inline=False)
+    embed3.add_field(name="/log_enable", value="Enables logging of commands and events in this channel (Admin only).", inline=False)
+    embed3.add_field(name="/log_disable", value="Disables logging in this channel (Admin only).", inline=False)
+    embed3.add_field(name="/blocklist_add entry [regex]", value="Adds comma-separated words or a regex to the server blocklist (Admin only).", inline=False)
+    embed3.add_field(name="/blocklist_remove entry [regex]", value="Removes words or a regex from the server blocklist (Admin only).", inline=False)
+    embed3.add_field(name="/blocklist_list", value="Shows the server blocklist (Admin only).", inline=False)
+    embed3.add_field(name="/stopchannel", value="Completely disables the bot in this channel (Admin only).", inline=False)
+    embed3.add_field(name="/reenablechannel", value="Re-enables the bot in this channel (Admin only).", inline=False)
+    embeds.append(embed3)
+
     await interaction.response.send_message(embeds=embeds, ephemeral=False)
     await log_event(interaction.guild, "Commands Listed", f"Command list requested by {interaction.user.mention}")
 
@@ -1027,23 +1832,28 @@ async def stopchannel(interaction: discord.Interaction):
         return
     if interaction.channel.id not in disabled_channels:
         disabled_channels.add(interaction.channel.id)
+        state_store.put('disabled_channels', interaction.guild.id, interaction.channel.id)
+        channel_features.invalidate(interaction.guild.id)
         if interaction.channel.id in active_channels:
             active_channels.remove(interaction.channel.id)
+            state_store.delete('active_channels', interaction.guild.id, interaction.channel.id)
+            channel_features.invalidate(interaction.guild.id)
+            ai_scheduler.discard(interaction.channel.id)
+        ai_transport.forget(interaction.channel.id)
         if interaction.channel.id in message_history:
             del message_history[interaction.channel.id]
         if interaction.channel.id in pinned_messages:
-            last_message_id = pinned_messages[interaction.channel.id].get('last_message_id')
-            if last_message_id:
-                try:
-                    last_message = await interaction.channel.fetch_message(last_message_id)
-                    await last_message.delete()
-                except discord.NotFound:
-                    pass
+            sticky_engine.discard(interaction.channel.id)
+            await delete_sticky(interaction.channel)
             del pinned_messages[interaction.channel.id]
-        if interaction.channel.id in welcome_channels:
-            del welcome_channels[interaction.channel.id]
+            state_store.delete('pinned_messages', interaction.guild.id, interaction.channel.id)
+            channel_features.invalidate(interaction.guild.id)
+        if welcomes.remove(interaction.guild.id, interaction.channel.id):
+            state_store.delete('welcome_channels', interaction.guild.id, interaction.channel.id)
         if interaction.channel.id in security_channels:
             security_channels.remove(interaction.channel.id)
+            state_store.delete('security_channels', interaction.guild.id, interaction.channel.id)
+            channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("PeteZahBot is now completely disabled in this channel!", ephemeral=False)
         await log_event(interaction.guild, "Bot Disabled in Channel", f"PeteZahBot disabled in {interaction.channel.mention} by {interaction.user.mention}")
     else:
@@ -1056,6 +1866,8 @@ async def reenablechannel(interaction: discord.Interaction):
         return
     if interaction.channel.id in disabled_channels:
         disabled_channels.remove(interaction.channel.id)
+        state_store.delete('disabled_channels', interaction.guild.id, interaction.channel.id)
+        channel_features.invalidate(interaction.guild.id)
         await interaction.response.send_message("PeteZahBot is now re-enabled in this channel!", ephemeral=False)
         await log_event(interaction.guild, "Bot Re-enabled in Channel", f"PeteZahBot re-enabled in {interaction.channel.mention} by {interaction.user.mention}")
     else:
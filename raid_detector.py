@@ -0,0 +1,112 @@
+import re
+import time
+from array import array
+from collections import deque
+
+SKELETON_PATTERN = re.compile(r'[^a-z]+')
+
+
+def name_skeleton(name):
+    skeleton = SKELETON_PATTERN.sub('', name.lower())
+    return skeleton if len(skeleton) >= 3 else None
+
+
+class _Burst:
+    __slots__ = ('times', 'count')
+
+    def __init__(self, limit):
+        self.times = array('d', bytes(8 * limit))
+        self.count = 0
+
+    def hit(self, now, window):
+        index = self.count % len(self.times)
+        oldest = self.times[index]
+        self.times[index] = now
+        self.count += 1
+        return self.count >= len(self.times) and now - oldest <= window
+
+
+class _GuildJoins:
+    __slots__ = ('joins', 'young', 'recent', 'fingerprints', 'expiring', 'raid_until')
+
+    def __init__(self, join_limit, young_limit, max_targets):
+        self.joins = _Burst(join_limit)
+        self.young = _Burst(young_limit)
+        self.recent = deque(maxlen=max_targets)
+        self.fingerprints = {}
+        self.expiring = deque()
+        self.raid_until = 0.0
+
+
+class RaidDetector:
+    def __init__(self, join_limit=10, window=10.0, young_age=7 * 86400, young_limit=5, fingerprint_limit=4, cooldown=300.0, max_targets=500, clock=time.monotonic):
+        self.join_limit = join_limit
+        self.window = window
+        self.young_age = young_age
+        self.young_limit = young_limit
+        self.fingerprint_limit = fingerprint_limit
+        self.cooldown = cooldown
+        self.max_targets = max_targets
+        self.clock = clock
+        self.guilds = {}
+        self.joins = 0
+        self.flagged = 0
+        self.raids = 0
+
+    def raiding(self, guild_id, now=None):
+        state = self.guilds.get(guild_id)
+        return state is not None and state.raid_until > (self.clock() if now is None else now)
+
+    def _fingerprint(self, state, key, now):
+        count = state.fingerprints.get(key, 0) + 1
+        state.fingerprints[key] = count
+        state.expiring.append((now, key))
+        return count >= self.fingerprint_limit
+
+    def observe(self, guild_id, member_id, account_age, name, avatar=None, now=None):
+        if now is None:
+            now = self.clock()
+        self.joins += 1
+        state = self.guilds.get(guild_id)
+        if state is None:
+            state = self.guilds[guild_id] = _GuildJoins(self.join_limit, self.young_limit, self.max_targets)
+        expiring = state.expiring
+        while expiring and now - expiring[0][0] > self.window:
+            key = expiring.popleft()[1]
+            count = state.fingerprints[key] - 1
+            if count:
+                state.fingerprints[key] = count
+            else:
+                del state.fingerprints[key]
+        reasons = []
+        if state.joins.hit(now, self.window):
+            reasons.append('join rate')
+        if account_age < self.young_age and state.young.hit(now, self.window):
+            reasons.append('new accounts')
+        skeleton = name_skeleton(name)
+        if skeleton is not None and self._fingerprint(state, ('name', skeleton), now):
+            reasons.append('similar names')
+        if avatar is not None and self._fingerprint(state, ('avatar', avatar), now):
+            reasons.append('identical avatars')
+        state.recent.append((now, member_id))
+        raiding = state.raid_until > now
+        if not reasons and not raiding:
+            return None
+        self.flagged += 1
+        if reasons:
+            state.raid_until = now + self.cooldown
+        if raiding:
+            return False, reasons, [member_id]
+        self.raids += 1
+        return True, reasons, [recent_id for joined_at, recent_id in state.recent if now - joined_at <= self.window]
+
+    def metrics(self):
+        now = self.clock()
+        return {
+            'guilds': len(self.guilds),
+            'raiding': sum(1 for state in self.guilds.values() if state.raid_until > now),
+            'fingerprints': sum(len(state.fingerprints) for state in self.guilds.values()),
+            'joins': self.joins,
+            'flagged': self.flagged,
+            'raids': self.raids,
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from array import array
+
+
+def parse_limits(spec):
+    limits = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        action, _, rule = item.partition('=')
+        limit, _, window = rule.partition('/')
+        limits[action.strip()] = (int(limit), float(window))
+    return limits
+
+
+class RateWindows:
+    def __init__(self, limits=None, default=(5, 60.0), clock=time.monotonic):
+        self.limits = dict(limits or {})
+        self.default = default
+        self.clock = clock
+        self.interval = max([window for _, window in self.limits.values()] + [default[1]])
+        self.kinds = {}
+        self.current = {}
+        self.previous = {}
+        self.rotate_at = None
+        self.hits = 0
+        self.triggered = 0
+        self.evicted = 0
+        self._timer = None
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._tick)
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _tick(self):
+        self.sweep()
+        self._timer = asyncio.get_running_loop().call_later(self.interval, self._tick)
+
+    def sweep(self, now=None):
+        if now is None:
+            now = self.clock()
+        if self.rotate_at is not None and now >= self.rotate_at:
+            self._rotate(now)
+
+    def _rotate(self, now):
+        if self.rotate_at is None:
+            self.rotate_at = now + self.interval
+            return
+        if now >= self.rotate_at + self.interval:
+            self.evicted += len(self.previous) + len(self.current)
+            self.previous = {}
+        else:
+            self.evicted += len(self.previous)
+            self.previous = self.current
+        self.current = {}
+        self.rotate_at = now + self.interval
+
+    def hit(self, guild_id, user_id, action, now=None):
+        if now is None:
+            now = self.clock()
+        if self.rotate_at is None or now >= self.rotate_at:
+            self._rotate(now)
+        self.hits += 1
+        kind = self.kinds.get(action)
+        if kind is None:
+            kind = self.kinds[action] = len(self.kinds)
+        limit, window = self.limits.get(action, self.default)
+        key = (guild_id << 72) | (user_id << 8) | kind
+        ring = self.current.get(key)
+        if ring is None:
+            ring = self.previous.pop(key, None)
+            if ring is None:
+                ring = array('d', bytes(8 * (limit + 1)))
+            self.current[key] = ring
+        count = int(ring[0]) + 1
+        ring[0] = count
+        ring[(count - 1) % limit + 1] = now
+        if count < limit or now - ring[count % limit + 1] > window:
+            return False
+        self.triggered += 1
+        return True
+
+    def metrics(self):
+        return {
+            'tracked': len(self.current) + len(self.previous),
+            'hits': self.hits,
+            'triggered': self.triggered,
+            'evicted': self.evicted,
+        }
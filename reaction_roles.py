@@ -0,0 +1,180 @@
+import asyncio
+import functools
+import json
+import logging
+
+import discord
+
+from action_queue import PRIORITY_DEFAULT
+
+
+def emoji_key(emoji):
+    if isinstance(emoji, str):
+        emoji = discord.PartialEmoji.from_str(emoji)
+    return str(emoji.id) if emoji.id else emoji.name
+
+
+class ReactionRoles:
+    def __init__(self, queue, window=1.0, max_retries=5):
+        self.queue = queue
+        self.window = window
+        self.max_retries = max_retries
+        self.messages = {}
+        self.pending = {}
+        self.applying = {}
+        self.flushing = set()
+        self.retries = {}
+        self.synced = set()
+        self._sync_task = None
+        self.reactions = 0
+        self.batches = 0
+        self.edits = 0
+        self.failures = 0
+        self.resynced = 0
+
+    def load(self, store, owns=None):
+        for guild_id, key, value in store.query("SELECT guild_id, key, value FROM state WHERE namespace = 'reaction_roles'"):
+            if owns is not None and not owns(guild_id):
+                continue
+            message_id, _, emoji = key.partition(':')
+            value = json.loads(value)
+            self.add(guild_id, value['channel'], int(message_id), emoji, value['role'])
+
+    def add(self, guild_id, channel_id, message_id, emoji, role_id):
+        entry = self.messages.get(message_id)
+        if entry is None:
+            entry = self.messages[message_id] = (guild_id, channel_id, {})
+        entry[2][emoji] = role_id
+
+    def remove(self, message_id, emoji=None):
+        entry = self.messages.get(message_id)
+        if entry is None or (emoji is not None and emoji not in entry[2]):
+            return []
+        removed = [emoji] if emoji is not None else list(entry[2])
+        for key in removed:
+            del entry[2][key]
+        if not entry[2]:
+            del self.messages[message_id]
+        self.synced.discard(message_id)
+        return removed
+
+    def lookup(self, message_id, emoji):
+        entry = self.messages.get(message_id)
+        if entry is None:
+            return None
+        return entry[2].get(emoji_key(emoji))
+
+    def count(self, guild_id=None):
+        return sum(len(entry[2]) for entry in self.messages.values() if guild_id is None or entry[0] == guild_id)
+
+    def change(self, guild, member_id, role_id, add):
+        self.reactions += 1
+        key = (guild.id, member_id)
+        changes = self.pending.get(key)
+        if changes is None:
+            changes = self.pending[key] = {}
+            asyncio.get_running_loop().call_later(self.window, self._flush, guild, member_id)
+        changes[role_id] = add
+
+    def _flush(self, guild, member_id):
+        key = (guild.id, member_id)
+        if key in self.flushing:
+            return
+        future = self.queue.submit(f"PATCH /guilds/{guild.id}/members", functools.partial(self._apply, guild, member_id), PRIORITY_DEFAULT)
+        self.flushing.add(key)
+        future.add_done_callback(functools.partial(self._done, guild, member_id))
+
+    def _done(self, guild, member_id, future):
+        key = (guild.id, member_id)
+        self.flushing.discard(key)
+        changes = self.applying.pop(key, None)
+        if future.cancelled():
+            return
+        delay = self.window
+        error = future.exception()
+        if error is None:
+            self.retries.pop(key, None)
+        else:
+            self.failures += 1
+            attempt = self.retries.get(key, 0) + 1
+            if changes and attempt <= self.max_retries and not isinstance(error, discord.Forbidden):
+                self.retries[key] = attempt
+                self.pending[key] = {**changes, **self.pending.get(key, {})}
+                delay = self.window * 2 ** attempt
+                logging.warning(f"Reaction role update for member {member_id} failed ({error}), retrying in {delay:.1f}s")
+            else:
+                self.retries.pop(key, None)
+                logging.error(f"Reaction role update for member {member_id} failed, dropping {len(changes or ())} changes: {error}")
+        if key in self.pending:
+            asyncio.get_running_loop().call_later(delay, self._flush, guild, member_id)
+
+    async def _apply(self, guild, member_id):
+        key = (guild.id, member_id)
+        changes = self.applying.setdefault(key, {})
+        changes.update(self.pending.pop(key, {}))
+        if not changes:
+            return
+        self.batches += 1
+        member = guild.get_member(member_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(member_id)
+            except discord.NotFound:
+                return
+        current = {role.id for role in member.roles if not role.is_default()}
+        roles = set(current)
+        for role_id, add in changes.items():
+            if add:
+                if guild.get_role(role_id) is not None:
+                    roles.add(role_id)
+            else:
+                roles.discard(role_id)
+        if roles != current:
+            await member.edit(roles=[discord.Object(role_id) for role_id in roles], reason="Reaction roles")
+            self.edits += 1
+
+    def start_resync(self, client):
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self.resync(client))
+
+    async def resync(self, client):
+        for message_id, (guild_id, channel_id, emojis) in list(self.messages.items()):
+            if message_id in self.synced:
+                continue
+            guild = client.get_guild(guild_id)
+            channel = guild.get_channel(channel_id) if guild is not None else None
+            if channel is None:
+                continue
+            try:
+                message = await channel.fetch_message(message_id)
+                for reaction in message.reactions:
+                    role_id = emojis.get(emoji_key(reaction.emoji))
+                    role = guild.get_role(role_id) if role_id is not None else None
+                    if role is None:
+                        continue
+                    async for user in reaction.users():
+                        member = guild.get_member(user.id)
+                        if member is not None and not member.bot and role not in member.roles:
+                            self.change(guild, member.id, role.id, True)
+                            self.resynced += 1
+            except discord.HTTPException:
+                logging.warning(f"Reaction role resync skipped message {message_id} in channel {channel_id}")
+                continue
+            self.synced.add(message_id)
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            'messages': len(self.messages),
+            'mappings': self.count(),
+            'reactions': self.reactions,
+            'batches': self.batches,
+            'edits': self.edits,
+            'pending': len(self.pending) + len(self.applying),
+            'resynced': self.resynced,
+            'failures': self.failures,
+        }
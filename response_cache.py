@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+
+
+def cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(' '.join(str(part).lower().split()).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self.entries.pop(key)[1]
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ImageCache:
+    def __init__(self, memory, directory=None, max_disk_bytes=256 * 1024 * 1024):
+        self.memory = memory
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.disk = OrderedDict()
+        self.disk_bytes = 0
+        self.disk_hits = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            files = []
+            for name in os.listdir(directory):
+                if not name.endswith('.png'):
+                    continue
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name, stat.st_size))
+            for mtime, name, size in sorted(files):
+                self.disk[name] = (mtime, size)
+                self.disk_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key):
+        data = self.memory.get(key)
+        if data is not None:
+            return io.BytesIO(data)
+        if not self.directory:
+            return None
+        entry = self.disk.get(f"{key}.png")
+        if entry is None:
+            return None
+        if entry[0] + self.memory.ttl <= time.time():
+            self._remove_file(f"{key}.png")
+            return None
+        self.disk.move_to_end(f"{key}.png")
+        self.disk_hits += 1
+        return self._path(key)
+
+    async def set(self, key, data):
+        self.memory.set(key, data, len(data))
+        if self.directory and len(data) <= self.max_disk_bytes:
+            await asyncio.to_thread(self._write, key, data)
+            self._index(f"{key}.png", len(data))
+
+    async def adopt(self, key, size):
+        if size <= self.max_disk_bytes:
+            self._index(f"{key}.png", size)
+            return self._path(key)
+        data = await asyncio.to_thread(self._take, key)
+        self.memory.set(key, data, len(data))
+        return io.BytesIO(data)
+
+    def _take(self, key):
+        with open(self._path(key), 'rb') as handle:
+            data = handle.read()
+        os.remove(self._path(key))
+        return data
+
+    def _write(self, key, data):
+        temp_path = self._path(key) + '.tmp'
+        with open(temp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(temp_path, self._path(key))
+
+    def _index(self, name, size):
+        if name in self.disk:
+            self.disk_bytes -= self.disk.pop(name)[1]
+        self.disk[name] = (time.time(), size)
+        self.disk_bytes += size
+        while self.disk_bytes > self.max_disk_bytes:
+            self._remove_file(next(iter(self.disk)))
+
+    def _remove_file(self, name):
+        self.disk_bytes -= self.disk.pop(name)[1]
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def metrics(self):
+        stats = self.memory.metrics()
+        stats['disk_entries'] = len(self.disk)
+        stats['disk_bytes'] = self.disk_bytes
+        stats['disk_hits'] = self.disk_hits
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + self.disk_hits) / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,79 @@
+import time
+
+
+def shard_for(guild_id, shard_count):
+    if guild_id is None or not shard_count or shard_count <= 1:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+
+def parse_shard_ids(spec):
+    shard_ids = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, _, last = item.partition('-')
+        shard_ids.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(shard_ids)) or None
+
+
+def parse_shard_options(count, shard_ids):
+    if not count:
+        if shard_ids is not None:
+            raise ValueError("SHARD_IDS requires a numeric SHARD_COUNT")
+        return {}
+    if count == 'auto':
+        if shard_ids is not None:
+            raise ValueError("SHARD_IDS requires a numeric SHARD_COUNT, not auto")
+        return {'shard_count': None, 'shard_ids': None}
+    if not count.isdigit() or int(count) < 1:
+        raise ValueError(f"SHARD_COUNT must be a positive number or auto, got {count!r}")
+    if shard_ids is not None and shard_ids[-1] >= int(count):
+        raise ValueError(f"SHARD_IDS must be below SHARD_COUNT ({count}), got {shard_ids[-1]}")
+    return {'shard_count': int(count), 'shard_ids': shard_ids}
+
+
+class ShardStats:
+    def __init__(self, window=60, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.buckets = {}
+        self.totals = {}
+        self.connections = {}
+
+    def record(self, shard_id):
+        second = int(self.clock())
+        buckets = self.buckets.get(shard_id)
+        if buckets is None:
+            buckets = self.buckets[shard_id] = ([0] * self.window, [0] * self.window)
+        counts, stamps = buckets
+        slot = second % self.window
+        if stamps[slot] != second:
+            stamps[slot] = second
+            counts[slot] = 0
+        counts[slot] += 1
+        self.totals[shard_id] = self.totals.get(shard_id, 0) + 1
+
+    def rate(self, shard_id):
+        buckets = self.buckets.get(shard_id)
+        if buckets is None:
+            return 0.0
+        oldest = int(self.clock()) - self.window
+        return sum(count for count, stamp in zip(*buckets) if stamp > oldest) / self.window
+
+    def connection(self, shard_id, event):
+        counts = self.connections.setdefault(shard_id, {'connects': 0, 'disconnects': 0, 'resumes': 0})
+        counts[event] += 1
+
+    def metrics(self, latencies):
+        shards = {}
+        for shard_id, latency in latencies:
+            counts = self.connections.get(shard_id, {'connects': 0, 'disconnects': 0, 'resumes': 0})
+            shards[shard_id] = {
+                'latency_ms': round(latency * 1000) if latency == latency and latency != float('inf') else None,
+                'events': self.totals.get(shard_id, 0),
+                'events_per_second': round(self.rate(shard_id), 2),
+                **counts,
+            }
+        return shards
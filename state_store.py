@@ -0,0 +1,168 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    guild_id INTEGER NOT NULL,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (guild_id, namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+def is_locked(error):
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+class StateStore:
+    def __init__(self, path, batch_interval=0.25, batch_size=1000, schema='', busy_timeout=10.0, lock_retries=5):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self.lock_retries = lock_retries
+        self.loaders = {}
+        self.loaded_guilds = set()
+        self.writes_queued = 0
+        self.writes_committed = 0
+        self.writes_failed = 0
+        self.writes_done = 0
+        self.batches = 0
+        self.lock_waits = 0
+        self._pending = queue.SimpleQueue()
+        self._connection = self._connect()
+        self._connection.executescript(SCHEMA + schema)
+        self._writer = threading.Thread(target=self._write_loop, name='state-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=self.busy_timeout)
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def register(self, namespace, loader):
+        self.loaders[namespace] = loader
+
+    def load_guild(self, guild_id):
+        if guild_id in self.loaded_guilds:
+            return False
+        self.loaded_guilds.add(guild_id)
+        rows = self._connection.execute('SELECT namespace, key, value FROM state WHERE guild_id = ?', (guild_id,)).fetchall()
+        for namespace, key, value in rows:
+            loader = self.loaders.get(namespace)
+            if loader:
+                loader(guild_id, key, json.loads(value))
+        return True
+
+    def query(self, sql, params=()):
+        return self._connection.execute(sql, params).fetchall()
+
+    def submit(self, sql, params=()):
+        self.writes_queued += 1
+        self._pending.put((sql, params))
+
+    def put(self, namespace, guild_id, key, value=True):
+        self.submit('INSERT OR REPLACE INTO state (guild_id, namespace, key, value) VALUES (?, ?, ?, ?)', (guild_id, namespace, str(key), json.dumps(value)))
+
+    def delete(self, namespace, guild_id, key):
+        self.submit('DELETE FROM state WHERE guild_id = ? AND namespace = ? AND key = ?', (guild_id, namespace, str(key)))
+
+    def flush(self):
+        done = threading.Event()
+        self._pending.put((None, done))
+        done.wait()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join()
+        self._connection.close()
+
+    def _write_loop(self):
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(connection, batch)
+        connection.close()
+
+    def _commit(self, connection, batch):
+        waiters = [params for sql, params in batch if sql is None]
+        writes = [(sql, params) for sql, params in batch if sql is not None]
+        try:
+            for attempt in range(self.lock_retries + 1):
+                try:
+                    self._execute(connection, writes)
+                    self.writes_committed += len(writes)
+                    self.batches += 1
+                    return
+                except sqlite3.OperationalError as error:
+                    if not is_locked(error) or attempt == self.lock_retries:
+                        break
+                    self.lock_waits += 1
+                    logging.warning(f"State store is locked, retrying a batch of {len(writes)} writes")
+                    time.sleep(min(5.0, 0.1 * 2 ** attempt))
+                except sqlite3.Error:
+                    break
+            self._replay(connection, writes)
+        finally:
+            self.writes_done = self.writes_committed + self.writes_failed
+            for waiter in waiters:
+                waiter.set()
+
+    def _execute(self, connection, writes):
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in writes:
+                connection.execute(sql, params)
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+
+    def _replay(self, connection, writes):
+        for sql, params in writes:
+            try:
+                connection.execute(sql, params)
+                self.writes_committed += 1
+            except sqlite3.Error:
+                self.writes_failed += 1
+                logging.exception(f"State store dropped a write: {sql} {params!r}")
+        self.batches += 1
+
+    def metrics(self):
+        return {
+            'loaded_guilds': len(self.loaded_guilds),
+            'writes_queued': self.writes_queued,
+            'writes_committed': self.writes_committed,
+            'writes_failed': self.writes_failed,
+            'batches': self.batches,
+            'lock_waits': self.lock_waits,
+            'backlog': self.writes_queued - self.writes_done,
+        }
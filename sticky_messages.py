@@ -0,0 +1,75 @@
+import asyncio
+import logging
+
+LEGACY_CALLS_PER_TRIGGER = 3
+
+
+class StickyEngine:
+    def __init__(self, repost, quiet_window=5.0, max_delay=30.0):
+        self.repost = repost
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay
+        self.pending = {}
+        self.in_flight = {}
+        self.triggers = 0
+        self.reposts = 0
+        self.rest_calls = 0
+        self.failures = 0
+
+    def touch(self, channel):
+        self.triggers += 1
+        self._schedule(channel)
+
+    def _schedule(self, channel):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        entry = self.pending.get(channel.id)
+        if entry is None:
+            first_at = now
+        else:
+            entry[0].cancel()
+            first_at = entry[1]
+        delay = max(0, min(self.quiet_window, first_at + self.max_delay - now))
+        self.pending[channel.id] = (loop.call_later(delay, self._fire, channel), first_at)
+
+    def _fire(self, channel):
+        del self.pending[channel.id]
+        if channel.id in self.in_flight:
+            self._schedule(channel)
+            return
+        self.in_flight[channel.id] = asyncio.create_task(self._run(channel))
+
+    async def _run(self, channel):
+        try:
+            calls = await self.repost(channel)
+            self.rest_calls += calls
+            self.reposts += 1
+        except Exception:
+            self.failures += 1
+            logging.exception(f"Sticky message repost failed in channel {channel.id}")
+        finally:
+            del self.in_flight[channel.id]
+
+    def discard(self, channel_id):
+        entry = self.pending.pop(channel_id, None)
+        if entry is not None:
+            entry[0].cancel()
+
+    async def close(self):
+        for handle, _ in self.pending.values():
+            handle.cancel()
+        self.pending.clear()
+        tasks = list(self.in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            'triggers': self.triggers,
+            'reposts': self.reposts,
+            'rest_calls': self.rest_calls,
+            'rest_calls_saved': self.triggers * LEGACY_CALLS_PER_TRIGGER - self.rest_calls,
+            'pending': len(self.pending),
+            'failures': self.failures,
+        }
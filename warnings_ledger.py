@@ -0,0 +1,166 @@
+import asyncio
+import re
+import time
+from array import array
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    created REAL NOT NULL,
+    moderator_id INTEGER,
+    reason TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id, created)
+) WITHOUT ROWID;
+"""
+
+ESCALATION_ACTIONS = {'mute': 1, 'ban': 2}
+DURATION_PATTERN = re.compile(r'^(\d+)(s|m|h|d)?$')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_seconds(text):
+    match = DURATION_PATTERN.match(text.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {text}")
+    return int(match.group(1)) * UNIT_SECONDS[match.group(2) or 'm']
+
+
+def parse_rules(spec):
+    rules = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        threshold, _, outcome = item.partition('=')
+        count, _, window = threshold.partition('/')
+        action, _, duration = outcome.strip().partition(':')
+        if action not in ESCALATION_ACTIONS:
+            raise ValueError(f"Unknown escalation action: {action}")
+        rules.append((int(count), parse_seconds(window) if window else None, action, parse_seconds(duration) if duration else None))
+    return sorted(rules, key=lambda rule: (ESCALATION_ACTIONS[rule[2]], rule[0]), reverse=True)
+
+
+class WarningsLedger:
+    def __init__(self, store, rules=(), max_cached=50_000, clock=time.time):
+        self.store = store
+        self.max_cached = max_cached
+        self.rules = list(rules)
+        self.clock = clock
+        self.depth = max([rule[0] for rule in self.rules] + [1]) + 1
+        self.recent = OrderedDict()
+        self.pending = {}
+        self.last_write = 0
+        self.inserted = 0
+        self.removed = 0
+        self.escalations = 0
+        self.queries = 0
+
+    def _submit(self, key, sql, params):
+        self.store.submit(sql, params)
+        self.last_write = self.pending[key] = self.store.writes_queued
+        if len(self.pending) > self.max_cached:
+            committed = self.store.writes_done
+            self.pending = {key: write for key, write in self.pending.items() if write > committed}
+
+    async def _sync(self, key=None):
+        write = self.last_write if key is None else self.pending.get(key, 0)
+        if write > self.store.writes_done:
+            await asyncio.to_thread(self.store.flush)
+
+    def _query(self, sql, params):
+        self.queries += 1
+        return self.store.query(sql, params)
+
+    async def _ring(self, guild_id, user_id):
+        key = (guild_id << 64) | user_id
+        ring = self.recent.get(key)
+        if ring is not None:
+            self.recent.move_to_end(key)
+        else:
+            await self._sync(key)
+            ring = self.recent.get(key)
+            if ring is not None:
+                return ring
+            rows = self._query('SELECT created FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY created DESC LIMIT ?', (guild_id, user_id, self.depth))
+            ring = self.recent[key] = array('d', bytes(8 * (self.depth + 1)))
+            if len(self.recent) > self.max_cached:
+                self.recent.popitem(last=False)
+            for (created,) in reversed(rows):
+                self._push(ring, created)
+        return ring
+
+    def _push(self, ring, created):
+        count = int(ring[0]) + 1
+        ring[0] = count
+        ring[(count - 1) % self.depth + 1] = created
+
+    def _escalation(self, ring, now):
+        total = int(ring[0])
+        for count, window, action, duration in self.rules:
+            if total < count:
+                continue
+            since = now - window if window is not None else float('-inf')
+            if ring[(total - count) % self.depth + 1] < since:
+                continue
+            if total > count and ring[(total - count - 1) % self.depth + 1] >= since:
+                continue
+            self.escalations += 1
+            return action, duration, count, window
+        return None
+
+    async def add(self, guild_id, user_id, moderator_id, reason):
+        now = self.clock()
+        ring = await self._ring(guild_id, user_id)
+        if int(ring[0]) and now <= ring[(int(ring[0]) - 1) % self.depth + 1]:
+            now = ring[(int(ring[0]) - 1) % self.depth + 1] + 1e-6
+        self._submit((guild_id << 64) | user_id, 'INSERT INTO warnings (guild_id, user_id, created, moderator_id, reason) VALUES (?, ?, ?, ?, ?)', (guild_id, user_id, now, moderator_id, reason))
+        self.inserted += 1
+        self._push(ring, now)
+        return self._escalation(ring, now)
+
+    def import_legacy(self, guild_id, user_id, warnings):
+        key = (guild_id << 64) | user_id
+        for created, reason in warnings:
+            self._submit(key, 'INSERT OR IGNORE INTO warnings (guild_id, user_id, created, moderator_id, reason) VALUES (?, ?, ?, NULL, ?)', (guild_id, user_id, created, reason))
+        self.recent.pop(key, None)
+
+    async def count(self, guild_id, user_id, since=None):
+        await self._sync()
+        return self._query('SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND created >= ?', (guild_id, user_id, since or 0))[0][0]
+
+    async def page(self, guild_id, user_id, page=1, per_page=10, since=None):
+        total = await self.count(guild_id, user_id, since)
+        before = self._query('SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND created < ?', (guild_id, user_id, since))[0][0] if since else 0
+        rows = self._query('SELECT created, moderator_id, reason FROM warnings WHERE guild_id = ? AND user_id = ? AND created >= ? ORDER BY created LIMIT ? OFFSET ?',
+                           (guild_id, user_id, since or 0, per_page, (page - 1) * per_page))
+        return rows, total, before + (page - 1) * per_page + 1
+
+    async def remove(self, guild_id, user_id, number):
+        await self._sync()
+        rows = self._query('SELECT created FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY created LIMIT 1 OFFSET ?', (guild_id, user_id, number - 1))
+        if not rows:
+            return False
+        key = (guild_id << 64) | user_id
+        self._submit(key, 'DELETE FROM warnings WHERE guild_id = ? AND user_id = ? AND created = ?', (guild_id, user_id, rows[0][0]))
+        self.removed += 1
+        self.recent.pop(key, None)
+        return True
+
+    async def clear(self, guild_id, user_id):
+        key = (guild_id << 64) | user_id
+        removed = await self.count(guild_id, user_id)
+        if removed:
+            self._submit(key, 'DELETE FROM warnings WHERE guild_id = ? AND user_id = ?', (guild_id, user_id))
+            self.removed += removed
+        self.recent.pop(key, None)
+        return removed
+
+    def metrics(self):
+        return {
+            'cached_members': len(self.recent),
+            'inserted': self.inserted,
+            'removed': self.removed,
+            'escalations': self.escalations,
+            'queries': self.queries,
+        }
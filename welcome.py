@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import re
+
+PLACEHOLDERS = {'member': 'member', 'user': 'member', 'mention': 'member', 'name': 'name', 'guild': 'guild', 'server': 'guild', 'count': 'count'}
+PLACEHOLDER_PATTERN = re.compile(r'\{(' + '|'.join(PLACEHOLDERS) + r')\}')
+MAX_MESSAGE_LENGTH = 2000
+
+
+def compile_template(message):
+    parts = PLACEHOLDER_PATTERN.split(message)
+    template = ''.join('{' + PLACEHOLDERS[part] + '}' if index % 2 else part.replace('{', '{{').replace('}', '}}') for index, part in enumerate(parts))
+    if len(parts) == 1:
+        template = "Welcome {member} to {guild}. " + template
+    return template
+
+
+def render(template, guild, members):
+    content = template.format(
+        member=', '.join(member.mention for member in members),
+        name=', '.join(member.display_name for member in members),
+        guild=guild.name,
+        count=guild.member_count,
+    )
+    return content if len(content) <= MAX_MESSAGE_LENGTH else content[:MAX_MESSAGE_LENGTH - 3] + '...'
+
+
+class _Batch:
+    __slots__ = ('channel', 'template', 'members', 'timer')
+
+    def __init__(self, channel, template):
+        self.channel = channel
+        self.template = template
+        self.members = []
+        self.timer = None
+
+
+class WelcomeMessages:
+    def __init__(self, send, window=2.0, max_members=20):
+        self.send = send
+        self.window = window
+        self.max_members = max_members
+        self.guilds = {}
+        self.batches = {}
+        self._tasks = set()
+        self.joins = 0
+        self.welcomed = 0
+        self.messages = 0
+        self.failures = 0
+
+    def set(self, guild_id, channel_id, message):
+        self.guilds.setdefault(guild_id, {})[channel_id] = compile_template(message)
+
+    def remove(self, guild_id, channel_id):
+        channels = self.guilds.get(guild_id)
+        if channels is None or channel_id not in channels:
+            return False
+        del channels[channel_id]
+        if not channels:
+            del self.guilds[guild_id]
+        batch = self.batches.pop(channel_id, None)
+        if batch is not None:
+            batch.timer.cancel()
+        return True
+
+    def join(self, member):
+        channels = self.guilds.get(member.guild.id)
+        if not channels:
+            return
+        self.joins += 1
+        for channel_id, template in channels.items():
+            batch = self.batches.get(channel_id)
+            if batch is None:
+                channel = member.guild.get_channel(channel_id)
+                if channel is None:
+                    continue
+                batch = self.batches[channel_id] = _Batch(channel, template)
+                batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, channel_id)
+            batch.members.append(member)
+            if len(batch.members) >= self.max_members:
+                self._flush(channel_id)
+
+    def _flush(self, channel_id):
+        batch = self.batches.pop(channel_id, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            await self.send(batch.channel, render(batch.template, batch.channel.guild, batch.members))
+            self.messages += 1
+            self.welcomed += len(batch.members)
+        except Exception:
+            self.failures += 1
+            logging.exception(f"Failed to welcome {len(batch.members)} members in channel {batch.channel.id}")
+
+    async def close(self):
+        for channel_id in list(self.batches):
+            self._flush(channel_id)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            'guilds': len(self.guilds),
+            'channels': sum(len(channels) for channels in self.guilds.values()),
+            'joins': self.joins,
+            'welcomed': self.welcomed,
+            'messages': self.messages,
+            'pending': sum(len(batch.members) for batch in self.batches.values()),
+            'failures': self.failures,
+        }